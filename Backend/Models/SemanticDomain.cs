@@ -129,7 +129,10 @@ namespace BackendFramework.Models
 
     /// <remarks>
     /// This is used in an OpenAPI return value serializer, so its attributes must be defined as properties.
+    /// Tree documents may also have the ancestors, depth, preOrder, and subtreeSize fields added by
+    /// deploy/scripts/sem_dom_import.py --tree-positions; they are not used here.
     /// </remarks>
+    [BsonIgnoreExtraElements]
     public class SemanticDomainTreeNode
     {
         [BsonId]
@@ -1,4 +1,87 @@
 #! /usr/bin/bash
 
-mongoimport -d CombineDatabase -c SemanticDomainTree /data/semantic-domains/tree.json --mode=merge --upsertFields=id,guid,lang
-mongoimport -d CombineDatabase -c SemanticDomains /data/semantic-domains/nodes.json --mode=merge --upsertFields=id,guid,lang
+# Import the semantic domains into the database.
+#
+# The digest of the imported files' manifest is recorded in the SemanticDomainsVersion
+# collection.  Nothing is imported if the recorded digest is already current.  If the
+# image has delta files whose base is the recorded digest, only the documents that were
+# added, changed, or deleted are imported.  Otherwise all documents are imported and
+# the documents that are not in the manifest are deleted.  Either way, each imported
+# document replaces the document with the same lang, id, and guid.
+
+set -e
+
+SEM_DOM_DIR=/data/semantic-domains
+DB_NAME=CombineDatabase
+
+import_file() {
+  # import_file <collection> <file> [<mode>]
+  if [ -s "$2" ]; then
+    mongoimport -d ${DB_NAME} -c "$1" "$2" --mode="${3:-upsert}" --upsertFields=id,guid,lang
+  fi
+}
+
+delete_missing() {
+  # delete_missing <collection> <manifest kind>
+  mongosh --quiet --eval "
+    const manifest = JSON.parse(require('fs').readFileSync('${SEM_DOM_DIR}/manifest.json', 'utf8'));
+    const keys = new Set(manifest['$2'].map((entry) => entry.slice(0, 3).join('\t')));
+    const collection = db.getSiblingDB('${DB_NAME}').getCollection('$1');
+    const missing = [];
+    collection.find({}, { lang: 1, id: 1, guid: 1 }).forEach((doc) => {
+      if (!keys.has([doc.lang, doc.id, doc.guid].join('\t'))) {
+        missing.push(doc._id);
+      }
+    });
+    if (missing.length) {
+      collection.deleteMany({ _id: { \$in: missing } });
+      print('Deleted ' + missing.length + ' documents from $1');
+    }
+  "
+}
+
+read_digest() {
+  # read_digest <json file> <field>
+  if [ -f "$1" ]; then
+    mongosh --quiet --nodb --eval "print(JSON.parse(require('fs').readFileSync('$1', 'utf8')).$2)"
+  fi
+}
+
+target="$(read_digest ${SEM_DOM_DIR}/manifest.json digest)"
+installed="$(mongosh --quiet --eval "
+  const combineDb = db.getSiblingDB('${DB_NAME}');
+  const empty = combineDb.SemanticDomainTree.countDocuments({}) === 0 ||
+    combineDb.SemanticDomains.countDocuments({}) === 0;
+  const version = combineDb.SemanticDomainsVersion.findOne({ _id: 'manifest' });
+  print(empty || !version ? '' : version.digest);
+")"
+
+if [ -n "${installed}" ] && [ "${installed}" = "${target}" ]; then
+  echo "Semantic domains are up to date"
+  exit 0
+fi
+
+if [ -n "${installed}" ] && [ "${installed}" = "$(read_digest ${SEM_DOM_DIR}/delta.json base)" ]; then
+  echo "Importing semantic domain changes"
+  import_file SemanticDomainTree ${SEM_DOM_DIR}/tree.added.json
+  import_file SemanticDomainTree ${SEM_DOM_DIR}/tree.changed.json
+  import_file SemanticDomainTree ${SEM_DOM_DIR}/tree.deleted.json delete
+  import_file SemanticDomains ${SEM_DOM_DIR}/nodes.added.json
+  import_file SemanticDomains ${SEM_DOM_DIR}/nodes.changed.json
+  import_file SemanticDomains ${SEM_DOM_DIR}/nodes.deleted.json delete
+else
+  echo "Importing all semantic domains"
+  import_file SemanticDomainTree ${SEM_DOM_DIR}/tree.json
+  import_file SemanticDomains ${SEM_DOM_DIR}/nodes.json
+  if [ -n "${target}" ]; then
+    delete_missing SemanticDomainTree tree
+    delete_missing SemanticDomains nodes
+  fi
+fi
+
+if [ -n "${target}" ]; then
+  mongosh --quiet --eval "
+    db.getSiblingDB('${DB_NAME}').SemanticDomainsVersion.replaceOne(
+      { _id: 'manifest' }, { _id: 'manifest', digest: '${target}' }, { upsert: true });
+  "
+fi
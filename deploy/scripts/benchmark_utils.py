@@ -0,0 +1,97 @@
+"""
+Functions shared by the benchmark scripts.
+
+Each run of a benchmark is in a fresh process so that its peak resident set size is
+not affected by the other runs.  The results are collected in a JSON report with the
+commit, Python version, and platform they were measured on.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+import json
+import logging
+from pathlib import Path
+import platform
+import resource
+import subprocess
+import sys
+from typing import Any, Callable, Dict, Iterable, Optional, TypeVar
+
+Run = TypeVar("Run")
+
+
+def git_commit() -> Optional[str]:
+    """The short hash of the checked out commit, or None outside of a git repository."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def peak_rss_kib() -> int:
+    """The peak resident set size of this process and its children, in KiB."""
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    return max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    ) // (1024 if sys.platform == "darwin" else 1)
+
+
+def run_benchmark(
+    function: Callable[[Run], Dict[str, Any]], runs: Iterable[Run], version: int, **fields: Any
+) -> Dict[str, Any]:
+    """
+    Call function on each run in a new process and return the report of the results.
+
+    The fields are added to the report before the results.
+    """
+    results = []
+    for run in runs:
+        logging.info(f"Running {run}")
+        # A new process for each run so that ru_maxrss is the peak of that run
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            results.append(executor.submit(function, run).result())
+    return {
+        "version": version,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **fields,
+        "results": results,
+    }
+
+
+def load_report(file_name: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Load a JSON report, e.g., a baseline, if a file is given."""
+    if file_name is None:
+        return None
+    with open(file_name, "r", encoding="utf-8") as file:
+        report: Dict[str, Any] = json.load(file)
+    return report
+
+
+def write_report(report: Dict[str, Any], file_name: Optional[str]) -> None:
+    """Write a JSON report if a file is given."""
+    if file_name is None:
+        return
+    with open(file_name, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=4)
+
+
+def results_by_key(
+    report: Optional[Dict[str, Any]], key: Callable[[Dict[str, Any]], str]
+) -> Dict[str, Dict[str, Any]]:
+    """Index the results of a report, e.g., a baseline, by key."""
+    if report is None:
+        return {}
+    return {key(result): result for result in report["results"]}
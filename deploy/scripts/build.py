@@ -14,7 +14,10 @@ When 'docker' is used for the build, the BuildKit backend will be enabled.
 from __future__ import annotations
 
 from argparse import ArgumentParser, HelpFormatter, Namespace
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from functools import partial
+import hashlib
+import json
 import logging
 import os
 from pathlib import Path
@@ -22,11 +25,20 @@ import subprocess
 import sys
 import textwrap
 import time
-from typing import Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from app_release import get_release, set_release
 from enum_types import JobStatus
+import ndjson
+import sem_dom_delta
+import sem_dom_import
 from sem_dom_import import generate_semantic_domains
+import sem_dom_profile
+import sem_dom_search
+import sem_dom_shards
+from sem_dom_shards import file_digest
+import sem_dom_tree
+import semantic_domains
 from streamfile import StreamFile
 from utils import init_logging
 
@@ -39,6 +51,18 @@ class BuildSpec:
     post_build: Callable[[], None]
 
 
+@dataclass(frozen=True)
+class SemanticDomainOptions:
+    """The options for generating the semantic domain files in the database pre-build."""
+
+    output_format: str = "pretty"
+    streaming: bool = False
+    jobs: int = 1
+    profile: bool = False
+    # Output directory or manifest of a previous generation to write the delta files from
+    previous: Optional[Path] = None
+
+
 @dataclass
 class Job:
     """Dataclass for a command to be queued with the working directory to be used."""
@@ -139,12 +163,116 @@ project_dir = Path(__file__).resolve().parent.parent.parent
 """Absolute path to the checked out repository."""
 
 
+sem_dom_source_dir = project_dir / "deploy" / "scripts" / "semantic_domains" / "xml"
+sem_dom_output_dir = project_dir / "database" / "semantic_domains"
+sem_dom_cache_file = project_dir / "database" / "semantic_domains.cache.json"
+sem_dom_question_mode = "flat"
+
+
+def semantic_domains_cache_key(input_files: List[Path], options: SemanticDomainOptions) -> str:
+    """
+    Compute the cache key for the semantic domain files.
+
+    The key covers the contents of the input XML files, the code that generates
+    the output files, and the generator options, including the digest of the
+    previous generation when one is given.
+    """
+    generator_files = [
+        Path(module.__file__)
+        for module in (
+            ndjson,
+            sem_dom_delta,
+            sem_dom_import,
+            sem_dom_profile,
+            sem_dom_search,
+            sem_dom_shards,
+            sem_dom_tree,
+            semantic_domains,
+        )
+        if module.__file__ is not None
+    ]
+    key = hashlib.sha256()
+    for file_path in [*input_files, *generator_files]:
+        key.update(f"{file_path.name}:{file_digest(file_path)}\n".encode("utf-8"))
+    key.update(f"question-mode:{sem_dom_question_mode}\n".encode("utf-8"))
+    key.update(f"format:{options.output_format}\n".encode("utf-8"))
+    key.update(f"streaming:{options.streaming}\n".encode("utf-8"))
+    if options.previous is not None:
+        previous_digest = sem_dom_delta.load_manifest(options.previous)["digest"]
+        key.update(f"previous:{previous_digest}\n".encode("utf-8"))
+    return key.hexdigest()
+
+
+def read_semantic_domains_cache() -> Dict[str, Any]:
+    if not sem_dom_cache_file.is_file():
+        return {}
+    try:
+        with open(sem_dom_cache_file, "r", encoding="utf-8") as file:
+            cache: Dict[str, Any] = json.load(file)
+    except (OSError, json.JSONDecodeError):
+        logging.warning(f"Ignoring unreadable cache file {sem_dom_cache_file}")
+        return {}
+    return cache
+
+
+def clear_semantic_domains_cache() -> None:
+    if sem_dom_cache_file.exists():
+        sem_dom_cache_file.unlink()
+
+
+def log_semantic_domains_profile(profile: Dict[str, Any]) -> None:
+    """Log the time spent in each phase of the generation of the semantic domains."""
+    logging.info(f"Semantic domain import profile ({profile['created']}):")
+    for line in sem_dom_profile.format_summary(profile):
+        logging.info(line)
+
+
 # Pre-build/post-build functions for the different build components
-def build_semantic_domains() -> None:
-    """Create the semantic domain definition files."""
-    source_dir = project_dir / "deploy" / "scripts" / "semantic_domains" / "xml"
-    output_dir = project_dir / "database" / "semantic_domains"
-    generate_semantic_domains(list(source_dir.glob("*.xml")), output_dir)
+def build_semantic_domains(
+    options: SemanticDomainOptions = SemanticDomainOptions(),
+    profiles: Optional[List[Dict[str, Any]]] = None,
+) -> None:
+    """
+    Create the semantic domain definition files.
+
+    The files are only regenerated when the cache key or the existing output
+    files differ from those recorded in the cache file.  The delta files from
+    options.previous, or else from the files being replaced, are also written so
+    that update-semantic-domains.sh can import only the changes.  When
+    options.profile is set, the phases of the generation are profiled and the
+    profile is added to profiles, for the job summary.
+    """
+    input_files = sorted(sem_dom_source_dir.glob("*.xml"))
+    cache_key = semantic_domains_cache_key(input_files, options)
+    cache = read_semantic_domains_cache()
+    if cache.get("key") == cache_key and all(
+        (sem_dom_output_dir / name).is_file() and file_digest(sem_dom_output_dir / name) == digest
+        for name, digest in cache.get("outputs", {}).items()
+    ):
+        logging.info("Semantic domain cache hit: reusing existing output files")
+        return
+    logging.info("Semantic domain cache miss: generating output files")
+    previous = options.previous
+    if previous is None and (sem_dom_output_dir / sem_dom_delta.MANIFEST_FILE).is_file():
+        previous = sem_dom_output_dir
+    profile = generate_semantic_domains(
+        input_files,
+        sem_dom_output_dir,
+        flatten_questions=(sem_dom_question_mode == "flat"),
+        output_format=options.output_format,
+        streaming=options.streaming,
+        jobs=options.jobs,
+        previous=previous,
+        profile=options.profile,
+    )
+    outputs = {
+        file_path.name: file_digest(file_path)
+        for file_path in sorted(sem_dom_output_dir.glob("*.json"))
+    }
+    with open(sem_dom_cache_file, "w", encoding="utf-8") as file:
+        json.dump({"key": cache_key, "outputs": outputs}, file, indent=4)
+    if profile is not None and profiles is not None:
+        profiles.append(profile)
 
 
 def create_release_file() -> None:
@@ -230,13 +358,48 @@ def parse_args() -> Namespace:
         default="k8s.io",
     )
     parser.add_argument(
-        "--no-cache", action="store_true", help="Do not use cached images from previous builds."
+        "--no-cache",
+        action="store_true",
+        help="Do not use cached images or semantic domain files from previous builds.",
     )
     parser.add_argument(
         "--pull",
         action="store_true",
         help="Always attempt to pull a newer version of an image used in the build.",
     )
+    parser.add_argument(
+        "--sem-dom-format",
+        choices=ndjson.OUTPUT_FORMATS,
+        default="pretty",
+        help="Format of the semantic domain files: 'compact' writes one document per line.",
+    )
+    parser.add_argument(
+        "--sem-dom-streaming",
+        action="store_true",
+        help="Generate the semantic domain files with the streaming engine, "
+        "which parses each XML file without holding it in memory.",
+    )
+    parser.add_argument(
+        "--sem-dom-jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes used to parse the semantic domain XML files; "
+        "0 for one per CPU.",
+    )
+    parser.add_argument(
+        "--sem-dom-previous",
+        type=Path,
+        help="Previous semantic domain output directory or its manifest.json, e.g., of "
+        "the release being upgraded, to write the delta files from so that the database "
+        "imports only the changes.  Defaults to the files of the previous build, if any.",
+    )
+    parser.add_argument(
+        "--profile-semantic-domains",
+        action="store_true",
+        help="Profile the generation of the semantic domain files and log the time spent "
+        "in each phase in the job summary.  Nothing is logged when the cached files are "
+        "reused.",
+    )
     logging_group = parser.add_mutually_exclusive_group()
     logging_group.add_argument(
         "--quiet",
@@ -295,6 +458,22 @@ def main() -> None:
     else:
         to_do = build_specs.keys()
 
+    if args.no_cache:
+        clear_semantic_domains_cache()
+    # The database pre-build generates the semantic domain files with the given options
+    sem_dom_profiles: List[Dict[str, Any]] = []
+    sem_dom_options = SemanticDomainOptions(
+        output_format=args.sem_dom_format,
+        streaming=args.sem_dom_streaming,
+        jobs=args.sem_dom_jobs or os.cpu_count() or 1,
+        profile=args.profile_semantic_domains,
+        previous=args.sem_dom_previous,
+    )
+    build_specs["database"] = replace(
+        build_specs["database"],
+        pre_build=partial(build_semantic_domains, sem_dom_options, sem_dom_profiles),
+    )
+
     # Create the set of jobs to be run for all components
     job_set: Dict[str, JobQueue] = {}
     for component in to_do:
@@ -335,6 +514,8 @@ def main() -> None:
             if curr_queue.status == JobStatus.ERROR:
                 build_returncode = curr_queue.returncode
             logging.info(f"{component}: {curr_queue.status.value}")
+        for profile in sem_dom_profiles:
+            log_semantic_domains_profile(profile)
     sys.exit(build_returncode)
 
 
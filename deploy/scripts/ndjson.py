@@ -0,0 +1,79 @@
+"""
+Encode and decode the JSON documents that are imported into the Mongo database.
+
+Two output formats are supported:
+ - compact: one document per line (NDJSON).  orjson is used when it is installed;
+            otherwise the standard json module produces the same bytes.
+ - pretty:  concatenated documents indented by 4 spaces.
+
+Both formats can be read by mongoimport and by read_documents().
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+OUTPUT_FORMATS = ["compact", "pretty"]
+
+try:
+    import orjson
+
+    encoder_name = "orjson"
+
+    def dumps_compact(document: Dict[str, Any]) -> bytes:
+        return orjson.dumps(document) + b"\n"
+
+except ImportError:
+    encoder_name = "json"
+    _compact_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def dumps_compact(document: Dict[str, Any]) -> bytes:
+        return _compact_encoder.encode(document).encode("utf-8") + b"\n"
+
+
+def dumps_pretty(document: Dict[str, Any]) -> bytes:
+    return f"{json.dumps(document, indent=4)}\n".encode("utf-8")
+
+
+def dumps(document: Dict[str, Any], output_format: str) -> bytes:
+    """Encode a document, including its trailing newline, in the requested format."""
+    if output_format == "compact":
+        return dumps_compact(document)
+    if output_format == "pretty":
+        return dumps_pretty(document)
+    raise ValueError(f"Unknown output format: {output_format}")
+
+
+def decode_documents(decoder: json.JSONDecoder, text: str) -> Tuple[List[Dict[str, Any]], str]:
+    """Decode the complete documents at the start of text; returns them and the rest of text."""
+    documents: List[Dict[str, Any]] = []
+    while True:
+        text = text.lstrip()
+        if not text:
+            return (documents, "")
+        try:
+            document, end = decoder.raw_decode(text)
+        except json.JSONDecodeError:
+            return (documents, text)
+        documents.append(document)
+        text = text[end:]
+
+
+def read_documents(file_path: Path) -> Iterator[Dict[str, Any]]:
+    """Read the documents from a file written in either output format."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    with open(file_path, "r", encoding="utf-8") as file:
+        for line in file:
+            buffer = line if not buffer else buffer + line
+            # A document ends on its own line (compact) or on a line that starts with
+            # its closing brace (pretty); don't try to decode a partial document.
+            if buffer is line or line.startswith("}"):
+                documents, buffer = decode_documents(decoder, buffer)
+                yield from documents
+    documents, buffer = decode_documents(decoder, buffer)
+    yield from documents
+    if buffer:
+        raise ValueError(f"Incomplete JSON document at the end of {file_path}")
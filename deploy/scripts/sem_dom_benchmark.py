@@ -0,0 +1,410 @@
+#!/usr/bin/env python
+"""
+Benchmark the semantic domain import on synthetic semantic domain files.
+
+A SemanticDomainList XML file with the same structure as the files in
+semantic_domains/xml is generated for each scale that is requested.  The file is then
+parsed with parse_sem_dom_file() and written with write_json() in each output format,
+and the time spent in get_sem_doms(), save_domain(), and write_json() is recorded.
+Each scale is run in a fresh process so that its peak resident set size is not
+affected by the other scales.
+
+The results are written to a JSON report.  When a baseline report is given, the
+change of each timing from the baseline is also printed, e.g.:
+
+    python sem_dom_benchmark.py --domains 2000 20000 --output after.json --baseline before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import asdict, dataclass
+import functools
+import logging
+from pathlib import Path
+import random
+import statistics
+from tempfile import TemporaryDirectory
+import time
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+from xml.etree import ElementTree
+
+import benchmark_utils
+import ndjson
+import sem_dom_import
+
+REPORT_VERSION = 1
+
+# Language codes and the characters used for their synthetic text.  Other languages
+# are given the codes x<n> and use the characters of the listed languages in turn.
+LANG_ALPHABETS = {
+    "en": "abcdefghijklmnopqrstuvwxyz",
+    "fr": "abcdefghijklmnopqrstuvwxyzéèêàçô",
+    "ru": "абвгдеёжзийклмнопрстуфхцчшщъыьэюя",
+    "ar": "ابتثجحخدذرزسشصضطظعغفقكلمنهوي",
+    "hi": "अआइईउऊएऐओऔकखगघचछजझटठडढणतथदधनपफबभमयरलवशषसह",
+    "zh": "天空地水火山人口手心日月木石土金风雨云雷",
+    "te": "అఆఇఈఉఊఎఏఐఒఓఔకఖగఘచఛజఝటఠడఢణతథదధనపఫబభమయరలవశషసహ",
+}
+
+
+@dataclass
+class BenchmarkConfig:
+    langs: int = 3
+    domains: int = 1800
+    depth: int = 4
+    questions: int = 5
+    examples: int = 0
+    repeat: int = 3
+    seed: int = 0
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse user command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the semantic domain import on synthetic data.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--langs", type=int, default=3, help="Number of languages in the generated files."
+    )
+    parser.add_argument(
+        "--domains",
+        type=int,
+        nargs="+",
+        default=[1800],
+        help="Number of domains in the generated files.  Each number is run separately.",
+    )
+    parser.add_argument("--depth", type=int, default=4, help="Depth of the domain tree.")
+    parser.add_argument(
+        "--questions", type=int, default=5, help="Number of questions for each domain."
+    )
+    parser.add_argument(
+        "--examples",
+        type=int,
+        default=0,
+        help="Number of example words and sentences for each question.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of times each step is run; the fastest time is reported.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the generated text.")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this file.")
+    parser.add_argument("--baseline", "-b", help="JSON report to compare the results with.")
+    parser.add_argument(
+        "--keep-xml",
+        help="Directory where the generated XML files are kept.  By default, they are "
+        "written to a temporary directory and removed.",
+    )
+    parser.add_argument(
+        "--verbose", "-v", action="store_true", help="Print detailed progress information."
+    )
+    args = parser.parse_args()
+    if args.langs < 1 or args.depth < 1 or min(args.domains) < 1:
+        parser.error("--langs, --depth, and --domains must be at least 1.")
+    return args
+
+
+def lang_codes(count: int) -> List[str]:
+    codes = list(LANG_ALPHABETS)[:count]
+    codes.extend(f"x{index}" for index in range(len(codes), count))
+    return codes
+
+
+class TextGenerator:
+    """Generate repeatable random text in the alphabet of each language."""
+
+    def __init__(self, langs: List[str], seed: int) -> None:
+        self.random = random.Random(seed)
+        alphabets = list(LANG_ALPHABETS.values())
+        self.vocabulary: Dict[str, List[str]] = {}
+        for index, lang in enumerate(langs):
+            alphabet = LANG_ALPHABETS.get(lang, alphabets[index % len(alphabets)])
+            self.vocabulary[lang] = [
+                "".join(self.random.choices(alphabet, k=self.random.randint(2, 9)))
+                for _ in range(500)
+            ]
+
+    def words(self, lang: str, min_count: int, max_count: int) -> str:
+        count = self.random.randint(min_count, max_count)
+        return " ".join(self.random.choices(self.vocabulary[lang], k=count))
+
+    def guid(self) -> str:
+        return str(UUID(int=self.random.getrandbits(128), version=4))
+
+
+def domain_tree(domains: int, depth: int) -> Dict[str, List[str]]:
+    """
+    Return the ids of the children of each domain of a tree of the given size.
+
+    The smallest branching factor that fits the domains in the given depth is used and
+    the levels are filled in breadth-first order.  The root has the id "".
+    """
+    branching = 1
+    while sum(branching**level for level in range(1, depth + 1)) < domains:
+        branching += 1
+    children: Dict[str, List[str]] = {"": []}
+    level = [""]
+    count = 0
+    for _ in range(depth):
+        next_level: List[str] = []
+        for parent in level:
+            for index in range(1, branching + 1):
+                if count == domains:
+                    return children
+                id = f"{parent}.{index}" if parent else str(index)
+                children[parent].append(id)
+                children[id] = []
+                next_level.append(id)
+                count += 1
+        level = next_level
+    return children
+
+
+def add_auni(parent: ElementTree.Element, lang: str, text: str) -> None:
+    auni = ElementTree.SubElement(parent, "AUni", ws=lang)
+    if text:
+        auni.text = text
+
+
+def add_astr(parent: ElementTree.Element, lang: str, text: str) -> None:
+    astr = ElementTree.SubElement(parent, "AStr", ws=lang)
+    ElementTree.SubElement(astr, "Run", ws=lang).text = text
+
+
+def add_domain_fields(
+    element: ElementTree.Element,
+    id: str,
+    langs: List[str],
+    text: TextGenerator,
+    config: BenchmarkConfig,
+) -> None:
+    """Add the Name, Abbreviation, Description, and Questions of a domain."""
+    name = ElementTree.SubElement(element, "Name")
+    for lang in langs:
+        add_auni(name, lang, text.words(lang, 1, 3))
+    abbreviation = ElementTree.SubElement(element, "Abbreviation")
+    for lang in langs:
+        # As in the real files, only the English abbreviation is filled in
+        add_auni(abbreviation, lang, id if lang == "en" else "")
+    description = ElementTree.SubElement(element, "Description")
+    for lang in langs:
+        add_astr(description, lang, text.words(lang, 15, 40) + ".")
+    if config.questions == 0:
+        return
+    questions = ElementTree.SubElement(element, "Questions")
+    for number in range(1, config.questions + 1):
+        cm_domain_q = ElementTree.SubElement(questions, "CmDomainQ")
+        question = ElementTree.SubElement(cm_domain_q, "Question")
+        for lang in langs:
+            add_auni(question, lang, f"({number}) {text.words(lang, 5, 12)}?")
+        if config.examples > 0:
+            example_words = ElementTree.SubElement(cm_domain_q, "ExampleWords")
+            for lang in langs:
+                add_auni(
+                    example_words,
+                    lang,
+                    ", ".join(text.words(lang, 1, 2) for _ in range(config.examples)),
+                )
+            example_sentences = ElementTree.SubElement(cm_domain_q, "ExampleSentences")
+            for lang in langs:
+                for _ in range(config.examples):
+                    add_astr(example_sentences, lang, text.words(lang, 5, 12) + ".")
+
+
+def generate_xml(xml_file: Path, config: BenchmarkConfig) -> int:
+    """Write a synthetic semantic domain file; returns the number of domains."""
+    langs = lang_codes(config.langs)
+    text = TextGenerator(langs, config.seed)
+    children = domain_tree(config.domains, config.depth)
+    lists = ElementTree.Element("Lists", date="01/01/2024 0:00:00 +00:00")
+    root = ElementTree.SubElement(
+        lists,
+        "List",
+        owner="LangProject",
+        field="SemanticDomainList",
+        itemClass="CmSemanticDomain",
+    )
+    name = ElementTree.SubElement(root, "Name")
+    for lang in langs:
+        add_auni(name, lang, "Semantic Domains")
+    abbreviation = ElementTree.SubElement(root, "Abbreviation")
+    for lang in langs:
+        add_auni(abbreviation, lang, "Sem" if lang == "en" else "")
+
+    def add_subdomains(element: ElementTree.Element, parent: str, tag: str) -> None:
+        if not children[parent]:
+            return
+        possibilities = ElementTree.SubElement(element, tag)
+        for id in children[parent]:
+            domain = ElementTree.SubElement(possibilities, "CmSemanticDomain", guid=text.guid())
+            add_domain_fields(domain, id, langs, text, config)
+            add_subdomains(domain, id, "SubPossibilities")
+
+    add_subdomains(root, "", "Possibilities")
+    ElementTree.indent(lists)
+    ElementTree.ElementTree(lists).write(xml_file, encoding="utf-8", xml_declaration=True)
+    return len(children) - 1
+
+
+class PhaseTimer:
+    """
+    Accumulate the time spent in a module function while it is patched.
+
+    Only the outermost call of a recursive function is timed.
+    """
+
+    def __init__(self, module: Any, name: str) -> None:
+        self.module = module
+        self.name = name
+        self.original: Callable[..., Any] = getattr(module, name)
+        self.elapsed = 0.0
+        self.calls = 0
+        self.active = 0
+
+    def __enter__(self) -> PhaseTimer:
+        original = self.original
+
+        @functools.wraps(original)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            self.calls += 1
+            self.active += 1
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.active -= 1
+                if self.active == 0:
+                    self.elapsed += time.perf_counter() - start
+
+        setattr(self.module, self.name, timed)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        setattr(self.module, self.name, self.original)
+
+
+def run_scale(config: BenchmarkConfig, xml_dir: Path) -> Dict[str, Any]:
+    """Generate the file for one scale and time the import steps."""
+    xml_file = xml_dir / (
+        f"SemanticDomains-{config.langs}l-{config.domains}d-{config.depth}t-"
+        f"{config.questions}q-{config.examples}e.xml"
+    )
+    start = time.perf_counter()
+    domains = generate_xml(xml_file, config)
+    generate_time = time.perf_counter() - start
+    timings: Dict[str, List[float]] = {
+        "parse_sem_dom_file": [],
+        "get_sem_doms": [],
+        "save_domain": [],
+        **{f"write_json_{output_format}": [] for output_format in ndjson.OUTPUT_FORMATS},
+    }
+    save_domain_calls = 0
+    output_bytes: Dict[str, int] = {}
+    for iteration in range(config.repeat):
+        logging.info(f"{xml_file.name}: iteration {iteration + 1} of {config.repeat}")
+        with (
+            PhaseTimer(sem_dom_import, "get_sem_doms") as get_sem_doms,
+            PhaseTimer(sem_dom_import, "save_domain") as save_domain,
+        ):
+            start = time.perf_counter()
+            data = sem_dom_import.parse_sem_dom_file(xml_file)
+            timings["parse_sem_dom_file"].append(time.perf_counter() - start)
+        timings["get_sem_doms"].append(get_sem_doms.elapsed)
+        timings["save_domain"].append(save_domain.elapsed)
+        save_domain_calls = save_domain.calls
+        for output_format in ndjson.OUTPUT_FORMATS:
+            with TemporaryDirectory() as output_dir:
+                start = time.perf_counter()
+                sem_dom_import.write_json(data, Path(output_dir), output_format=output_format)
+                timings[f"write_json_{output_format}"].append(time.perf_counter() - start)
+                output_bytes[output_format] = sum(
+                    file_path.stat().st_size for file_path in Path(output_dir).iterdir()
+                )
+        del data
+    return {
+        "config": asdict(config),
+        "domains": domains,
+        "save_domain_calls": save_domain_calls,
+        "xml_bytes": xml_file.stat().st_size,
+        "output_bytes": output_bytes,
+        "generate_seconds": generate_time,
+        "timings": {
+            step: {"min": min(times), "mean": statistics.fmean(times)}
+            for step, times in timings.items()
+        },
+        "peak_rss_kib": benchmark_utils.peak_rss_kib(),
+    }
+
+
+def run_benchmark(configs: List[BenchmarkConfig], xml_dir: Path) -> Dict[str, Any]:
+    return benchmark_utils.run_benchmark(
+        functools.partial(run_scale, xml_dir=xml_dir),
+        configs,
+        REPORT_VERSION,
+        json_encoder=ndjson.encoder_name,
+    )
+
+
+def result_key(result: Dict[str, Any]) -> str:
+    config = result["config"]
+    return (
+        f"{config['langs']} langs, {result['domains']} domains, depth {config['depth']}, "
+        f"{config['questions']} questions, {config['examples']} examples"
+    )
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    baseline_results = benchmark_utils.results_by_key(baseline, result_key)
+    for result in report["results"]:
+        key = result_key(result)
+        previous = baseline_results.get(key)
+        print(f"{key}: {result['xml_bytes'] / 1e6:.1f} MB of XML")
+        for step, timing in result["timings"].items():
+            line = f"  {step:<24} {timing['min'] * 1000:>10.1f} ms"
+            if previous is not None and step in previous["timings"]:
+                before = previous["timings"][step]["min"]
+                if before > 0:
+                    line += f" {(timing['min'] - before) / before:>+8.1%}"
+            print(line)
+        line = f"  {'peak RSS':<24} {result['peak_rss_kib'] / 1024:>10.1f} MiB"
+        if previous is not None and previous["peak_rss_kib"] > 0:
+            change = (result["peak_rss_kib"] - previous["peak_rss_kib"]) / previous["peak_rss_kib"]
+            line += f" {change:>+8.1%}"
+        print(line)
+
+
+def main() -> None:
+    args = parse_args()
+    log_level = logging.INFO if args.verbose else logging.WARNING
+    logging.basicConfig(format="%(levelname)s:%(message)s", level=log_level)
+    configs = [
+        BenchmarkConfig(
+            langs=args.langs,
+            domains=domains,
+            depth=args.depth,
+            questions=args.questions,
+            examples=args.examples,
+            repeat=args.repeat,
+            seed=args.seed,
+        )
+        for domains in args.domains
+    ]
+    baseline = benchmark_utils.load_report(args.baseline)
+    if args.keep_xml is not None:
+        xml_dir = Path(args.keep_xml)
+        xml_dir.mkdir(parents=True, exist_ok=True)
+        report = run_benchmark(configs, xml_dir)
+    else:
+        with TemporaryDirectory() as temp_dir:
+            report = run_benchmark(configs, Path(temp_dir))
+    benchmark_utils.write_report(report, args.output)
+    print_report(report, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Compute the changes between two generations of the semantic domain import files.
+
+A manifest records a digest for each document in nodes.json and tree.json.  Documents
+are identified by the fields used as upsert keys by mongoimport: lang, id, and guid.
+Comparing the manifest of the previous files with the new files gives the documents
+that were added, changed, or deleted; only those are written to the delta files:
+ - <kind>.added.json
+ - <kind>.changed.json
+ - <kind>.deleted.json (only the key fields of each document)
+where <kind> is nodes or tree.  delta.json records the digests of the base and target
+manifests and the number of documents in each delta file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Set, Tuple
+
+import ndjson
+
+DOCUMENT_KINDS = ["nodes", "tree"]
+DELTA_CHANGES = ["added", "changed", "deleted"]
+MANIFEST_FILE = "manifest.json"
+DELTA_FILE = "delta.json"
+
+# Manifest entries are [lang, id, guid, digest]
+DocumentKey = Tuple[str, str, str]
+
+
+def document_key(document: Dict[str, Any]) -> DocumentKey:
+    return (document["lang"], document["id"], document["guid"])
+
+
+def document_digest(document: Dict[str, Any]) -> str:
+    """Digest of a document that does not depend on the output format."""
+    text = json.dumps(document, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def manifest_digest(manifest: Dict[str, Any]) -> str:
+    digest = hashlib.sha256()
+    for kind in DOCUMENT_KINDS:
+        for entry in sorted(manifest[kind]):
+            digest.update(f"{kind}:{':'.join(entry)}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def build_manifest(data_dir: Path) -> Dict[str, Any]:
+    """Build the manifest of the nodes.json and tree.json files in data_dir."""
+    manifest: Dict[str, Any] = {}
+    for kind in DOCUMENT_KINDS:
+        manifest[kind] = [
+            [*document_key(document), document_digest(document)]
+            for document in ndjson.read_documents(data_dir / f"{kind}.json")
+        ]
+    manifest["digest"] = manifest_digest(manifest)
+    return manifest
+
+
+def load_manifest(previous: Path) -> Dict[str, Any]:
+    """
+    Load the manifest of a previous generation of the import files.
+
+    previous may be a manifest file or a directory.  For a directory, its manifest file
+    is used if there is one; otherwise the manifest is built from its nodes.json and
+    tree.json files.
+    """
+    if previous.is_dir():
+        if not (previous / MANIFEST_FILE).is_file():
+            return build_manifest(previous)
+        previous = previous / MANIFEST_FILE
+    with open(previous, "r", encoding="utf-8") as file:
+        manifest: Dict[str, Any] = json.load(file)
+    return manifest
+
+
+def write_manifest(output_dir: Path) -> Dict[str, Any]:
+    manifest = build_manifest(output_dir)
+    with open(output_dir / MANIFEST_FILE, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, separators=(",", ":"))
+    return manifest
+
+
+def remove_delta(output_dir: Path) -> None:
+    """Remove the delta files of an earlier generation so they are not imported by mistake."""
+    for kind in DOCUMENT_KINDS:
+        for change in DELTA_CHANGES:
+            (output_dir / f"{kind}.{change}.json").unlink(missing_ok=True)
+    (output_dir / DELTA_FILE).unlink(missing_ok=True)
+
+
+def write_delta(
+    output_dir: Path,
+    manifest: Dict[str, Any],
+    previous_manifest: Dict[str, Any],
+    *,
+    output_format: str = "pretty",
+) -> Dict[str, Any]:
+    """
+    Write the delta files for the import files in output_dir.
+
+    manifest is the manifest of the files in output_dir.  Returns the contents of
+    delta.json.
+    """
+    delta: Dict[str, Any] = {
+        "base": previous_manifest["digest"],
+        "target": manifest["digest"],
+    }
+    for kind in DOCUMENT_KINDS:
+        previous_digests: Dict[DocumentKey, str] = {
+            (lang, id, guid): digest for lang, id, guid, digest in previous_manifest[kind]
+        }
+        current_keys: Set[DocumentKey] = set()
+        counts = {change: 0 for change in DELTA_CHANGES}
+        files = {
+            change: open(output_dir / f"{kind}.{change}.json", "wb") for change in DELTA_CHANGES
+        }
+        try:
+            for document in ndjson.read_documents(output_dir / f"{kind}.json"):
+                key = document_key(document)
+                current_keys.add(key)
+                if key not in previous_digests:
+                    change = "added"
+                elif previous_digests[key] != document_digest(document):
+                    change = "changed"
+                else:
+                    continue
+                files[change].write(ndjson.dumps(document, output_format))
+                counts[change] += 1
+            for lang, id, guid in previous_digests:
+                if (lang, id, guid) not in current_keys:
+                    document = {"guid": guid, "lang": lang, "id": id}
+                    files["deleted"].write(ndjson.dumps(document, output_format))
+                    counts["deleted"] += 1
+        finally:
+            for file in files.values():
+                file.close()
+        delta[kind] = counts
+    with open(output_dir / DELTA_FILE, "w", encoding="utf-8") as delta_file:
+        json.dump(delta, delta_file, indent=4)
+    return delta
@@ -7,18 +7,37 @@ There are 2 files that are created for each language:
                        SemanticDomainTree collection
  - <lang>/nodes.json - the contents of each element in the hierarchy; it contains the
                        data for the SemanticDomainNodes collection
+
+With --tree-positions, the position of each domain in its tree is added to tree.json;
+see sem_dom_tree.py.  A manifest.json with a digest of each document is also created.
+With --previous, the documents that changed since the previous files are written to
+delta files; see sem_dom_delta.py.  With --shard, the files are also split by language;
+see sem_dom_shards.py.  With --search-index, a search index is written for each
+language; see sem_dom_search.py.  With --profile, the time spent in each phase of the
+import is measured; see sem_dom_profile.py.
 """
 
 from __future__ import annotations
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
 import logging
 from pathlib import Path
 import sys
-from typing import Dict, List, Tuple
+from tempfile import TemporaryDirectory
+import time
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from uuid import UUID
 from xml.etree import ElementTree
 
+import ndjson
+import sem_dom_delta
+import sem_dom_profile
+from sem_dom_profile import NO_PROFILER, PhaseProfiler, ProfileOptions
+import sem_dom_search
+import sem_dom_shards
+import sem_dom_tree
 from semantic_domains import (
     DomainQuestion,
     SemanticDomain,
@@ -31,12 +50,47 @@ SemDomMap = Dict[str, SemanticDomain]
 SemDomFullMap = Dict[str, SemanticDomainFull]
 SemDomTreeMap = Dict[str, SemanticDomainTreeNode]
 
-# Global variables to collect the results of our parsing
-domain_nodes: Dict[str, SemDomFullMap] = {}
-domain_tree: Dict[str, SemDomTreeMap] = {}
+
+class SemanticDomainData:
+    """The results of parsing one or more semantic domain XML files."""
+
+    def __init__(self) -> None:
+        self.domain_nodes: Dict[str, SemDomFullMap] = {}
+        self.domain_tree: Dict[str, SemDomTreeMap] = {}
+        # Phase profiles of the files, when they are profiled; see sem_dom_profile.py
+        self.profiles: List[Dict[str, Any]] = []
+
+    def add_lang(self, lang: str) -> None:
+        if lang not in self.domain_tree:
+            self.domain_tree[lang] = {}
+        if lang not in self.domain_nodes:
+            self.domain_nodes[lang] = {}
+
+    def merge(self, other: SemanticDomainData) -> None:
+        """
+        Merge the results of another file into this one.
+
+        A domain that is defined in both keeps its position but takes its contents
+        from other, as if the files had been parsed one after the other.
+        """
+        for lang in other.domain_nodes:
+            self.add_lang(lang)
+            self.domain_nodes[lang].update(other.domain_nodes[lang])
+        for lang in other.domain_tree:
+            self.add_lang(lang)
+            self.domain_tree[lang].update(other.domain_tree[lang])
+        self.profiles.extend(other.profiles)
+
 
 project_dir = Path(__file__).resolve().parent
 
+WRITE_BUFFER_SIZE = 1 << 20
+READ_CHUNK_SIZE = 1 << 16
+
+# Elements that are ignored by the parser; they can be skipped while parsing with
+# --skip-examples.
+EXAMPLE_ELEMENTS = ["ExampleWords", "ExampleSentences"]
+
 
 def parse_args() -> argparse.Namespace:
     """Parse user command line arguments."""
@@ -64,6 +118,86 @@ def parse_args() -> argparse.Namespace:
         default="flat",
         help="Structure to be used for the domain questions.",
     )
+    parser.add_argument(
+        "--format",
+        "-f",
+        dest="output_format",
+        choices=ndjson.OUTPUT_FORMATS,
+        default="pretty",
+        help="Format of the output files; compact writes one document per line.",
+    )
+    parser.add_argument(
+        "--streaming",
+        "-s",
+        action="store_true",
+        help="Parse the XML files incrementally to keep memory use flat.",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of worker processes used to parse the XML files.",
+    )
+    parser.add_argument(
+        "--previous",
+        "-p",
+        help="Previous output directory or manifest file; "
+        "write the documents that were added, changed, or deleted since then to delta files.",
+    )
+    parser.add_argument(
+        "--shard",
+        action="store_true",
+        help="Also write nodes.<lang>.json and tree.<lang>.json for each language "
+        "with a shards.json manifest.",
+    )
+    parser.add_argument(
+        "--skip-examples",
+        action="store_true",
+        help=f"Skip the {' and '.join(EXAMPLE_ELEMENTS)} elements, which are not imported, "
+        "and their contents while the XML files are parsed.",
+    )
+    parser.add_argument(
+        "--skip-elements",
+        action="append",
+        default=[],
+        metavar="TAG",
+        help="Also skip the elements with this tag, and their contents, while the XML files "
+        "are parsed.  Can be given more than once.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Measure the time spent in each phase of the import and print a summary.",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        help="Also write the profile of each file to <name>.profile.json in this directory.",
+    )
+    parser.add_argument(
+        "--cprofile",
+        action="store_true",
+        help="Also save a cProfile dump of each input file to <name>.prof in --profile-dir.  "
+        "cProfile slows the import down, which is reflected in the phase times.",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Also measure the net allocated blocks and retained bytes of each phase, "
+        "tracing the allocations with tracemalloc, which "
+        "slows the import down.  Implies --profile.",
+    )
+    parser.add_argument(
+        "--tree-positions",
+        action="store_true",
+        help="Add the ancestors, depth, pre-order index, and subtree size of each domain "
+        "to tree.json.",
+    )
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        help="Also write a search index, search.<lang>.json, for each language.",
+    )
     logging_group = parser.add_mutually_exclusive_group()
     logging_group.add_argument(
         "--verbose", "-v", action="store_true", help="Print detailed progress information."
@@ -72,7 +206,18 @@ def parse_args() -> argparse.Namespace:
         "--debug", "-d", action="store_true", help="Print debugging information."
     )
     args = parser.parse_args()
+    if args.skip_examples:
+        args.skip_elements = list(dict.fromkeys([*EXAMPLE_ELEMENTS, *args.skip_elements]))
+    if args.profile_memory:
+        args.profile = True
+    if args.profile_dir is not None:
+        args.profile_dir = Path(args.profile_dir).resolve()
+        args.profile = True
+    elif args.cprofile:
+        parser.error("--cprofile requires --profile-dir.")
     args.output_dir = Path(args.output_dir).resolve()
+    if args.previous is not None:
+        args.previous = Path(args.previous).resolve()
     for i, input in enumerate(args.input_files):
         args.input_files[i] = Path(input).resolve()
     return args
@@ -144,13 +289,14 @@ def fill_missing_fields(domains: SemDomFullMap) -> None:
 
 
 def save_domain(
+    data: SemanticDomainData,
     domains: SemDomFullMap,
     tree_nodes: SemDomTreeMap,
     parent: SemDomTreeMap,
     prev: SemDomMap,
 ) -> None:
     """
-    Complete the fields for the tree nodes and save in the global structures.
+    Complete the fields for the tree nodes and save in the data structures.
 
     This routine performs the following operations:
     for the domain objects of each language
@@ -158,8 +304,8 @@ def save_domain(
     - sets the parent field in the tree node
     - sets the previous field in the tree node
     - sets the next field in the tree node that corresponds to the previous node
-    - saves the domain object in the global structure, domain_nodes
-    - saves the tree node in the global structure, domain_tree
+    - saves the domain object in data.domain_nodes
+    - saves the tree node in data.domain_tree
     """
 
     for lang in domains:
@@ -173,29 +319,20 @@ def save_domain(
             tree_nodes[lang].prev = prev[lang]
             # set the next link in the previous domain
             prev_id = prev[lang].id
-            domain_tree[lang][prev_id].next = tree_nodes[lang].to_semantic_domain()
-        domain_nodes[lang][domain_item.id] = domain_item
+            data.domain_tree[lang][prev_id].next = tree_nodes[lang].to_semantic_domain()
+        data.domain_nodes[lang][domain_item.id] = domain_item
     for lang, item in tree_nodes.items():
-        domain_tree[lang][item.id] = item
+        data.domain_tree[lang][item.id] = item
 
 
-def get_sem_doms(node: ElementTree.Element, parent: SemDomTreeMap, prev: SemDomMap) -> SemDomMap:
+def get_domain_fields(node: ElementTree.Element) -> SemDomFullMap:
     """
-    Recursively parse domains and subdomains.
+    Extract the fields of a single domain from its element.
 
-    The domains and subdomains that are extracted by get_sem_doms are placed into two global
-    structures:
-    1. domain_nodes is a list of SemanticDomainFull elements that contain the full information
-       about the domain.
-    2. domain_tree is a two-dimensional dict of SemanticDomainTreeNode elements that is keyed
-       by language and semantic domain id string.  Each element in the domain_tree has basic
-       information about the node and its neighboring nodes in the tree.
+    Only the fields that precede the Possibilities/SubPossibilities element are
+    used; the subdomains are not visited.
     """
-    # Check for GUID
     domain_set: SemDomFullMap = {}
-    tree_set: SemDomTreeMap = {}
-    return_set: SemDomMap = {}
-    has_sub_domains = False
     if "guid" in node.attrib:
         guid = UUID(node.attrib["guid"])
     else:
@@ -208,7 +345,7 @@ def get_sem_doms(node: ElementTree.Element, parent: SemDomTreeMap, prev: SemDomM
         elif field.tag == "Abbreviation":
             for abbrev_node in field:
                 lang, id_text = get_auni_text(abbrev_node)
-                domain_set[lang].id = id_text
+                domain_set[lang].id = sys.intern(id_text)
         elif field.tag == "Description":
             for descr_node in field:
                 lang, description = get_astr_text(descr_node)
@@ -218,89 +355,664 @@ def get_sem_doms(node: ElementTree.Element, parent: SemDomTreeMap, prev: SemDomM
             for lang in questions:
                 domain_set[lang].questions.extend(questions[lang])
         elif (field.tag == "Possibilities") or (field.tag == "SubPossibilities"):
-            has_sub_domains = True
-            # Check the domain_set that was created.  If only the English version has text,
-            # copy the English to the non-English entry
-            fill_missing_fields(domain_set)
-            # Create the nodes for the domain tree from the info in the
-            # current domain nodes
-            save_domain(domain_set, tree_set, parent, prev)
+            break
+    return domain_set
+
+
+def get_sem_doms(
+    data: SemanticDomainData,
+    node: ElementTree.Element,
+    parent: SemDomTreeMap,
+    prev: SemDomMap,
+    profiler: PhaseProfiler = NO_PROFILER,
+) -> SemDomMap:
+    """
+    Recursively parse domains and subdomains.
+
+    The domains and subdomains that are extracted by get_sem_doms are placed into two
+    structures of data:
+    1. domain_nodes is a list of SemanticDomainFull elements that contain the full information
+       about the domain.
+    2. domain_tree is a two-dimensional dict of SemanticDomainTreeNode elements that is keyed
+       by language and semantic domain id string.  Each element in the domain_tree has basic
+       information about the node and its neighboring nodes in the tree.
+    """
+    tree_set: SemDomTreeMap = {}
+    return_set: SemDomMap = {}
+    with profiler.phase("extract"):
+        domain_set = get_domain_fields(node)
+    # Check the domain_set that was created.  If only the English version has text,
+    # copy the English to the non-English entry
+    with profiler.phase("fill_missing_fields"):
+        fill_missing_fields(domain_set)
+    # Create the nodes for the domain tree from the info in the
+    # current domain nodes
+    with profiler.phase("save_domain"):
+        save_domain(data, domain_set, tree_set, parent, prev)
+    for field in node:
+        if (field.tag == "Possibilities") or (field.tag == "SubPossibilities"):
             prev_sub_domain: SemDomMap = {}
             for sub_domain in field:
-                prev_sub_domain = get_sem_doms(sub_domain, tree_set, prev_sub_domain)
-    if not has_sub_domains:
-        # Check the domain_set that was created.  If only the English version has text,
-        # copy the English to the non-English entry
-        fill_missing_fields(domain_set)
-        # Create the nodes for the domain tree from the info in the
-        # current domain nodes
-        save_domain(domain_set, tree_set, parent, prev)
+                prev_sub_domain = get_sem_doms(
+                    data, sub_domain, tree_set, prev_sub_domain, profiler
+                )
     for lang in domain_set:
         return_set[lang] = domain_set[lang].to_semantic_domain()
     return return_set
 
 
-def write_json(output_dir: Path) -> None:
+def write_json(
+    data: SemanticDomainData,
+    output_dir: Path,
+    *,
+    output_format: str = "pretty",
+    profiler: PhaseProfiler = NO_PROFILER,
+) -> None:
     """
-    Serialize the domain_nodes and domain_tree structures to JSON files.
+    Serialize the domain_nodes and domain_tree structures of data to JSON files.
 
     The data structures are serialized to a file of concatenated JSON elements;
     not an array of JSON elements nor a nested structure.  This allows the files
-    to be used by mongoimport.
+    to be used by mongoimport.  With the compact output_format, there is one
+    element per line.
     """
     if not output_dir.is_dir():
         output_dir.mkdir()
     output_file = output_dir / "nodes.json"
-    with open(output_file, "w") as file:
-        for lang in domain_nodes:
-            for id in domain_nodes[lang]:
-                file.write(f"{domain_nodes[lang][id].to_json()}\n")
+    with open(output_file, "wb", buffering=WRITE_BUFFER_SIZE) as file:
+        for lang in data.domain_nodes:
+            for id in data.domain_nodes[lang]:
+                with profiler.phase("serialize"):
+                    text = ndjson.dumps(data.domain_nodes[lang][id].to_dict(), output_format)
+                with profiler.phase("write"):
+                    file.write(text)
     output_file = output_dir / "tree.json"
-    with open(output_file, "w") as file:
-        for lang in domain_tree:
-            for id in domain_tree[lang]:
-                file.write(f"{domain_tree[lang][id].to_json()}\n")
+    with open(output_file, "wb", buffering=WRITE_BUFFER_SIZE) as file:
+        for lang in data.domain_tree:
+            for id in data.domain_tree[lang]:
+                with profiler.phase("serialize"):
+                    text = ndjson.dumps(data.domain_tree[lang][id].to_dict(), output_format)
+                with profiler.phase("write"):
+                    file.write(text)
 
 
-def generate_semantic_domains(
-    input_files: List[Path], output_dir: Path, *, flatten_questions: bool = True
+class SemanticDomainSpool:
+    """
+    Spool the semantic domain documents of one input file as they are produced.
+
+    The documents are encoded in output_format and written to a nodes and a tree spool
+    file in spool_dir; only their keys and lengths are kept in memory.  A closed spool
+    can be returned from a worker process, with the phase profile of its file in
+    profile when the file was profiled.
+    """
+
+    def __init__(self, spool_dir: Path, name: str, output_format: str = "pretty") -> None:
+        self.output_format = output_format
+        # Measures the phases of the spooling while the file is converted
+        self.profiler = NO_PROFILER
+        self.profile: Optional[Dict[str, Any]] = None
+        self.paths = {kind: spool_dir / f"{name}.{kind}.json" for kind in ("nodes", "tree")}
+        self.index: Dict[str, List[Tuple[str, str, int]]] = {kind: [] for kind in self.paths}
+        self.files: Dict[str, IO[bytes]] = {
+            kind: open(path, "wb", buffering=WRITE_BUFFER_SIZE)
+            for kind, path in self.paths.items()
+        }
+
+    def write(self, kind: str, items: Iterable[SemanticDomain]) -> None:
+        for item in items:
+            with self.profiler.phase("serialize"):
+                text = ndjson.dumps(item.to_dict(), self.output_format)
+            with self.profiler.phase("write"):
+                self.files[kind].write(text)
+            self.index[kind].append((item.lang, item.id, len(text)))
+
+    def write_nodes(self, domains: SemDomFullMap) -> None:
+        self.write("nodes", domains.values())
+
+    def write_tree_nodes(self, tree_nodes: SemDomTreeMap) -> None:
+        self.write("tree", tree_nodes.values())
+
+    def close(self) -> None:
+        for file in self.files.values():
+            file.close()
+        self.files = {}
+        # The profiler is not needed by the process that the spool is returned to
+        self.profiler = NO_PROFILER
+
+
+def read_spools(spools: List[SemanticDomainSpool], kind: str) -> Iterator[Tuple[str, bytes]]:
+    """
+    Iterate over the language and encoded text of the spooled documents of a kind.
+
+    As with write_json, when a domain is defined for the same language more than once,
+    e.g., the English domains that are repeated in each XML file, only the last
+    definition is kept.
+    """
+    last: Dict[Tuple[str, str], Tuple[int, int]] = {}
+    for i, spool in enumerate(spools):
+        for j, (lang, id, _) in enumerate(spool.index[kind]):
+            last[(lang, id)] = (i, j)
+    for i, spool in enumerate(spools):
+        with open(spool.paths[kind], "rb") as spool_file:
+            for j, (lang, id, length) in enumerate(spool.index[kind]):
+                text = spool_file.read(length)
+                if last[(lang, id)] == (i, j):
+                    yield (lang, text)
+
+
+def write_spools(spools: List[SemanticDomainSpool], output_dir: Path) -> Dict[str, int]:
+    """
+    Copy the spooled documents to nodes.json and tree.json.
+
+    Returns the number of tree nodes for each language.
+    """
+    if not output_dir.is_dir():
+        output_dir.mkdir()
+    counts: Dict[str, int] = {}
+    for kind in ("nodes", "tree"):
+        with open(output_dir / f"{kind}.json", "wb", buffering=WRITE_BUFFER_SIZE) as file:
+            for lang, text in read_spools(spools, kind):
+                file.write(text)
+                if kind == "tree":
+                    counts[lang] = counts.get(lang, 0) + 1
+    return counts
+
+
+class PruningTreeBuilder:
+    """
+    A TreeBuilder parser target that does not build the elements with some tags.
+
+    The skipped elements and everything in them are dropped as the parser reports
+    them, so they are never built.  When record_events is set, the start and end of
+    each element that is built are recorded in events, like the events of iterparse.
+    """
+
+    def __init__(self, skip_tags: Iterable[str], *, record_events: bool = False) -> None:
+        self.builder = ElementTree.TreeBuilder()
+        self.skip_tags = frozenset(skip_tags)
+        self.skip_depth = 0
+        self.record_events = record_events
+        self.events: List[Tuple[str, ElementTree.Element]] = []
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> Optional[ElementTree.Element]:
+        if self.skip_depth or tag in self.skip_tags:
+            self.skip_depth += 1
+            return None
+        elem = self.builder.start(tag, attrib)
+        if self.record_events:
+            self.events.append(("start", elem))
+        return elem
+
+    def end(self, tag: str) -> Optional[ElementTree.Element]:
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return None
+        elem = self.builder.end(tag)
+        if self.record_events:
+            self.events.append(("end", elem))
+        return elem
+
+    def data(self, data: str) -> None:
+        if not self.skip_depth:
+            self.builder.data(data)
+
+    def close(self) -> ElementTree.Element:
+        return self.builder.close()
+
+
+def parse_xml(xml_file: Path, skip_tags: Iterable[str] = ()) -> ElementTree.Element:
+    """
+    Parse an XML file without building the elements whose tags are in skip_tags.
+
+    Returns the root element.
+    """
+    parser = None
+    if skip_tags:
+        parser = ElementTree.XMLParser(target=PruningTreeBuilder(skip_tags))
+    return ElementTree.parse(xml_file, parser=parser).getroot()
+
+
+def iterparse_xml(
+    xml_file: Path, skip_tags: Iterable[str] = ()
+) -> Iterator[Tuple[str, ElementTree.Element]]:
+    """
+    Iterate over the start and end events of the elements of an XML file.
+
+    This is iterparse with the start and end events, except that the elements whose
+    tags are in skip_tags are not built and have no events.
+    """
+    if not skip_tags:
+        yield from ElementTree.iterparse(xml_file, events=("start", "end"))
+        return
+    builder = PruningTreeBuilder(skip_tags, record_events=True)
+    parser = ElementTree.XMLParser(target=builder)
+    with open(xml_file, "rb") as file:
+        while chunk := file.read(READ_CHUNK_SIZE):
+            parser.feed(chunk)
+            yield from builder.events
+            builder.events.clear()
+    parser.close()
+    yield from builder.events
+
+
+class DomainFrame:
+    """A domain element whose end tag has not been reached by the streaming parser."""
+
+    def __init__(self, elem: ElementTree.Element) -> None:
+        self.elem = elem
+        self.saved = False
+        self.tree_set: SemDomTreeMap = {}
+        # Tree nodes of the previous subdomain; they are written once their next link is known.
+        self.prev_tree_set: SemDomTreeMap = {}
+
+
+def save_streamed_domain(
+    frame: DomainFrame,
+    parent: Optional[DomainFrame],
+    writer: SemanticDomainSpool,
+    profiler: PhaseProfiler = NO_PROFILER,
 ) -> None:
-    for xml_file in input_files:
-        logging.info(f"Parsing {xml_file}")
-        tree = ElementTree.parse(xml_file)
-        # Set the semantic domain list as the root.
-        root = None
-        for elem in tree.getroot():
-            if "field" in elem.attrib.keys() and elem.attrib["field"] == "SemanticDomainList":
-                root = elem
-                break
-        if root is None:
-            logging.critical("No semantic domain list found!")
-            sys.exit(1)
-        # Find the languages defined in this file
-        # We need to do this first so that we know which keys
-        # to create in the global structures.
-        for elem in root:
-            if elem.tag == "Name":
-                # Languages can be found in the Name element
-                for sub_elem in elem:
-                    lang, name_text = get_auni_text(sub_elem)
-                    logging.debug(f"Language code: {lang}")
-                    if lang not in domain_tree:
-                        domain_tree[lang] = {}
-                    if lang not in domain_nodes:
-                        domain_nodes[lang] = {}
-        # Parse possible domains defined in the file
-        prev_domain: SemDomMap = {}
-        prev_domain = get_sem_doms(root, {}, prev_domain)
-
-    for lang in domain_nodes:
-        logging.debug(f"Number of {lang} Domains: {len(domain_nodes[lang])}")
-    for lang in domain_tree:
-        logging.debug(f"Number of {lang} Tree Nodes: {len(domain_tree[lang])}")
-    if not flatten_questions:
-        SemanticDomainFull.flatten_questions = False
-    write_json(output_dir)
+    """
+    Complete the fields for the tree nodes of a domain and write what is finished.
+
+    This is the streaming counterpart of save_domain.  The domain's node documents are
+    written immediately; the tree nodes of the previous subdomain of the parent are
+    written now that their next link is set.  The tree nodes of this domain are kept
+    until its subdomains and its next sibling are known.
+    """
+    with profiler.phase("extract"):
+        domain_set = get_domain_fields(frame.elem)
+    with profiler.phase("fill_missing_fields"):
+        fill_missing_fields(domain_set)
+    with profiler.phase("save_domain"):
+        for lang, domain_item in domain_set.items():
+            tree_node = domain_item.to_semantic_domain_tree_node()
+            frame.tree_set[lang] = tree_node
+            if parent is None:
+                continue
+            if lang in parent.tree_set:
+                tree_node.parent = parent.tree_set[lang].to_semantic_domain()
+                parent.tree_set[lang].children.append(domain_item.to_semantic_domain())
+            if lang in parent.prev_tree_set:
+                prev_node = parent.prev_tree_set[lang]
+                tree_node.prev = prev_node.to_semantic_domain()
+                prev_node.next = tree_node.to_semantic_domain()
+    writer.write_nodes(domain_set)
+    if parent is not None:
+        writer.write_tree_nodes(parent.prev_tree_set)
+        parent.prev_tree_set = {}
+    frame.saved = True
+
+
+def stream_sem_doms(
+    xml_file: Path,
+    writer: SemanticDomainSpool,
+    skip_tags: Iterable[str] = (),
+    profiler: PhaseProfiler = NO_PROFILER,
+) -> None:
+    """
+    Parse the domains of an XML file with iterparse and write them as they complete.
+
+    Only the CmSemanticDomain elements on the path from the root to the current
+    element are kept in memory; each domain element is removed from the tree once
+    its end tag has been processed.
+    """
+    path: List[ElementTree.Element] = []
+    frames: List[DomainFrame] = []
+    found_root = False
+    for event, elem in iterparse_xml(xml_file, skip_tags):
+        if event == "start":
+            parent_elem = path[-1] if path else None
+            if (
+                len(path) == 1
+                and not found_root
+                and elem.attrib.get("field") == "SemanticDomainList"
+            ):
+                found_root = True
+                frames.append(DomainFrame(elem))
+            elif (
+                frames
+                and parent_elem is not None
+                and parent_elem.tag in ("Possibilities", "SubPossibilities")
+                and len(path) > 1
+                and path[-2] is frames[-1].elem
+            ):
+                frames.append(DomainFrame(elem))
+            elif (
+                frames
+                and parent_elem is frames[-1].elem
+                and elem.tag in ("Possibilities", "SubPossibilities")
+                and not frames[-1].saved
+            ):
+                # All of the domain's own fields precede its subdomains.
+                save_streamed_domain(
+                    frames[-1], frames[-2] if len(frames) > 1 else None, writer, profiler
+                )
+            path.append(elem)
+            continue
+        path.pop()
+        if frames and elem is frames[-1].elem:
+            frame = frames.pop()
+            parent = frames[-1] if frames else None
+            if not frame.saved:
+                save_streamed_domain(frame, parent, writer, profiler)
+            # The last subdomain has no next sibling.
+            writer.write_tree_nodes(frame.prev_tree_set)
+            if parent is None:
+                writer.write_tree_nodes(frame.tree_set)
+            else:
+                parent.prev_tree_set = frame.tree_set
+            elem.clear()
+            if path:
+                path[-1].remove(elem)
+        elif len(path) == 1:
+            # Discard lists other than the semantic domain list.
+            elem.clear()
+    if not found_root:
+        logging.critical("No semantic domain list found!")
+        sys.exit(1)
+
+
+def stream_sem_dom_file(
+    xml_file: Path,
+    spool_dir: Path,
+    name: str,
+    flatten_questions: bool,
+    output_format: str,
+    skip_tags: List[str],
+    profile: Optional[ProfileOptions] = None,
+) -> SemanticDomainSpool:
+    """
+    Convert an XML file to spooled import documents one domain at a time.
+
+    When profile is set, the phase profile of the file is returned in the spool.
+    """
+    # Set in each worker since class attributes are not shared between processes
+    SemanticDomainFull.flatten_questions = flatten_questions
+    logging.info(f"Streaming {xml_file}")
+    spool = SemanticDomainSpool(spool_dir, name, output_format)
+
+    def convert(profiler: PhaseProfiler) -> None:
+        spool.profiler = profiler
+        stream_sem_doms(xml_file, spool, skip_tags, profiler)
+
+    try:
+        _, spool.profile = sem_dom_profile.profile_file(
+            xml_file, profile, convert, remainder="parse"
+        )
+    finally:
+        spool.close()
+    return spool
+
+
+def spool_semantic_domains(
+    input_files: List[Path],
+    spool_dir: Path,
+    *,
+    flatten_questions: bool = True,
+    output_format: str = "pretty",
+    jobs: int = 1,
+    skip_tags: Optional[List[str]] = None,
+    profile: Optional[ProfileOptions] = None,
+) -> List[SemanticDomainSpool]:
+    """
+    Convert the XML files to spooled documents in spool_dir, one file per worker.
+
+    The spools are returned in the order of input_files; see read_spools.
+    """
+    names = [f"{i:04d}" for i in range(len(input_files))]
+    args = (
+        input_files,
+        [spool_dir] * len(names),
+        names,
+        [flatten_questions] * len(names),
+        [output_format] * len(names),
+        [skip_tags or []] * len(names),
+        [profile] * len(names),
+    )
+    if jobs > 1 and len(input_files) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(stream_sem_dom_file, *args))
+    return list(map(stream_sem_dom_file, *args))
+
+
+def stream_semantic_domains(
+    input_files: List[Path],
+    output_dir: Path,
+    *,
+    flatten_questions: bool = True,
+    output_format: str = "pretty",
+    jobs: int = 1,
+    skip_tags: Optional[List[str]] = None,
+    profile: Optional[ProfileOptions] = None,
+    profiler: PhaseProfiler = NO_PROFILER,
+) -> List[Dict[str, Any]]:
+    """
+    Convert the XML files to the import files, streaming each file in its own worker.
+
+    Returns the phase profile of each file when profile is set; profiler measures the
+    phases of writing the import files.
+    """
+    with TemporaryDirectory() as spool_dir:
+        spools = spool_semantic_domains(
+            input_files,
+            Path(spool_dir),
+            flatten_questions=flatten_questions,
+            output_format=output_format,
+            jobs=jobs,
+            skip_tags=skip_tags,
+            profile=profile,
+        )
+        with profiler.phase("write"):
+            counts = write_spools(spools, output_dir)
+    for lang, count in counts.items():
+        logging.debug(f"Number of {lang} Tree Nodes: {count}")
+    return [spool.profile for spool in spools if spool.profile is not None]
+
+
+def parse_sem_dom_file(
+    xml_file: Path, skip_tags: Iterable[str] = (), profiler: PhaseProfiler = NO_PROFILER
+) -> SemanticDomainData:
+    """Parse the semantic domains of a single XML file."""
+    logging.info(f"Parsing {xml_file}")
+    data = SemanticDomainData()
+    with profiler.phase("parse"):
+        document_root = parse_xml(xml_file, skip_tags)
+    # Set the semantic domain list as the root.
+    root = None
+    for elem in document_root:
+        if "field" in elem.attrib.keys() and elem.attrib["field"] == "SemanticDomainList":
+            root = elem
+            break
+    if root is None:
+        logging.critical("No semantic domain list found!")
+        sys.exit(1)
+    # Find the languages defined in this file
+    # We need to do this first so that we know which keys
+    # to create in the data structures.
+    for elem in root:
+        if elem.tag == "Name":
+            # Languages can be found in the Name element
+            for sub_elem in elem:
+                lang, name_text = get_auni_text(sub_elem)
+                logging.debug(f"Language code: {lang}")
+                data.add_lang(lang)
+    # Parse possible domains defined in the file
+    get_sem_doms(data, root, {}, {}, profiler)
+    return data
+
+
+def profile_sem_dom_file(
+    xml_file: Path, skip_tags: List[str], profile: Optional[ProfileOptions]
+) -> SemanticDomainData:
+    """
+    Parse the semantic domains of a single XML file, optionally profiling the parse.
+
+    When profile is set, the phase profile of the file is added to the profiles of the
+    result.
+    """
+    data, file_profile = sem_dom_profile.profile_file(
+        xml_file, profile, lambda profiler: parse_sem_dom_file(xml_file, skip_tags, profiler)
+    )
+    if file_profile is not None:
+        data.profiles.append(file_profile)
+    return data
+
+
+def parse_semantic_domains(
+    input_files: List[Path],
+    *,
+    jobs: int = 1,
+    skip_tags: Optional[List[str]] = None,
+    profile: Optional[ProfileOptions] = None,
+) -> SemanticDomainData:
+    """
+    Parse the semantic domain XML files.
+
+    Each XML file is parsed independently, in a separate process when jobs > 1.
+    The results are merged in the order of input_files.
+    """
+    data = SemanticDomainData()
+    args = (
+        input_files,
+        [skip_tags or []] * len(input_files),
+        [profile] * len(input_files),
+    )
+    if jobs > 1 and len(input_files) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for file_data in executor.map(profile_sem_dom_file, *args):
+                data.merge(file_data)
+    else:
+        for file_data in map(profile_sem_dom_file, *args):
+            data.merge(file_data)
+
+    for lang in data.domain_nodes:
+        logging.debug(f"Number of {lang} Domains: {len(data.domain_nodes[lang])}")
+    for lang in data.domain_tree:
+        logging.debug(f"Number of {lang} Tree Nodes: {len(data.domain_tree[lang])}")
+    return data
+
+
+def update_delta(
+    output_dir: Path, previous_manifest: Optional[Dict[str, Any]], output_format: str
+) -> None:
+    """Write the manifest of the new import files and, if requested, the delta files."""
+    manifest = sem_dom_delta.write_manifest(output_dir)
+    if previous_manifest is None:
+        sem_dom_delta.remove_delta(output_dir)
+        return
+    delta = sem_dom_delta.write_delta(
+        output_dir, manifest, previous_manifest, output_format=output_format
+    )
+    for kind in sem_dom_delta.DOCUMENT_KINDS:
+        counts = ", ".join(f"{count} {change}" for change, count in delta[kind].items())
+        logging.info(f"Delta for {kind}.json: {counts}")
+
+
+def generate_semantic_domains(
+    input_files: List[Path],
+    output_dir: Path,
+    *,
+    flatten_questions: bool = True,
+    output_format: str = "pretty",
+    streaming: bool = False,
+    jobs: int = 1,
+    previous: Optional[Path] = None,
+    shard: bool = False,
+    search_index: bool = False,
+    tree_positions: bool = False,
+    skip_tags: Optional[List[str]] = None,
+    profile: bool = False,
+    profile_dir: Optional[Path] = None,
+    cprofile: bool = False,
+    profile_memory: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    Create the import files from the semantic domain XML files.
+
+    The elements whose tags are in skip_tags are skipped while the XML files are
+    parsed.  When tree_positions is set, the ancestors, depth, pre-order index, and
+    subtree size of each domain are added to the tree documents.  When previous is set,
+    the delta files from the import files (or manifest) that it specifies to the new
+    import files are also written.  When shard is set, the import files are also split
+    into one pair of files for each language.  When search_index is set, a search index
+    is written for each language.
+
+    When profile is set, the phases of the import are measured and a summary with the
+    profile of each input file and of the output files is returned; see
+    sem_dom_profile.py.  When profile_dir is set, the profile of each file is also
+    written to it, as is a cProfile dump of each input file when cprofile is set.  When
+    profile_memory is set, the net allocated blocks and retained bytes of each phase of
+    the input files are also measured.
+    """
+    start = time.perf_counter()
+    options = None
+    if profile:
+        options = ProfileOptions(
+            memory=profile_memory, cprofile_dir=profile_dir if cprofile else None
+        )
+        if options.cprofile_dir is not None:
+            options.cprofile_dir.mkdir(parents=True, exist_ok=True)
+    output_profiler = PhaseProfiler("output", enabled=profile)
+    # Load the previous manifest first in case previous is output_dir
+    previous_manifest = None if previous is None else sem_dom_delta.load_manifest(previous)
+    if streaming:
+        file_profiles = stream_semantic_domains(
+            input_files,
+            output_dir,
+            flatten_questions=flatten_questions,
+            output_format=output_format,
+            jobs=jobs,
+            skip_tags=skip_tags,
+            profile=options,
+            profiler=output_profiler,
+        )
+    else:
+        data = parse_semantic_domains(
+            input_files,
+            jobs=jobs,
+            skip_tags=skip_tags,
+            profile=options,
+        )
+        file_profiles = data.profiles
+        if not flatten_questions:
+            SemanticDomainFull.flatten_questions = False
+        write_json(data, output_dir, output_format=output_format, profiler=output_profiler)
+    if tree_positions:
+        with output_profiler.phase("tree_positions"):
+            positions = sem_dom_tree.add_tree_positions(output_dir, output_format)
+        for lang, count in positions.items():
+            logging.info(f"Added tree positions to {count} domains for {lang}")
+    with output_profiler.phase("manifest"):
+        update_delta(output_dir, previous_manifest, output_format)
+    if shard:
+        with output_profiler.phase("shards"):
+            shards = sem_dom_shards.write_shards(output_dir, output_format)["shards"]
+        for entry in shards:
+            logging.info(f"Wrote {entry['count']} documents to {entry['file']}")
+    else:
+        sem_dom_shards.remove_shards(output_dir)
+    if search_index:
+        with output_profiler.phase("search_index"):
+            term_counts = sem_dom_search.write_search_indexes(output_dir)
+        for lang, count in term_counts.items():
+            logging.info(f"Indexed {count} search terms for {lang}")
+    else:
+        sem_dom_search.remove_search_indexes(output_dir)
+    if not profile:
+        return None
+    output_profiler.add_phases_to_total()
+    summary: Dict[str, Any] = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "engine": "streaming" if streaming else "dom",
+        "jobs": jobs,
+        "output_format": output_format,
+        "wall": time.perf_counter() - start,
+        "files": [*file_profiles, output_profiler.to_dict()],
+    }
+    if profile_dir is not None:
+        sem_dom_profile.write_summary(summary, profile_dir)
+    return summary
 
 
 def main() -> None:
@@ -313,9 +1025,25 @@ def main() -> None:
     else:
         log_level = logging.WARNING
     logging.basicConfig(format="%(levelname)s:%(message)s", level=log_level)
-    generate_semantic_domains(
-        args.input_files, args.output_dir, flatten_questions=(args.question_mode == "flat")
+    summary = generate_semantic_domains(
+        args.input_files,
+        args.output_dir,
+        flatten_questions=(args.question_mode == "flat"),
+        output_format=args.output_format,
+        streaming=args.streaming,
+        jobs=args.jobs,
+        previous=args.previous,
+        shard=args.shard,
+        search_index=args.search_index,
+        tree_positions=args.tree_positions,
+        skip_tags=args.skip_elements,
+        profile=args.profile,
+        profile_dir=args.profile_dir,
+        cprofile=args.cprofile,
+        profile_memory=args.profile_memory,
     )
+    if summary is not None:
+        print("\n".join(sem_dom_profile.format_summary(summary)))
 
 
 if __name__ == "__main__":
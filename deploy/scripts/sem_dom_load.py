@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+"""
+Load the semantic domains directly into a Mongo database.
+
+The semantic domain XML files are streamed as by 'sem_dom_import.py --streaming'
+and the spooled documents are written to the SemanticDomains and SemanticDomainTree
+collections with unordered bulk upserts keyed on id, guid, and lang as they are read
+back from the spool files, so that the whole data set is never held in memory.  Each
+document replaces the one with the same keys, so the result is the same as importing
+nodes.json and tree.json with 'mongoimport --mode=upsert', without writing the
+intermediate files.
+
+For example, to load the semantic domains into the database started with
+'npm run database':
+
+    python sem_dom_load.py semantic_domains/xml/*.xml
+
+Alternatively, the per-language shards written by 'sem_dom_import.py --shard' can be
+loaded, optionally only for some languages.  The shards are verified against the hashes
+in their manifest and loaded concurrently, at most --workers at a time:
+
+    python sem_dom_load.py --shard-dir semantic_domains/json --langs en fr
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import json
+import logging
+from pathlib import Path
+import sys
+from tempfile import TemporaryDirectory
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ndjson import read_documents
+from pymongo import ASCENDING, MongoClient, ReplaceOne
+from pymongo.collection import Collection
+from pymongo.database import Database
+from sem_dom_import import read_spools, spool_semantic_domains
+from sem_dom_shards import file_digest, load_shard_manifest
+
+UPSERT_FIELDS = ["id", "guid", "lang"]
+
+Document = Dict[str, Any]
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse user command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Load semantic domain data directly into a Mongo database.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "input_files",
+        metavar="xmlfile",
+        nargs="*",
+        help="Input XML file that defines the semantic domains.",
+    )
+    parser.add_argument(
+        "--shard-dir",
+        help="Load the shards listed in the shards.json file in this directory "
+        "instead of parsing XML files.",
+    )
+    parser.add_argument(
+        "--langs",
+        nargs="+",
+        help="Only load the shards for these languages.  Defaults to all languages.",
+    )
+    parser.add_argument(
+        "--uri", default="mongodb://localhost:27017", help="URI of the Mongo server."
+    )
+    parser.add_argument("--database", default="CombineDatabase", help="Name of the database.")
+    parser.add_argument(
+        "--question-mode",
+        "-q",
+        choices=["full", "flat"],
+        default="flat",
+        help="Structure to be used for the domain questions.",
+    )
+    parser.add_argument(
+        "--batch-size", "-b", type=int, default=1000, help="Number of documents per bulk write."
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=4,
+        help="Number of concurrent bulk writes or, with --shard-dir, shards loaded concurrently.",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of worker processes used to parse the XML files.",
+    )
+    parser.add_argument(
+        "--create-index",
+        action="store_true",
+        help="Create an index on the upsert fields of each collection before loading.",
+    )
+    parser.add_argument(
+        "--verbose", "-v", action="store_true", help="Print detailed progress information."
+    )
+    args = parser.parse_args()
+    if bool(args.input_files) == (args.shard_dir is not None):
+        parser.error("Specify either XML files or --shard-dir.")
+    args.input_files = [Path(input).resolve() for input in args.input_files]
+    if args.shard_dir is not None:
+        args.shard_dir = Path(args.shard_dir).resolve()
+    return args
+
+
+def batches(documents: Iterable[Document], batch_size: int) -> Iterator[List[Document]]:
+    batch: List[Document] = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def upsert_batch(collection: Collection[Document], batch: List[Document]) -> int:
+    """Upsert a batch of documents; returns the number of documents written."""
+    requests = [
+        ReplaceOne({field: document[field] for field in UPSERT_FIELDS}, document, upsert=True)
+        for document in batch
+    ]
+    collection.bulk_write(requests, ordered=False)
+    return len(batch)
+
+
+def load_documents(
+    collection: Collection[Document],
+    documents: Iterable[Document],
+    *,
+    batch_size: int = 1000,
+    workers: int = 4,
+) -> Tuple[int, float]:
+    """
+    Upsert the documents into the collection.
+
+    At most workers bulk writes are in flight at a time so that the documents are
+    consumed as they are written.  Returns the number of documents and the elapsed
+    time in seconds.
+    """
+    start = time.perf_counter()
+    count = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: Set[Future[int]] = set()
+        for batch in batches(documents, batch_size):
+            if len(pending) >= workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                count += sum(future.result() for future in done)
+            pending.add(executor.submit(upsert_batch, collection, batch))
+        count += sum(future.result() for future in wait(pending).done)
+    return (count, time.perf_counter() - start)
+
+
+def select_shards(shard_dir: Path, langs: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Return the shards to be loaded after checking that they match their manifest."""
+    shards: List[Dict[str, Any]] = [
+        shard
+        for shard in load_shard_manifest(shard_dir)["shards"]
+        if langs is None or shard["lang"] in langs
+    ]
+    if langs is not None:
+        missing = set(langs) - {shard["lang"] for shard in shards}
+        if missing:
+            logging.critical(f"No shards for: {', '.join(sorted(missing))}")
+            sys.exit(1)
+    for shard in shards:
+        if file_digest(shard_dir / shard["file"]) != shard["sha256"]:
+            logging.critical(f"{shard['file']} does not match its hash in the shard manifest")
+            sys.exit(1)
+    return shards
+
+
+def load_shards(
+    database: Database[Document],
+    shard_dir: Path,
+    shards: List[Dict[str, Any]],
+    *,
+    batch_size: int = 1000,
+    workers: int = 4,
+) -> None:
+    """Load the shards concurrently, with at most workers shards being loaded at a time."""
+
+    def load_shard(shard: Dict[str, Any]) -> Tuple[int, float]:
+        return load_documents(
+            database[shard["collection"]],
+            read_documents(shard_dir / shard["file"]),
+            batch_size=batch_size,
+            workers=1,
+        )
+
+    start = time.perf_counter()
+    total = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for shard, (count, elapsed) in zip(shards, executor.map(load_shard, shards)):
+            if count != shard["count"]:
+                logging.warning(f"{shard['file']}: expected {shard['count']} documents")
+            total += count
+            rate = count / elapsed if elapsed > 0 else 0.0
+            print(
+                f"{shard['file']}: {count} documents in {elapsed:.2f} s ({rate:.0f} documents/s)"
+            )
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"Total: {total} documents in {elapsed:.2f} s ({rate:.0f} documents/s)")
+
+
+def main() -> None:
+    args = parse_args()
+    log_level = logging.INFO if args.verbose else logging.WARNING
+    logging.basicConfig(format="%(levelname)s:%(message)s", level=log_level)
+
+    if args.shard_dir is not None:
+        shards = select_shards(args.shard_dir, args.langs)
+        client: MongoClient[Document] = MongoClient(args.uri)
+        try:
+            database = client[args.database]
+            if args.create_index:
+                for name in {shard["collection"] for shard in shards}:
+                    database[name].create_index([(field, ASCENDING) for field in UPSERT_FIELDS])
+            load_shards(
+                database,
+                args.shard_dir,
+                shards,
+                batch_size=args.batch_size,
+                workers=args.workers,
+            )
+        finally:
+            client.close()
+        return
+
+    with TemporaryDirectory() as spool_dir:
+        spools = spool_semantic_domains(
+            args.input_files,
+            Path(spool_dir),
+            flatten_questions=(args.question_mode == "flat"),
+            output_format="compact",
+            jobs=args.jobs,
+        )
+        client = MongoClient(args.uri)
+        try:
+            database = client[args.database]
+            for name, kind in (("SemanticDomainTree", "tree"), ("SemanticDomains", "nodes")):
+                collection = database[name]
+                if args.create_index:
+                    collection.create_index([(field, ASCENDING) for field in UPSERT_FIELDS])
+                documents = (json.loads(text) for _, text in read_spools(spools, kind))
+                count, elapsed = load_documents(
+                    collection, documents, batch_size=args.batch_size, workers=args.workers
+                )
+                rate = count / elapsed if elapsed > 0 else 0.0
+                print(f"{name}: {count} documents in {elapsed:.2f} s ({rate:.0f} documents/s)")
+        finally:
+            client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+"""
+Compare the memory used by the semantic domain object graph with the legacy layout.
+
+The current graph is built by parse_sem_dom_file().  The legacy graph uses
+dict-backed objects, UUID objects, per-element language and id strings, and a
+separate SemanticDomain copy for every parent, child, prev, and next link.  It is
+rebuilt from the parsed graph with copies of all of its strings.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+from pathlib import Path
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sem_dom_import import SemanticDomainData, parse_sem_dom_file
+from semantic_domains import SemanticDomain
+
+project_dir = Path(__file__).resolve().parent
+
+
+class LegacySemanticDomain:
+    def __init__(self, guid: Optional[UUID], lang: str, name: str, id: str) -> None:
+        self.guid = guid
+        self.lang = lang
+        self.name = name
+        self.id = id
+
+
+class LegacyDomainQuestion:
+    def __init__(self, question: str) -> None:
+        self.question = question
+
+
+class LegacySemanticDomainFull(LegacySemanticDomain):
+    def __init__(self, guid: Optional[UUID], lang: str, name: str, id: str) -> None:
+        super().__init__(guid, lang, name, id)
+        self.description = ""
+        self.questions: List[LegacyDomainQuestion] = []
+
+
+class LegacySemanticDomainTreeNode(LegacySemanticDomain):
+    def __init__(self, guid: Optional[UUID], lang: str, name: str, id: str) -> None:
+        super().__init__(guid, lang, name, id)
+        self.parent: Optional[LegacySemanticDomain] = None
+        self.children: List[LegacySemanticDomain] = []
+        self.prev: Optional[LegacySemanticDomain] = None
+        self.next: Optional[LegacySemanticDomain] = None
+
+
+LegacyGraph = Tuple[
+    Dict[str, Dict[str, LegacySemanticDomainFull]],
+    Dict[str, Dict[str, LegacySemanticDomainTreeNode]],
+]
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse user command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Compare the memory used by the semantic domain object graphs.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "input_files",
+        metavar="xmlfile",
+        nargs="*",
+        help="Input XML files.  Defaults to the shipped semantic domain files.",
+    )
+    args = parser.parse_args()
+    if args.input_files:
+        args.input_files = [Path(input).resolve() for input in args.input_files]
+    else:
+        args.input_files = sorted((project_dir / "semantic_domains" / "xml").glob("*.xml"))
+    return args
+
+
+def copy_str(text: str) -> str:
+    """Return a new string object with the same value, as a fresh XML parse would."""
+    return (text + " ")[:-1]
+
+
+def build_legacy_graph(data: SemanticDomainData) -> LegacyGraph:
+    """Rebuild the parsed graph with the legacy object layout."""
+    guids: Dict[Optional[UUID], Optional[UUID]] = {None: None}
+    nodes: Dict[str, Dict[str, LegacySemanticDomainFull]] = {}
+    for lang, domains in data.domain_nodes.items():
+        nodes[lang] = {}
+        for id, domain in domains.items():
+            guid = guids.setdefault(domain.guid, domain.guid)
+            full = LegacySemanticDomainFull(
+                guid, copy_str(lang), copy_str(domain.name), copy_str(id)
+            )
+            full.description = copy_str(domain.description)
+            full.questions = [LegacyDomainQuestion(copy_str(q.question)) for q in domain.questions]
+            nodes[lang][id] = full
+
+    def copy_ref(ref: Optional[SemanticDomain]) -> Optional[LegacySemanticDomain]:
+        if ref is None:
+            return None
+        full = nodes[ref.lang].get(ref.id)
+        if full is None:
+            return LegacySemanticDomain(ref.guid, ref.lang, copy_str(ref.name), ref.id)
+        return LegacySemanticDomain(full.guid, full.lang, full.name, full.id)
+
+    tree: Dict[str, Dict[str, LegacySemanticDomainTreeNode]] = {}
+    for lang, tree_nodes in data.domain_tree.items():
+        tree[lang] = {}
+        for id, tree_node in tree_nodes.items():
+            full = nodes[lang][id]
+            item = LegacySemanticDomainTreeNode(full.guid, full.lang, full.name, full.id)
+            item.parent = copy_ref(tree_node.parent)
+            item.prev = copy_ref(tree_node.prev)
+            item.next = copy_ref(tree_node.next)
+            for child in tree_node.children:
+                legacy_child = copy_ref(child)
+                if legacy_child is not None:
+                    item.children.append(legacy_child)
+            tree[lang][id] = item
+    return (nodes, tree)
+
+
+def traced_size() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def measure(xml_file: Path) -> Tuple[int, int, int]:
+    """Return the number of domains and the bytes used by the current and legacy graphs."""
+    tracemalloc.start()
+    try:
+        start = traced_size()
+        data = parse_sem_dom_file(xml_file)
+        current = traced_size() - start
+        start = traced_size()
+        legacy_graph = build_legacy_graph(data)
+        legacy = traced_size() - start
+    finally:
+        tracemalloc.stop()
+    count = sum(len(domains) for domains in data.domain_nodes.values())
+    del legacy_graph
+    return (count, current, legacy)
+
+
+def main() -> None:
+    args = parse_args()
+    # Parse once so that one-time allocations are not attributed to the first file
+    parse_sem_dom_file(args.input_files[0])
+    print(f"{'File':<28} {'Domains':>8} {'Current (KiB)':>14} {'Legacy (KiB)':>13} {'Ratio':>6}")
+    total_current = 0
+    total_legacy = 0
+    for xml_file in args.input_files:
+        count, current, legacy = measure(xml_file)
+        total_current += current
+        total_legacy += legacy
+        print(
+            f"{xml_file.name:<28} {count:>8} {current / 1024:>14.0f} {legacy / 1024:>13.0f}"
+            f" {legacy / current:>6.2f}"
+        )
+    if len(args.input_files) > 1:
+        print(
+            f"{'Total':<28} {'':>8} {total_current / 1024:>14.0f} {total_legacy / 1024:>13.0f}"
+            f" {total_legacy / total_current:>6.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Measure the time spent in each phase of the semantic domain import.
+
+The phases of the import of an XML file are:
+ - parse:               parsing the XML into elements
+ - extract:             getting the fields of each domain from its element
+ - fill_missing_fields: filling in the fields that are missing for a language
+ - save_domain:         linking the tree nodes and saving the domains
+ - serialize:           encoding the documents
+ - write:               writing the encoded documents
+For each phase, the wall time, the CPU time of the process, and the number of times
+that the phase was entered are recorded.  With memory profiling, the allocations are
+traced with tracemalloc, which slows the import down, and two more measures of each
+phase are recorded: allocated_blocks, the change in the number of memory blocks
+allocated by the interpreter (sys.getallocatedblocks()) over the phase, and
+retained_bytes, the change in the size of the traced memory over the phase.  Both are
+net: memory that is allocated and freed within a phase is not counted, and memory
+that a phase frees counts against it, so either can be negative.  With
+the streaming engine, the parser runs between the other phases, so its time is the
+time of the file that is not spent in the other phases.
+"""
+
+from __future__ import annotations
+
+import cProfile
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import asdict, dataclass
+import json
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+from types import TracebackType
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar
+
+PHASES = ["parse", "extract", "fill_missing_fields", "save_domain", "serialize", "write"]
+PROFILE_SUFFIX = ".profile.json"
+CPROFILE_SUFFIX = ".prof"
+# The fields of the phase stats that format_summary tabulates, with their formats
+SUMMARY_FIELDS = {"wall": ".3f", "allocated_blocks": "d", "retained_bytes": "d"}
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ProfileOptions:
+    """How the input files are profiled; passed to the worker processes."""
+
+    memory: bool = False
+    cprofile_dir: Optional[Path] = None
+
+
+@dataclass(slots=True)
+class PhaseStats:
+    wall: float = 0.0
+    cpu: float = 0.0
+    calls: int = 0
+    allocated_blocks: Optional[int] = None
+    retained_bytes: Optional[int] = None
+
+
+class PhaseTimer:
+    """Context manager that adds the time of each use to the stats of a phase."""
+
+    __slots__ = ("stats", "memory", "wall", "cpu", "blocks", "traced")
+
+    def __init__(self, stats: PhaseStats, memory: bool = False) -> None:
+        self.stats = stats
+        self.memory = memory
+        if memory and stats.retained_bytes is None:
+            stats.allocated_blocks = 0
+            stats.retained_bytes = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.blocks = 0
+        self.traced = 0
+
+    def __enter__(self) -> None:
+        if self.memory:
+            self.traced = tracemalloc.get_traced_memory()[0]
+            self.blocks = sys.getallocatedblocks()
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        stats = self.stats
+        stats.wall += time.perf_counter() - self.wall
+        stats.cpu += time.process_time() - self.cpu
+        if self.memory:
+            blocks = sys.getallocatedblocks() - self.blocks
+            retained = tracemalloc.get_traced_memory()[0] - self.traced
+            stats.allocated_blocks = (stats.allocated_blocks or 0) + blocks
+            stats.retained_bytes = (stats.retained_bytes or 0) + retained
+        stats.calls += 1
+
+
+class PhaseProfiler:
+    """
+    Collect the stats of the phases of the import of one file.
+
+    A disabled profiler does not measure anything, so the phases can be marked in the
+    code unconditionally.  When memory is set, tracemalloc must be tracing.
+    """
+
+    def __init__(self, name: str = "", *, enabled: bool = True, memory: bool = False) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.memory = memory
+        self.phases: Dict[str, PhaseStats] = {}
+        self.timers: Dict[str, PhaseTimer] = {}
+        self.total = PhaseStats()
+        self.null_timer: AbstractContextManager[None] = nullcontext()
+
+    def phase(self, name: str) -> AbstractContextManager[None]:
+        if not self.enabled:
+            return self.null_timer
+        timer = self.timers.get(name)
+        if timer is None:
+            self.phases[name] = PhaseStats()
+            timer = self.timers[name] = PhaseTimer(self.phases[name], self.memory)
+        return timer
+
+    def run(self, function: Callable[[], T], *, remainder: Optional[str] = None) -> T:
+        """
+        Call function and record its time as the total.
+
+        When remainder is set, the part of the total that is not spent in the other
+        phases is recorded as that phase.
+        """
+        if not self.enabled:
+            return function()
+        with PhaseTimer(self.total, self.memory):
+            result = function()
+        if remainder is not None:
+            stats = self.phases.setdefault(remainder, PhaseStats())
+            others = [phase for name, phase in self.phases.items() if name != remainder]
+            stats.wall += self.total.wall - sum(phase.wall for phase in others)
+            stats.cpu += self.total.cpu - sum(phase.cpu for phase in others)
+            if self.memory:
+                stats.allocated_blocks = (
+                    (stats.allocated_blocks or 0)
+                    + (self.total.allocated_blocks or 0)
+                    - sum(phase.allocated_blocks or 0 for phase in others)
+                )
+                stats.retained_bytes = (
+                    (stats.retained_bytes or 0)
+                    + (self.total.retained_bytes or 0)
+                    - sum(phase.retained_bytes or 0 for phase in others)
+                )
+            stats.calls += 1
+        return result
+
+    def add_phases_to_total(self) -> None:
+        """Set the total to the sum of the phases, for a profile that is not run()."""
+        self.total.wall = sum(phase.wall for phase in self.phases.values())
+        self.total.cpu = sum(phase.cpu for phase in self.phases.values())
+        if self.memory:
+            self.total.allocated_blocks = sum(
+                phase.allocated_blocks or 0 for phase in self.phases.values()
+            )
+            self.total.retained_bytes = sum(
+                phase.retained_bytes or 0 for phase in self.phases.values()
+            )
+        self.total.calls = 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        order = [name for name in PHASES if name in self.phases]
+        order.extend(name for name in self.phases if name not in PHASES)
+        return {
+            "name": self.name,
+            "total": asdict(self.total),
+            "phases": {name: asdict(self.phases[name]) for name in order},
+        }
+
+
+# A disabled profiler that is shared as the default of the functions that mark phases
+NO_PROFILER = PhaseProfiler(enabled=False)
+
+
+def run_with_cprofile(function: Callable[[], T], dump_file: Optional[Path]) -> T:
+    """Call function, saving a cProfile dump of the call to dump_file if it is set."""
+    if dump_file is None:
+        return function()
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(function)
+    finally:
+        profile.dump_stats(dump_file)
+
+
+def profile_file(
+    xml_file: Path,
+    options: Optional[ProfileOptions],
+    function: Callable[[PhaseProfiler], T],
+    *,
+    remainder: Optional[str] = None,
+) -> Tuple[T, Optional[Dict[str, Any]]]:
+    """
+    Call function with a profiler for the phases of the import of xml_file.
+
+    Returns the result of function and the profile of the file.  If options is None,
+    function is called with a disabled profiler and the profile is None.
+    """
+    if options is None:
+        return (function(NO_PROFILER), None)
+    profiler = PhaseProfiler(xml_file.stem, memory=options.memory)
+    dump_file = None
+    if options.cprofile_dir is not None:
+        dump_file = options.cprofile_dir / f"{xml_file.stem}{CPROFILE_SUFFIX}"
+    if options.memory:
+        tracemalloc.start()
+    try:
+        result = run_with_cprofile(
+            lambda: profiler.run(lambda: function(profiler), remainder=remainder), dump_file
+        )
+    finally:
+        if options.memory:
+            tracemalloc.stop()
+    return (result, profiler.to_dict())
+
+
+def write_summary(summary: Dict[str, Any], profile_dir: Path) -> None:
+    """Write the summary of each file to <profile_dir>/<name>.profile.json."""
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    for entry in summary["files"]:
+        with open(profile_dir / f"{entry['name']}{PROFILE_SUFFIX}", "w", encoding="utf-8") as file:
+            json.dump(entry, file, indent=4)
+
+
+def format_summary(summary: Dict[str, Any]) -> List[str]:
+    """
+    Format a summary as the lines of a table of the wall times in seconds, followed by
+    tables of the allocated blocks and retained bytes if memory was profiled.
+    """
+    entries: List[Dict[str, Any]] = summary["files"]
+    columns = ["total"]
+    for entry in entries:
+        columns.extend(name for name in entry["phases"] if name not in columns)
+    name_width = max([len("File"), *(len(entry["name"]) for entry in entries)])
+    widths = [max(10, len(column)) for column in columns]
+    header = " ".join([f"{'File':<{name_width}}", *(f"{c:>{w}}" for c, w in zip(columns, widths))])
+    lines: List[str] = []
+    for field, cell_format in SUMMARY_FIELDS.items():
+        if field != "wall":
+            if all(entry["total"].get(field) is None for entry in entries):
+                continue
+            lines.append(f"{field}:")
+        lines.append(header)
+        for entry in entries:
+            stats = {"total": entry["total"], **entry["phases"]}
+            values = [stats[c].get(field) if c in stats else None for c in columns]
+            cells = [
+                " " * w if value is None else f"{value:>{w}{cell_format}}"
+                for value, w in zip(values, widths)
+            ]
+            lines.append(" ".join([f"{entry['name']:<{name_width}}", *cells]).rstrip())
+    lines.append(f"Elapsed: {summary['wall']:.3f} s ({summary['engine']} engine)")
+    return lines
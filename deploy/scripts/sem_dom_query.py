@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+"""
+Query the semantic domain import files without parsing the XML files or a database.
+
+The nodes.json and tree.json files written by sem_dom_import.py are memory-mapped and
+indexed by the offsets of their documents.  The key of each document, its lang, id,
+and guid, is taken from the manifest.json file that is written with them, so opening
+the files does not decode any document; a document is only decoded when it is used.
+Without a manifest, e.g., for the shards of a single language, the keys are found by
+decoding each document once.
+
+For example:
+
+    with SemanticDomainFiles(Path("semantic_domains/json")) as sem_doms:
+        sky = sem_doms.node("en", "1.1")
+        path = [domain["name"] for domain in sem_doms.ancestors("en", "1.1.1")]
+        ids = sem_doms.ids_with_prefix("en", "1.1.")
+
+The command line prints the requested domains as JSON:
+
+    python sem_dom_query.py --lang en 1.1 1.2
+    python sem_dom_query.py --lang en --children 1
+"""
+
+from __future__ import annotations
+
+import argparse
+from bisect import bisect_left
+import json
+import logging
+import mmap
+from pathlib import Path
+import re
+import sys
+from types import TracebackType
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from sem_dom_delta import MANIFEST_FILE, DocumentKey, document_key
+
+Document = Dict[str, Any]
+
+project_dir = Path(__file__).resolve().parent
+
+# Each document starts with an opening brace at the start of a line in both output
+# formats; nested objects are indented in the pretty format and strings cannot contain
+# newlines.
+DOCUMENT_START = re.compile(rb"^\{", re.MULTILINE)
+
+
+class DocumentFile:
+    """
+    A memory-mapped file of concatenated JSON documents with an index of their keys.
+
+    keys, if given, are the keys of the documents in the order of the file.  The key of
+    each document that is decoded is checked; if the keys do not match the file, they
+    are rebuilt from the documents.
+    """
+
+    def __init__(self, file_path: Path, keys: Optional[List[DocumentKey]] = None) -> None:
+        self.file_path = file_path
+        self.file = open(file_path, "rb")
+        if file_path.stat().st_size > 0:
+            self.map: Optional[mmap.mmap] = mmap.mmap(
+                self.file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+            starts = [match.start() for match in DOCUMENT_START.finditer(self.map)]
+            self.spans = list(zip(starts, [*starts[1:], len(self.map)]))
+        else:
+            self.map = None
+            self.spans = []
+        self.cache: Dict[int, Document] = {}
+        if keys is None or len(keys) != len(self.spans):
+            if keys is not None:
+                logging.warning(f"The manifest does not match {file_path}")
+            keys = [document_key(self.document(index)) for index in range(len(self.spans))]
+        self.build_index(keys)
+
+    def build_index(self, keys: List[DocumentKey]) -> None:
+        self.keys = keys
+        self.by_id: Dict[Tuple[str, str], int] = {}
+        self.by_guid: Dict[Tuple[str, str], int] = {}
+        ids: Dict[str, List[str]] = {}
+        for index, (lang, id, guid) in enumerate(keys):
+            self.by_id[(lang, id)] = index
+            self.by_guid[(lang, guid)] = index
+            ids.setdefault(lang, []).append(id)
+        self.sorted_ids = {lang: sorted(set(lang_ids)) for lang, lang_ids in ids.items()}
+
+    def document(self, index: int) -> Document:
+        """Decode the document at index in the file."""
+        if index not in self.cache:
+            assert self.map is not None
+            start, end = self.spans[index]
+            self.cache[index] = json.loads(self.map[start:end])
+        return self.cache[index]
+
+    def get(self, index: Optional[int]) -> Optional[Document]:
+        if index is None:
+            return None
+        document = self.document(index)
+        if document_key(document) != self.keys[index]:
+            logging.warning(f"The manifest does not match {self.file_path}; rebuilding the index")
+            self.build_index([document_key(self.document(i)) for i in range(len(self.spans))])
+            document = self.document(index)
+        return document
+
+    def by_key(self, lang: str, id: str) -> Optional[Document]:
+        return self.get(self.by_id.get((lang, id)))
+
+    def langs(self) -> List[str]:
+        return list(self.sorted_ids)
+
+    def close(self) -> None:
+        self.cache.clear()
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+
+class SemanticDomainFiles:
+    """The nodes.json and tree.json files in a directory, opened when first used."""
+
+    def __init__(self, data_dir: Path) -> None:
+        self.data_dir = data_dir
+        self.manifest: Optional[Dict[str, Any]] = None
+        self._nodes: Optional[DocumentFile] = None
+        self._tree: Optional[DocumentFile] = None
+        self._names: Dict[str, List[Tuple[str, str]]] = {}
+
+    def __enter__(self) -> SemanticDomainFiles:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def open_file(self, kind: str) -> DocumentFile:
+        if self.manifest is None and (self.data_dir / MANIFEST_FILE).is_file():
+            with open(self.data_dir / MANIFEST_FILE, "r", encoding="utf-8") as file:
+                self.manifest = json.load(file)
+        keys = None
+        if self.manifest is not None:
+            keys = [(lang, id, guid) for lang, id, guid, _ in self.manifest[kind]]
+        return DocumentFile(self.data_dir / f"{kind}.json", keys)
+
+    @property
+    def nodes(self) -> DocumentFile:
+        if self._nodes is None:
+            self._nodes = self.open_file("nodes")
+        return self._nodes
+
+    @property
+    def tree(self) -> DocumentFile:
+        if self._tree is None:
+            self._tree = self.open_file("tree")
+        return self._tree
+
+    def close(self) -> None:
+        for document_file in (self._nodes, self._tree):
+            if document_file is not None:
+                document_file.close()
+        self._nodes = None
+        self._tree = None
+
+    def node(self, lang: str, id: str) -> Optional[Document]:
+        """The full domain, from nodes.json, with the given id."""
+        return self.nodes.by_key(lang, id)
+
+    def node_by_guid(self, lang: str, guid: str) -> Optional[Document]:
+        return self.nodes.get(self.nodes.by_guid.get((lang, guid)))
+
+    def tree_node(self, lang: str, id: str) -> Optional[Document]:
+        """The tree node, from tree.json, with the given id."""
+        return self.tree.by_key(lang, id)
+
+    def tree_node_by_guid(self, lang: str, guid: str) -> Optional[Document]:
+        return self.tree.get(self.tree.by_guid.get((lang, guid)))
+
+    def children(self, lang: str, id: str) -> Iterator[Document]:
+        """The tree nodes of the subdomains of a domain, in order."""
+        tree_node = self.tree_node(lang, id)
+        if tree_node is None:
+            return
+        for child in tree_node["children"]:
+            child_node = self.tree_node(lang, child["id"])
+            if child_node is not None:
+                yield child_node
+
+    def ancestors(self, lang: str, id: str) -> Iterator[Document]:
+        """The tree nodes of the ancestors of a domain, starting with its parent."""
+        tree_node = self.tree_node(lang, id)
+        seen = {id}
+        while tree_node is not None and tree_node["parent"] is not None:
+            parent_id = tree_node["parent"]["id"]
+            if parent_id in seen:
+                break
+            seen.add(parent_id)
+            tree_node = self.tree_node(lang, parent_id)
+            if tree_node is not None:
+                yield tree_node
+
+    def ids_with_prefix(self, lang: str, prefix: str) -> List[str]:
+        """The ids of the domains of a language that start with prefix, in sorted order."""
+        ids = self.tree.sorted_ids.get(lang, [])
+        start = bisect_left(ids, prefix)
+        end = start
+        while end < len(ids) and ids[end].startswith(prefix):
+            end += 1
+        return ids[start:end]
+
+    def ids_with_name_prefix(self, lang: str, prefix: str) -> List[str]:
+        """
+        The ids of the domains of a language with a name that starts with prefix.
+
+        The names are compared without case.  The names of a language are decoded from
+        tree.json the first time that they are searched.
+        """
+        if lang not in self._names:
+            names: List[Tuple[str, str]] = []
+            for index, key in enumerate(self.tree.keys):
+                if key[0] == lang:
+                    names.append((self.tree.document(index)["name"].casefold(), key[1]))
+            self._names[lang] = sorted(names)
+        names = self._names[lang]
+        prefix = prefix.casefold()
+        start = bisect_left(names, (prefix, ""))
+        end = start
+        while end < len(names) and names[end][0].startswith(prefix):
+            end += 1
+        return [id for _, id in names[start:end]]
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse user command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Print semantic domains from the semantic domain import files.  The "
+        "exit code is 1 if any id or guid is not found.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("ids", metavar="id", nargs="*", help="Ids of the domains to print.")
+    parser.add_argument(
+        "--dir",
+        "-d",
+        default=project_dir / "semantic_domains" / "json",
+        help="Directory with the nodes.json and tree.json files.",
+    )
+    parser.add_argument("--lang", "-l", default="en", help="Language of the domains.")
+    parser.add_argument(
+        "--guid", "-g", action="store_true", help="Look the domains up by guid instead of id."
+    )
+    query_group = parser.add_mutually_exclusive_group()
+    query_group.add_argument(
+        "--tree", "-t", action="store_true", help="Print the tree nodes instead of the domains."
+    )
+    query_group.add_argument(
+        "--children", "-c", action="store_true", help="Print the children of each domain."
+    )
+    query_group.add_argument(
+        "--ancestors", "-a", action="store_true", help="Print the ancestors of each domain."
+    )
+    query_group.add_argument(
+        "--prefix", "-p", action="store_true", help="Print the ids that start with each id."
+    )
+    query_group.add_argument(
+        "--name",
+        "-n",
+        action="store_true",
+        help="Print the ids of the domains with a name that starts with each argument.",
+    )
+    args = parser.parse_args()
+    args.dir = Path(args.dir)
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(format="%(levelname)s:%(message)s", level=logging.WARNING)
+    for kind in ("nodes", "tree"):
+        if not (args.dir / f"{kind}.json").is_file():
+            logging.critical(f"No {kind}.json in {args.dir}; run sem_dom_import.py first.")
+            sys.exit(1)
+    not_found: List[str] = []
+    with SemanticDomainFiles(args.dir) as sem_doms:
+        for key in args.ids:
+            id: Optional[str] = key
+            if args.guid:
+                tree_node = sem_doms.tree_node_by_guid(args.lang, key)
+                id = None if tree_node is None else tree_node["id"]
+            elif not (args.prefix or args.name) and sem_doms.tree_node(args.lang, key) is None:
+                # --prefix and --name search for ids, so finding none is not an error
+                id = None
+            if id is None:
+                print(f"{key}: not found")
+                not_found.append(key)
+                continue
+            result: Any
+            if args.children:
+                result = [child["id"] for child in sem_doms.children(args.lang, id)]
+            elif args.ancestors:
+                result = [ancestor["id"] for ancestor in sem_doms.ancestors(args.lang, id)]
+            elif args.prefix:
+                result = sem_doms.ids_with_prefix(args.lang, id)
+            elif args.name:
+                result = sem_doms.ids_with_name_prefix(args.lang, key)
+            elif args.tree:
+                result = sem_doms.tree_node(args.lang, id)
+            else:
+                result = sem_doms.node(args.lang, id)
+            print(json.dumps(result, ensure_ascii=False, indent=4))
+    if not_found:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Build and query a search index of the semantic domains of each language.
+
+The index of a language is written to search.<lang>.json:
+ - ids:      the domain ids, in the order of nodes.json
+ - terms:    the sorted, unique, normalized tokens of the domain names, descriptions,
+             and questions
+ - postings: for each term, the sorted list of (domain index << 3) | field mask, where
+             the field mask has bit 1 for the name, 2 for the description, and 4 for
+             the questions
+The terms are sorted so that all terms with a given prefix are adjacent and can be found
+with a binary search; search() shows how the index is meant to be queried.
+
+Text is normalized with NFKC and case folding.  Tokens are runs of letters, marks, and
+digits, except that each Han, Hiragana, or Katakana character is a token by itself since
+those scripts do not separate words with spaces.  Tokens that only contain digits, such
+as question numbers, are not indexed.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set
+import unicodedata
+
+import ndjson
+
+SEARCH_INDEX_PREFIX = "search."
+
+NAME_FIELD = 1
+DESCRIPTION_FIELD = 2
+QUESTIONS_FIELD = 4
+FIELD_BITS = 3
+
+# Scripts that are written without spaces between words
+UNSPACED_RANGES = [
+    (0x3040, 0x30FF),  # Hiragana, Katakana
+    (0x3400, 0x4DBF),  # CJK Unified Ideographs Extension A
+    (0x4E00, 0x9FFF),  # CJK Unified Ideographs
+    (0xF900, 0xFAFF),  # CJK Compatibility Ideographs
+    (0x20000, 0x2FA1F),  # CJK Unified Ideographs Extensions B-F, Supplement
+]
+
+
+def is_unspaced(char: str) -> bool:
+    code = ord(char)
+    return any(start <= code <= end for start, end in UNSPACED_RANGES)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized text into tokens."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    tokens: List[str] = []
+    token: List[str] = []
+    for char in text:
+        if unicodedata.category(char)[0] in "LMN":
+            if is_unspaced(char):
+                if token:
+                    tokens.append("".join(token))
+                    token = []
+                tokens.append(char)
+            else:
+                token.append(char)
+        elif token:
+            tokens.append("".join(token))
+            token = []
+    if token:
+        tokens.append("".join(token))
+    return [token for token in tokens if not token.isdigit()]
+
+
+class SearchIndexBuilder:
+    """Collect the tokens of the domains of one language."""
+
+    def __init__(self, lang: str) -> None:
+        self.lang = lang
+        self.ids: List[str] = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+
+    def add_text(self, domain_index: int, field: int, text: str) -> None:
+        for token in tokenize(text):
+            posting = self.postings.setdefault(token, {})
+            posting[domain_index] = posting.get(domain_index, 0) | field
+
+    def add_domain(self, id: str, name: str, description: str, questions: Iterable[str]) -> None:
+        domain_index = len(self.ids)
+        self.ids.append(id)
+        self.add_text(domain_index, NAME_FIELD, name)
+        self.add_text(domain_index, DESCRIPTION_FIELD, description)
+        for question in questions:
+            self.add_text(domain_index, QUESTIONS_FIELD, question)
+
+    def to_dict(self) -> Dict[str, Any]:
+        terms = sorted(self.postings)
+        return {
+            "lang": self.lang,
+            "ids": self.ids,
+            "terms": terms,
+            "postings": [
+                [
+                    (index << FIELD_BITS) | mask
+                    for index, mask in sorted(self.postings[term].items())
+                ]
+                for term in terms
+            ],
+        }
+
+
+def question_text(question: Any) -> str:
+    """Return the text of a question in either question mode."""
+    return question["question"] if isinstance(question, dict) else str(question)
+
+
+def remove_search_indexes(output_dir: Path) -> None:
+    for file_path in output_dir.glob(f"{SEARCH_INDEX_PREFIX}*.json"):
+        file_path.unlink()
+
+
+def write_search_indexes(output_dir: Path) -> Dict[str, int]:
+    """
+    Write the search index of each language of the nodes.json file in output_dir.
+
+    Returns the number of terms in the index of each language.
+    """
+    remove_search_indexes(output_dir)
+    builders: Dict[str, SearchIndexBuilder] = {}
+    for document in ndjson.read_documents(output_dir / "nodes.json"):
+        lang = document["lang"]
+        if lang not in builders:
+            builders[lang] = SearchIndexBuilder(lang)
+        builders[lang].add_domain(
+            document["id"],
+            document["name"],
+            document["description"],
+            (question_text(question) for question in document["questions"]),
+        )
+    term_counts: Dict[str, int] = {}
+    for lang, builder in builders.items():
+        index = builder.to_dict()
+        with open(output_dir / f"{SEARCH_INDEX_PREFIX}{lang}.json", "w", encoding="utf-8") as file:
+            json.dump(index, file, ensure_ascii=False, separators=(",", ":"))
+        term_counts[lang] = len(index["terms"])
+    return term_counts
+
+
+def load_search_index(index_dir: Path, lang: str) -> Dict[str, Any]:
+    with open(index_dir / f"{SEARCH_INDEX_PREFIX}{lang}.json", "r", encoding="utf-8") as file:
+        index: Dict[str, Any] = json.load(file)
+    return index
+
+
+def search(index: Dict[str, Any], query: str, *, limit: int = 20) -> List[str]:
+    """
+    Return the ids of the domains that match every token of the query.
+
+    The last token of the query is treated as a prefix so that results can be shown
+    as the user types.  Domains whose name matches rank before the others; domains
+    with the same rank stay in tree order.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    terms: List[str] = index["terms"]
+    postings: List[List[int]] = index["postings"]
+    matches: Dict[int, int] = {}
+    for i, token in enumerate(tokens):
+        token_matches: Dict[int, int] = {}
+        start = bisect_left(terms, token)
+        end = start + 1
+        if i == len(tokens) - 1:
+            end = start
+            while end < len(terms) and terms[end].startswith(token):
+                end += 1
+        elif start >= len(terms) or terms[start] != token:
+            return []
+        for term_index in range(start, end):
+            for entry in postings[term_index]:
+                domain_index = entry >> FIELD_BITS
+                token_matches[domain_index] = token_matches.get(domain_index, 0) | (
+                    entry & ((1 << FIELD_BITS) - 1)
+                )
+        if i == 0:
+            matches = token_matches
+        else:
+            keep: Set[int] = set(matches) & set(token_matches)
+            matches = {match: matches[match] | token_matches[match] for match in keep}
+    ranked = sorted(matches, key=lambda match: (not matches[match] & NAME_FIELD, match))
+    return [index["ids"][domain_index] for domain_index in ranked[:limit]]
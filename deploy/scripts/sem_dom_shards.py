@@ -0,0 +1,85 @@
+"""
+Split the semantic domain import files into one pair of files per language.
+
+For each language, <lang> in nodes.json and tree.json, the shards are:
+ - nodes.<lang>.json
+ - tree.<lang>.json
+shards.json lists each shard with its language, kind, collection, number of documents,
+and SHA-256 hash so that the shards can be verified and imported selectively, e.g.,
+by sem_dom_load.py --shard-dir.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import IO, Any, Dict, List
+
+import ndjson
+
+SHARD_MANIFEST_FILE = "shards.json"
+COLLECTIONS = {"nodes": "SemanticDomains", "tree": "SemanticDomainTree"}
+# Size of the chunks in which files are read to compute their digests
+DIGEST_CHUNK_SIZE = 1 << 16
+
+
+def file_digest(file_path: Path) -> str:
+    """Return the SHA-256 hex digest of a file, reading it in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        while chunk := file.read(DIGEST_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def remove_shards(output_dir: Path) -> None:
+    """Remove the shards of an earlier generation."""
+    manifest_path = output_dir / SHARD_MANIFEST_FILE
+    if not manifest_path.is_file():
+        return
+    for shard in load_shard_manifest(output_dir)["shards"]:
+        (output_dir / shard["file"]).unlink(missing_ok=True)
+    manifest_path.unlink()
+
+
+def write_shards(output_dir: Path, output_format: str = "pretty") -> Dict[str, Any]:
+    """Write the shards of the import files in output_dir and return the shard manifest."""
+    remove_shards(output_dir)
+    shards: List[Dict[str, Any]] = []
+    for kind, collection in COLLECTIONS.items():
+        files: Dict[str, IO[bytes]] = {}
+        counts: Dict[str, int] = {}
+        try:
+            for document in ndjson.read_documents(output_dir / f"{kind}.json"):
+                lang = document["lang"]
+                if lang not in files:
+                    files[lang] = open(output_dir / f"{kind}.{lang}.json", "wb")
+                    counts[lang] = 0
+                files[lang].write(ndjson.dumps(document, output_format))
+                counts[lang] += 1
+        finally:
+            for file in files.values():
+                file.close()
+        for lang in sorted(files):
+            file_name = f"{kind}.{lang}.json"
+            shards.append(
+                {
+                    "lang": lang,
+                    "kind": kind,
+                    "collection": collection,
+                    "file": file_name,
+                    "count": counts[lang],
+                    "sha256": file_digest(output_dir / file_name),
+                }
+            )
+    manifest = {"format": output_format, "shards": shards}
+    with open(output_dir / SHARD_MANIFEST_FILE, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+    return manifest
+
+
+def load_shard_manifest(shard_dir: Path) -> Dict[str, Any]:
+    with open(shard_dir / SHARD_MANIFEST_FILE, "r", encoding="utf-8") as file:
+        manifest: Dict[str, Any] = json.load(file)
+    return manifest
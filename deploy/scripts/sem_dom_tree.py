@@ -0,0 +1,117 @@
+"""
+Add the position of each domain in its tree to the documents in tree.json.
+
+The fields that are added to each tree document are:
+ - ancestors:   the ids of the ancestors of the domain, starting with the root
+ - depth:       the number of ancestors of the domain
+ - preOrder:    the index of the domain in a pre-order traversal of its language's tree
+ - subtreeSize: the number of domains in the subtree of the domain, including itself
+The domains of a subtree have consecutive pre-order indexes, so a whole branch of a
+language's tree can be fetched with a single range query, e.g.:
+
+    db.SemanticDomainTree.find(
+      { lang: "en", preOrder: { $gte: node.preOrder, $lt: node.preOrder + node.subtreeSize } }
+    ).sort({ preOrder: 1 })
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import ndjson
+
+TREE_FIELDS = ["ancestors", "depth", "preOrder", "subtreeSize"]
+
+# (lang, id)
+NodeKey = Tuple[str, str]
+# (ancestors, depth, preOrder, subtreeSize)
+NodePosition = Tuple[List[str], int, int, int]
+
+
+class TreeSkeleton:
+    """The parent and children of each domain of each language, by id."""
+
+    def __init__(self) -> None:
+        self.parents: Dict[NodeKey, Optional[str]] = {}
+        self.children: Dict[NodeKey, List[str]] = {}
+        self.langs: Dict[str, List[str]] = {}
+
+    def add_node(self, lang: str, id: str, parent: Optional[str], children: List[str]) -> None:
+        key = (lang, id)
+        if key not in self.parents:
+            self.langs.setdefault(lang, []).append(id)
+        self.parents[key] = parent
+        self.children[key] = children
+
+    def roots(self, lang: str) -> List[str]:
+        """Domains without a parent, or whose parent is not in the tree."""
+        return [
+            id
+            for id in self.langs[lang]
+            if self.parents[(lang, id)] is None
+            or (lang, self.parents[(lang, id)]) not in self.parents
+        ]
+
+    def positions(self, lang: str) -> Dict[str, NodePosition]:
+        """
+        Compute the position of each domain of a language in a single traversal.
+
+        The subtree size of a domain is known when the traversal leaves it: it is the
+        number of domains that were visited since the domain was entered.
+        """
+        positions: Dict[str, NodePosition] = {}
+        pre_order = 0
+        # Each entry is (id, ancestors of id, whether the domain is being left)
+        stack: List[Tuple[str, List[str], bool]] = [
+            (id, [], False) for id in reversed(self.roots(lang))
+        ]
+        while stack:
+            id, ancestors, leaving = stack.pop()
+            if leaving:
+                start = positions[id][2]
+                positions[id] = (ancestors, len(ancestors), start, pre_order - start)
+                continue
+            if id in positions:
+                # A domain that is listed twice is only placed once
+                continue
+            positions[id] = (ancestors, len(ancestors), pre_order, 1)
+            pre_order += 1
+            stack.append((id, ancestors, True))
+            path = [*ancestors, id]
+            for child in reversed(self.children[(lang, id)]):
+                if (lang, child) in self.parents and child not in positions:
+                    stack.append((child, path, False))
+        return positions
+
+
+def add_tree_positions(output_dir: Path, output_format: str = "pretty") -> Dict[str, int]:
+    """
+    Add the tree position fields to the documents of tree.json in output_dir.
+
+    The tree is read once to find the structure of each language's tree and once more
+    to rewrite its documents; only the ids are kept in memory.  Returns the number of
+    domains in each language's tree.
+    """
+    tree_file = output_dir / "tree.json"
+    skeleton = TreeSkeleton()
+    for document in ndjson.read_documents(tree_file):
+        parent = document["parent"]
+        skeleton.add_node(
+            document["lang"],
+            document["id"],
+            None if parent is None else parent["id"],
+            [child["id"] for child in document["children"]],
+        )
+    positions = {lang: skeleton.positions(lang) for lang in skeleton.langs}
+
+    temp_file = output_dir / "tree.json.tmp"
+    with open(temp_file, "wb") as file:
+        for document in ndjson.read_documents(tree_file):
+            position = positions[document["lang"]].get(document["id"])
+            if position is not None:
+                document.update(zip(TREE_FIELDS, position))
+            file.write(ndjson.dumps(document, output_format))
+    os.replace(temp_file, tree_file)
+    return {lang: len(lang_positions) for lang, lang_positions in positions.items()}
@@ -2,41 +2,85 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 import json
-from typing import Dict, List, Optional
+from sys import intern
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 
-@dataclass
+@dataclass(slots=True)
 class DomainQuestion:
     question: str
 
 
 class SemanticDomain:
+    """
+    Lightweight reference to a semantic domain.
+
+    The language code and the id are interned and the GUID is stored as its 16 bytes
+    since there are many domains with only a few distinct values for each.
+    """
+
+    __slots__ = ("_guid", "lang", "name", "id")
+
     def __init__(self, _guid: Optional[UUID], _lang: str, _name: str, _id: str = "") -> None:
         self.guid = _guid
-        self.lang = _lang
+        self.lang = intern(_lang)
         self.name = _name
-        self.id = _id
+        self.id = intern(_id)
+
+    @property
+    def guid(self) -> Optional[UUID]:
+        return None if self._guid is None else UUID(bytes=self._guid)
+
+    @guid.setter
+    def guid(self, _guid: Optional[UUID]) -> None:
+        self._guid = None if _guid is None else _guid.bytes
+
+    def guid_str(self) -> str:
+        return "" if self._guid is None else str(UUID(bytes=self._guid))
 
     def to_json(self) -> str:
-        data = {
-            "guid": "" if self.guid is None else str(self.guid),
-            "lang": self.lang,
-            "name": self.name,
-            "id": self.id,
-        }
-        return json.dumps(data, indent=4)
+        return json.dumps(self.to_dict(), indent=4)
 
-    def to_dict(self) -> Dict[str, str]:
+    def to_dict(self) -> Dict[str, Any]:
         return {
-            "guid": "" if self.guid is None else str(self.guid),
+            "guid": self.guid_str(),
             "lang": self.lang,
             "name": self.name,
             "id": self.id,
         }
 
 
-class SemanticDomainFull(SemanticDomain):
+class LinkedSemanticDomain(SemanticDomain):
+    """
+    Semantic domain that hands out a single shared reference to itself.
+
+    to_semantic_domain() returns the same SemanticDomain for every parent, child, prev,
+    and next link as long as the domain's fields are unchanged.
+    """
+
+    __slots__ = ("_ref",)
+
+    def __init__(self, _guid: Optional[UUID], _lang: str, _name: str, _id: str = "") -> None:
+        super().__init__(_guid, _lang, _name, _id)
+        self._ref: Optional[SemanticDomain] = None
+
+    def to_semantic_domain(self) -> SemanticDomain:
+        ref = self._ref
+        if (
+            ref is None
+            or ref.name is not self.name
+            or ref.id is not self.id
+            or ref._guid is not self._guid
+        ):
+            ref = SemanticDomain(None, self.lang, self.name, self.id)
+            ref._guid = self._guid
+            self._ref = ref
+        return ref
+
+
+class SemanticDomainFull(LinkedSemanticDomain):
+    __slots__ = ("description", "questions")
     flatten_questions = True
 
     def __init__(self, _guid: Optional[UUID], _lang: str, _name: str, _id: str = "") -> None:
@@ -44,13 +88,13 @@ class SemanticDomainFull(SemanticDomain):
         self.description = ""
         self.questions: List[DomainQuestion] = []
 
-    def to_semantic_domain(self) -> SemanticDomain:
-        return SemanticDomain(self.guid, self.lang, self.name, self.id)
-
     def to_semantic_domain_tree_node(self) -> SemanticDomainTreeNode:
-        return SemanticDomainTreeNode(self.guid, self.lang, self.name, self.id)
+        tree_node = SemanticDomainTreeNode(None, self.lang, self.name, self.id)
+        tree_node._guid = self._guid
+        tree_node._ref = self.to_semantic_domain()
+        return tree_node
 
-    def to_json(self) -> str:
+    def to_dict(self) -> Dict[str, Any]:
         full_question_list: List[Dict[str, str]] = []
         flat_question_list: List[str] = []
         for item in self.questions:
@@ -58,8 +102,8 @@ class SemanticDomainFull(SemanticDomain):
                 flat_question_list.append(item.question)
             else:
                 full_question_list.append({"question": item.question})
-        data = {
-            "guid": "" if self.guid is None else str(self.guid),
+        return {
+            "guid": self.guid_str(),
             "lang": self.lang,
             "name": self.name,
             "id": self.id,
@@ -68,10 +112,11 @@ class SemanticDomainFull(SemanticDomain):
                 flat_question_list if SemanticDomainFull.flatten_questions else full_question_list
             ),
         }
-        return json.dumps(data, indent=4)
 
 
-class SemanticDomainTreeNode(SemanticDomain):
+class SemanticDomainTreeNode(LinkedSemanticDomain):
+    __slots__ = ("parent", "children", "prev", "next")
+
     def __init__(self, _guid: Optional[UUID], _lang: str, _name: str, _id: str = ""):
         super().__init__(_guid, _lang, _name, _id)
         self.parent: Optional[SemanticDomain] = None
@@ -79,28 +124,14 @@ class SemanticDomainTreeNode(SemanticDomain):
         self.prev: Optional[SemanticDomain] = None
         self.next: Optional[SemanticDomain] = None
 
-    def to_semantic_domain(self) -> SemanticDomain:
-        return SemanticDomain(self.guid, self.lang, self.name, self.id)
-
-    def to_json(self) -> str:
-        children: List[Dict[str, str]] = []
-        for item in self.children:
-            children.append(
-                {
-                    "guid": "" if item.guid is None else str(item.guid),
-                    "lang": item.lang,
-                    "name": item.name,
-                    "id": item.id,
-                }
-            )
-        data = {
-            "guid": "" if self.guid is None else str(self.guid),
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "guid": self.guid_str(),
             "lang": self.lang,
             "name": self.name,
             "id": self.id,
             "parent": None if self.parent is None else self.parent.to_dict(),
             "prev": None if self.prev is None else self.prev.to_dict(),
             "next": None if self.next is None else self.next.to_dict(),
-            "children": children,
+            "children": [item.to_dict() for item in self.children],
         }
-        return json.dumps(data, indent=4)
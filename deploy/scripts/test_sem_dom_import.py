@@ -0,0 +1,113 @@
+"""Tests for sem_dom_import.py; run with 'python -m unittest' in this directory."""
+
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List
+import unittest
+
+import ndjson
+from sem_dom_import import generate_semantic_domains
+
+# A semantic domain file with the structure of those in semantic_domains/xml, with
+# {lang} for its language: nested domains, questions with and without examples, and
+# empty fields
+SEM_DOM_XML = """<?xml version='1.0' encoding='UTF-8'?>
+<Lists date="01/01/2024 0:00:00 +00:00">
+<List owner="LangProject" field="SemanticDomainList" itemClass="CmSemanticDomain">
+<Name><AUni ws="en">Semantic Domains</AUni><AUni ws="{lang}">Domains {lang}</AUni></Name>
+<Abbreviation><AUni ws="en">Sem</AUni><AUni ws="{lang}" /></Abbreviation>
+<Possibilities>
+<CmSemanticDomain guid="63403699-07c1-43f3-a47c-069d6e4316e5">
+<Name><AUni ws="en">Universe, creation</AUni><AUni ws="{lang}">Universe {lang}</AUni></Name>
+<Abbreviation><AUni ws="en">1</AUni><AUni ws="{lang}" /></Abbreviation>
+<Description>
+<AStr ws="en"><Run ws="en">Use this domain for the universe.</Run></AStr>
+<AStr ws="{lang}"><Run ws="{lang}">Description {lang}.</Run></AStr>
+</Description>
+<Questions>
+<CmDomainQ>
+<Question><AUni ws="en">(1) What words refer to everything?</AUni>
+<AUni ws="{lang}">(1) Question {lang}?</AUni></Question>
+<ExampleWords><AUni ws="en">universe, creation</AUni><AUni ws="{lang}">words {lang}</AUni>
+</ExampleWords>
+<ExampleSentences>
+<AStr ws="en"><Run ws="en">The universe is big.</Run></AStr>
+<AStr ws="{lang}"><Run ws="{lang}">Sentence {lang}.</Run></AStr>
+</ExampleSentences>
+</CmDomainQ>
+<CmDomainQ>
+<Question><AUni ws="en">(2) What words refer to the creation?</AUni>
+<AUni ws="{lang}" /></Question>
+</CmDomainQ>
+</Questions>
+<SubPossibilities>
+<CmSemanticDomain guid="999581c4-1611-4acb-ae1b-5e6c1dfe6f0c">
+<Name><AUni ws="en">Sky</AUni><AUni ws="{lang}">Sky {lang}</AUni></Name>
+<Abbreviation><AUni ws="en">1.1</AUni><AUni ws="{lang}" /></Abbreviation>
+<Description>
+<AStr ws="en"><Run ws="en">Use this domain for the sky.</Run></AStr>
+</Description>
+<SubPossibilities>
+<CmSemanticDomain guid="dc1a2c6f-1b32-4631-8823-36dacc8cb7bb">
+<Name><AUni ws="en">Sun</AUni><AUni ws="{lang}">Sun {lang}</AUni></Name>
+<Abbreviation><AUni ws="en">1.1.1</AUni><AUni ws="{lang}" /></Abbreviation>
+</CmSemanticDomain>
+</SubPossibilities>
+</CmSemanticDomain>
+<CmSemanticDomain guid="b47d2604-8b23-41e9-9158-01526dd83894">
+<Name><AUni ws="en">World</AUni><AUni ws="{lang}">World {lang}</AUni></Name>
+<Abbreviation><AUni ws="en">1.2</AUni><AUni ws="{lang}" /></Abbreviation>
+</CmSemanticDomain>
+</SubPossibilities>
+</CmSemanticDomain>
+<CmSemanticDomain guid="ba06de9e-63e1-43e6-ae94-77bea498379a">
+<Name><AUni ws="en">Person</AUni><AUni ws="{lang}">Person {lang}</AUni></Name>
+<Abbreviation><AUni ws="en">2</AUni><AUni ws="{lang}" /></Abbreviation>
+</CmSemanticDomain>
+</Possibilities>
+</List>
+</Lists>
+"""
+
+
+class TestEngines(unittest.TestCase):
+    def setUp(self) -> None:
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+        self.input_files: List[Path] = []
+        for lang in ("fr", "sw"):
+            xml_file = self.temp_dir / f"SemanticDomains-{lang}.xml"
+            xml_file.write_text(SEM_DOM_XML.format(lang=lang), encoding="utf-8")
+            self.input_files.append(xml_file)
+
+    def documents(self, output_dir: Path, name: str) -> List[str]:
+        """The documents of an import file, as sorted canonical JSON."""
+        return sorted(
+            json.dumps(document, ensure_ascii=False, sort_keys=True)
+            for document in ndjson.read_documents(output_dir / name)
+        )
+
+    def test_streaming_matches_dom(self) -> None:
+        for output_format in ndjson.OUTPUT_FORMATS:
+            with self.subTest(output_format=output_format):
+                output_dirs = {}
+                for streaming in (False, True):
+                    output_dir = self.temp_dir / f"{output_format}-{streaming}"
+                    output_dir.mkdir()
+                    generate_semantic_domains(
+                        self.input_files,
+                        output_dir,
+                        output_format=output_format,
+                        streaming=streaming,
+                    )
+                    output_dirs[streaming] = output_dir
+                for name in ("nodes.json", "tree.json"):
+                    dom = self.documents(output_dirs[False], name)
+                    self.assertTrue(dom)
+                    self.assertEqual(self.documents(output_dirs[True], name), dom)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,8 +2,13 @@
 
 from __future__ import annotations
 
+from contextlib import contextmanager
+import logging
 from pathlib import Path
 import subprocess
+import sys
+import tempfile
+from typing import IO, Iterator
 
 from maint_utils import run_cmd
 
@@ -23,6 +28,39 @@ class AwsBackup:
         s3_uri = f"{self.bucket}/{dest}"
         return run_cmd(["aws", "s3", "cp", "--no-progress", str(src), s3_uri])
 
+    @contextmanager
+    def push_stream(self, dest: str) -> Iterator[IO[bytes]]:
+        """
+        Push a stream to the AWS S3 bucket, uploading it in parts as it is written.
+
+        The object is only created once the context exits without an exception; if it
+        exits with one, the upload is killed, leaving no object in the bucket.
+        """
+        s3_uri = f"{self.bucket}/{dest}"
+        with tempfile.TemporaryFile() as output:
+            proc = subprocess.Popen(
+                ["aws", "s3", "cp", "--no-progress", "-", s3_uri],
+                stdin=subprocess.PIPE,
+                stdout=output,
+                stderr=subprocess.STDOUT,
+            )
+            assert proc.stdin is not None
+            try:
+                yield proc.stdin
+            except BaseException:
+                proc.kill()
+                proc.wait()
+                raise
+            proc.stdin.close()
+            returncode = proc.wait()
+            output.seek(0)
+            output_text = output.read().decode("utf-8", errors="replace").strip()
+            if returncode != 0:
+                logging.error(f"Upload to {s3_uri} failed with return code {returncode}.")
+                logging.error(output_text)
+                sys.exit(returncode)
+            logging.debug(output_text)
+
     def pull(self, src: str, dest: Path) -> subprocess.CompletedProcess[str]:
         """Pull a file from the AWS S3 bucket."""
         s3_uri = f"{self.bucket}/{src}"
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from contextlib import contextmanager
 from enum import Enum, unique
 import json
 import logging
@@ -9,8 +10,9 @@ import os
 from pathlib import Path
 import subprocess
 import sys
+import tempfile
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 from maint_utils import run_cmd
 
@@ -84,6 +86,56 @@ class CombineApp:
             timeout=timeout,
         )
 
+    @contextmanager
+    def exec_stream(
+        self, pod_id: str, cmd: List[str], *, stdin: bool = False
+    ) -> Iterator[subprocess.Popen[bytes]]:
+        """
+        Run a kubectl 'exec' command whose binary output, or input, is streamed.
+
+        Args:
+            pod_id: The name of the Combine pod_id that corresponds to the
+                     container that will run the command.
+            cmd: A list of strings that specifies the command to be run in the
+                     container.
+            stdin: If true, stream the input of the command instead of its output.
+        Yields the subprocess.Popen, whose stdout (or stdin) is a binary pipe.  When the
+        context exits, the input is closed and the command is waited for; if it failed,
+        its stderr is logged and the process exits non-zero.  If the context exits with
+        an exception, the command is killed.
+        """
+        with tempfile.TemporaryFile() as stderr:
+            proc = subprocess.Popen(
+                ["kubectl"]
+                + self.kubectl_opts
+                + ["exec"]
+                + (["-i"] if stdin else [])
+                + [pod_id, "--"]
+                + cmd,
+                stdin=subprocess.PIPE if stdin else subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL if stdin else subprocess.PIPE,
+                stderr=stderr,
+            )
+            try:
+                yield proc
+            except BaseException:
+                proc.kill()
+                proc.wait()
+                raise
+            for pipe in (proc.stdin, proc.stdout):
+                if pipe is not None:
+                    pipe.close()
+            returncode = proc.wait()
+            stderr.seek(0)
+            stderr_text = stderr.read().decode("utf-8", errors="replace").strip()
+            if returncode != 0:
+                logging.error(
+                    f"Command {cmd} in {pod_id} failed with return code {returncode}.\n"
+                    f"{stderr_text}"
+                )
+                sys.exit(returncode)
+            logging.debug(f"stderr:\n{stderr_text}")
+
     def kubectl(
         self, cmd: List[str], *, check_results: bool = True, timeout: Optional[float] = None
     ) -> subprocess.CompletedProcess[str]:
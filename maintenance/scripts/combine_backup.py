@@ -1,5 +1,17 @@
 #!/usr/bin/env python3
-"""Create a backup of The Combine and push the file to AWS S3 service."""
+"""
+Create a backup of The Combine and push the file to AWS S3 service.
+
+By default, the database dump and the backend files are copied to a temporary
+directory, added to a tarball, and the tarball is then pushed to AWS S3.  With
+--stream, the output of `mongodump --archive --gzip` and of a `tar` of the backend
+files in the backend pod are instead written into the tarball as they are received,
+and the tarball is uploaded in parts as it is written.  Since the size of a file in a
+tarball precedes its content, the database archive is stored as chunks of at most
+--chunk-size MiB, e.g., dump/CombineDatabase.archive.gz.00000, which
+combine_restore.py concatenates.  Each chunk is spooled to a temporary file until it
+is added to the tarball, so the only local disk space needed is that of one chunk.
+"""
 
 import argparse
 from datetime import datetime
@@ -10,12 +22,17 @@ from shutil import rmtree
 import sys
 import tarfile
 import tempfile
+import time
+from typing import IO
 
 from aws_backup import AwsBackup
 from combine_app import CombineApp
-from maint_utils import check_env_vars, wait_for_dependents
+from maint_utils import DB_ARCHIVE_NAME, check_env_vars, wait_for_dependents
 from script_step import ScriptStep
 
+# Size of the blocks in which a stream is copied to the chunks of the tarball
+COPY_BUFFER_SIZE = 1 << 20
+
 
 def parse_args() -> argparse.Namespace:
     """Define command line arguments for parser."""
@@ -26,7 +43,100 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--verbose", action="store_true", help="Print intermediate values to aid in debugging"
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream the database and backend files from their pods to AWS S3, "
+        "without writing them to local disk",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=64,
+        help="With --stream, the size in MiB of each chunk of the database archive, "
+        "which is also the scratch disk space needed, since each chunk is spooled to a "
+        "temporary file until it is added to the backup",
+    )
+    args = parser.parse_args()
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    return args
+
+
+def add_stream_chunks(tar: tarfile.TarFile, stream: IO[bytes], name: str, chunk_size: int) -> int:
+    """
+    Add a stream of unknown length to a tarball as chunks of at most chunk_size bytes.
+
+    The chunks are named name.00000, name.00001, etc.  At least one chunk is added,
+    even if the stream is empty.  Each chunk is spooled to a temporary file, since its
+    size must be known before it is added, so that at most COPY_BUFFER_SIZE bytes of
+    it are in memory.  Returns the number of bytes added.
+    """
+    total = 0
+    index = 0
+    while True:
+        with tempfile.TemporaryFile() as chunk:
+            size = 0
+            while size < chunk_size:
+                data = stream.read(min(COPY_BUFFER_SIZE, chunk_size - size))
+                if not data:
+                    break
+                chunk.write(data)
+                size += len(data)
+            chunk.seek(0)
+            info = tarfile.TarInfo(f"{name}.{index:05d}")
+            info.size = size
+            info.mtime = int(time.time())
+            info.mode = 0o644
+            tar.addfile(info, chunk)
+        total += size
+        index += 1
+        if size < chunk_size:
+            return total
+
+
+def add_tar_stream(tar: tarfile.TarFile, stream: IO[bytes]) -> int:
+    """Add the members of a tar stream to a tarball; returns the number of members."""
+    count = 0
+    with tarfile.open(fileobj=stream, mode="r|") as source:
+        for member in source:
+            tar.addfile(member, source.extractfile(member) if member.isfile() else None)
+            count += 1
+    return count
+
+
+def stream_backup(
+    combine: CombineApp,
+    aws: AwsBackup,
+    aws_file: str,
+    db_pod: str,
+    backend_pod: str,
+    db_files_subdir: str,
+    backend_files_subdir: str,
+    chunk_size: int,
+    step: ScriptStep,
+) -> None:
+    """Stream the database and backend files from their pods into a tarball in AWS S3."""
+    with aws.push_stream(aws_file) as upload:
+        with tarfile.open(fileobj=upload, mode="w|gz") as tar:
+            step.print("Stream the database dump.")
+            with combine.exec_stream(
+                db_pod, ["/usr/bin/mongodump", "--db=CombineDatabase", "--archive", "--gzip"]
+            ) as dump:
+                assert dump.stdout is not None
+                size = add_stream_chunks(
+                    tar, dump.stdout, f"{db_files_subdir}/{DB_ARCHIVE_NAME}", chunk_size
+                )
+            logging.info(f"Added {size} bytes of database archive")
+
+            step.print("Stream the backend files.")
+            with combine.exec_stream(
+                backend_pod, ["tar", "-cf", "-", "-C", "/home/app", backend_files_subdir]
+            ) as files:
+                assert files.stdout is not None
+                count = add_tar_stream(tar, files.stdout)
+            logging.info(f"Added {count} backend files and directories")
+        step.print("Finish the upload to AWS S3 storage.")
 
 
 def main() -> None:
@@ -52,11 +162,34 @@ def main() -> None:
         print("Database or Backend are not available")
         sys.exit(1)
 
+    date_str = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
+    aws_file = f"{combine_host}-{date_str}.tar.gz"
+    if args.stream:
+        db_pod = combine.get_pod_id(CombineApp.Component.Database)
+        backend_pod = combine.get_pod_id(CombineApp.Component.Backend)
+        if not db_pod or not backend_pod:
+            print("Cannot find the database or backend container.", file=sys.stderr)
+            sys.exit(1)
+        db_stats = combine.db_cmd("db.stats()")
+        if not db_stats or not db_stats.get("objects"):
+            print("Nothing to back up - most likely empty database.", file=sys.stderr)
+            sys.exit(0)
+        stream_backup(
+            combine,
+            aws,
+            aws_file,
+            db_pod,
+            backend_pod,
+            db_files_subdir,
+            backend_files_subdir,
+            args.chunk_size << 20,
+            step,
+        )
+        return
+
     step.print("Prepare the backup directory.")
     with tempfile.TemporaryDirectory() as backup_dir:
         backup_file = Path("combine-backup.tar.gz")
-        date_str = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
-        aws_file = f"{combine_host}-{date_str}.tar.gz"
 
         step.print("Dump the database.")
         db_pod = combine.get_pod_id(CombineApp.Component.Database)
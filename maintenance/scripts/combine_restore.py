@@ -23,6 +23,7 @@ import logging
 import os
 from pathlib import Path
 import re
+import shutil
 import sys
 import tarfile
 import tempfile
@@ -31,7 +32,7 @@ from typing import List, Optional, Tuple
 from aws_backup import AwsBackup
 from combine_app import CombineApp
 import humanfriendly
-from maint_utils import check_env_vars
+from maint_utils import DB_ARCHIVE_NAME, check_env_vars
 from script_step import ScriptStep
 
 
@@ -59,6 +60,17 @@ def aws_strip_bucket(obj_name: str) -> str:
     return obj_name
 
 
+def stream_restore_db(combine: CombineApp, db_pod: str, archive_chunks: List[Path]) -> None:
+    """Restore the database from the chunks of a mongodump archive, in order."""
+    with combine.exec_stream(
+        db_pod, ["mongorestore", "--drop", "--gzip", "--archive"], stdin=True
+    ) as mongorestore_stream:
+        assert mongorestore_stream.stdin is not None
+        for chunk in archive_chunks:
+            with open(chunk, "rb") as chunk_file:
+                shutil.copyfileobj(chunk_file, mongorestore_stream.stdin)
+
+
 def main() -> None:
     """Restore The Combine from a backup stored in the AWS S3 service."""
     args = parse_args()
@@ -159,22 +171,29 @@ def main() -> None:
             logging.error("Cannot find the database container.")
             sys.exit(1)
 
-        logging.debug(f"Copying {db_files_subdir} to {db_pod} ...")
-        combine.cp_with_retry(
-            [db_files_subdir, f"{db_pod}:/"], label=f"database dump ({db_files_subdir})"
-        )
-
-        logging.debug(f"Running mongorestore on {db_pod} ...")
-        mongorestore_proc = combine.exec(
-            db_pod, ["mongorestore", "--drop", "--gzip", f"--dir=/{db_files_subdir}"]
-        )
-        logging.debug(f"stderr:\n{mongorestore_proc.stderr.strip()}")
-        logging.debug(f"stdout:\n{mongorestore_proc.stdout.strip()}")
-
-        logging.debug(f"Removing {db_files_subdir} from {db_pod} ...")
-        rm_proc = combine.exec(db_pod, ["rm", "-rf", f"/{db_files_subdir}"])
-        logging.debug(f"stderr:\n{rm_proc.stderr.strip()}")
-        logging.debug(f"stdout:\n{rm_proc.stdout.strip()}")
+        # A backup made with combine_backup.py --stream has the database as the chunks
+        # of a mongodump archive instead of as a dump directory
+        archive_chunks = sorted(Path(db_files_subdir).glob(f"{DB_ARCHIVE_NAME}.*"))
+        if archive_chunks:
+            logging.debug(f"Streaming {len(archive_chunks)} archive chunks to {db_pod} ...")
+            stream_restore_db(combine, db_pod, archive_chunks)
+        else:
+            logging.debug(f"Copying {db_files_subdir} to {db_pod} ...")
+            combine.cp_with_retry(
+                [db_files_subdir, f"{db_pod}:/"], label=f"database dump ({db_files_subdir})"
+            )
+
+            logging.debug(f"Running mongorestore on {db_pod} ...")
+            mongorestore_proc = combine.exec(
+                db_pod, ["mongorestore", "--drop", "--gzip", f"--dir=/{db_files_subdir}"]
+            )
+            logging.debug(f"stderr:\n{mongorestore_proc.stderr.strip()}")
+            logging.debug(f"stdout:\n{mongorestore_proc.stdout.strip()}")
+
+            logging.debug(f"Removing {db_files_subdir} from {db_pod} ...")
+            rm_proc = combine.exec(db_pod, ["rm", "-rf", f"/{db_files_subdir}"])
+            logging.debug(f"stderr:\n{rm_proc.stderr.strip()}")
+            logging.debug(f"stdout:\n{rm_proc.stdout.strip()}")
 
         step.print("Copy the backend files.")
         backend_pod = combine.get_pod_id(CombineApp.Component.Backend)
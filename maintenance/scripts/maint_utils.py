@@ -8,6 +8,10 @@ import subprocess
 import sys
 from typing import List, Optional
 
+# The base name, in the database dump subdirectory of a streamed backup, of the chunks
+# of the `mongodump --archive --gzip` output, e.g., CombineDatabase.archive.gz.00000
+DB_ARCHIVE_NAME = "CombineDatabase.archive.gz"
+
 
 def check_env_vars(var_names: List[str]) -> tuple[str, ...]:
     """Look up a list of environment variables and validate them."""
@@ -0,0 +1,140 @@
+"""Tests for combine_backup.py --stream; run with 'python -m unittest' in this directory."""
+
+from contextlib import contextmanager
+import os
+from pathlib import Path
+import subprocess
+import tarfile
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, Iterator, List, Tuple
+import unittest
+from unittest import mock
+
+from aws_backup import AwsBackup
+from combine_app import CombineApp
+from combine_backup import stream_backup
+from combine_restore import stream_restore_db
+from maint_utils import DB_ARCHIVE_NAME
+from script_step import ScriptStep
+
+# subprocess.Popen is patched for the upload, so the real one is kept for the stubs
+REAL_POPEN = subprocess.Popen
+CHUNK_SIZE = 1000
+
+
+class LocalCombineApp(CombineApp):
+    """A CombineApp whose exec_stream runs a local command instead of one in a pod."""
+
+    def __init__(self, commands: Dict[str, List[str]]) -> None:
+        super().__init__()
+        self.commands = commands
+        self.calls: List[Tuple[str, str]] = []
+
+    @contextmanager
+    def exec_stream(
+        self, pod_id: str, cmd: List[str], *, stdin: bool = False
+    ) -> Iterator[subprocess.Popen[bytes]]:
+        self.calls.append((pod_id, cmd[0]))
+        proc = REAL_POPEN(
+            self.commands[cmd[0]],
+            stdin=subprocess.PIPE if stdin else subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL if stdin else subprocess.PIPE,
+        )
+        try:
+            yield proc
+        finally:
+            for pipe in (proc.stdin, proc.stdout):
+                if pipe is not None:
+                    pipe.close()
+            proc.wait()
+
+
+class TestStreamBackup(unittest.TestCase):
+    def setUp(self) -> None:
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+        self.archive = self.temp_dir / "mongodump.archive.gz"
+        self.restored = self.temp_dir / "mongorestore.archive.gz"
+        self.backend_files = {"project1/image.png": os.urandom(300), "project2/audio.webm": b""}
+        home_dir = self.temp_dir / "home"
+        for name, content in self.backend_files.items():
+            file_path = home_dir / "backend" / name
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_bytes(content)
+        self.combine = LocalCombineApp(
+            {
+                "/usr/bin/mongodump": ["cat", str(self.archive)],
+                "tar": ["tar", "-cf", "-", "-C", str(home_dir), "backend"],
+                "mongorestore": ["sh", "-c", f'cat > "{self.restored}"'],
+            }
+        )
+        self.aws = AwsBackup(bucket="backups")
+
+    def backup(self, upload_cmd: List[str]) -> None:
+        """Run stream_backup with the upload to AWS S3 replaced by upload_cmd."""
+
+        def popen(args: List[str], **kwargs: Any) -> subprocess.Popen[bytes]:
+            self.assertEqual(args[:3], ["aws", "s3", "cp"])
+            return REAL_POPEN(upload_cmd, **kwargs)
+
+        with mock.patch("aws_backup.subprocess.Popen", side_effect=popen):
+            stream_backup(
+                self.combine,
+                self.aws,
+                "backup.tar.gz",
+                "database-pod",
+                "backend-pod",
+                "dump",
+                "backend",
+                CHUNK_SIZE,
+                ScriptStep(),
+            )
+
+    def backup_and_restore(self, archive_size: int) -> List[Path]:
+        """Back up and restore an archive of archive_size bytes; returns its chunks."""
+        archive = os.urandom(archive_size)
+        self.archive.write_bytes(archive)
+        upload = self.temp_dir / "backup.tar.gz"
+        self.backup(["sh", "-c", f'cat > "{upload}"'])
+
+        restore_dir = self.temp_dir / "restore"
+        with tarfile.open(upload, "r:gz") as tar:
+            tar.extractall(restore_dir)
+        chunks = sorted((restore_dir / "dump").glob(f"{DB_ARCHIVE_NAME}.*"))
+        stream_restore_db(self.combine, "database-pod", chunks)
+
+        self.assertEqual(self.restored.read_bytes(), archive)
+        for name, content in self.backend_files.items():
+            self.assertEqual((restore_dir / "backend" / name).read_bytes(), content)
+        self.assertEqual(
+            self.combine.calls,
+            [
+                ("database-pod", "/usr/bin/mongodump"),
+                ("backend-pod", "tar"),
+                ("database-pod", "mongorestore"),
+            ],
+        )
+        return chunks
+
+    def test_backup_and_restore(self) -> None:
+        chunks = self.backup_and_restore(2 * CHUNK_SIZE + 500)
+        self.assertEqual([chunk.stat().st_size for chunk in chunks], [1000, 1000, 500])
+
+    def test_backup_and_restore_whole_chunks(self) -> None:
+        chunks = self.backup_and_restore(2 * CHUNK_SIZE)
+        self.assertEqual([chunk.stat().st_size for chunk in chunks], [1000, 1000, 0])
+
+    def test_backup_and_restore_empty_archive(self) -> None:
+        chunks = self.backup_and_restore(0)
+        self.assertEqual([chunk.stat().st_size for chunk in chunks], [0])
+
+    def test_failed_upload_fails_backup(self) -> None:
+        self.archive.write_bytes(os.urandom(CHUNK_SIZE))
+        with self.assertLogs(level="ERROR"), self.assertRaises(SystemExit) as context:
+            self.backup(["sh", "-c", "cat > /dev/null; exit 3"])
+        self.assertEqual(context.exception.code, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
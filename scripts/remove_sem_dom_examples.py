@@ -1,12 +1,53 @@
 #!/usr/bin/env python3
-"""Remove all <ExampleWords> and <ExampleSentences> blocks from semantic domain XML files."""
+"""
+Remove all <ExampleWords> and <ExampleSentences> blocks from semantic domain XML files.
 
+By default, each file is read into memory and the blocks are removed with a regular
+expression.  With --streaming, each file is instead read in chunks by an expat (SAX)
+parser and copied to a temporary file without the blocks, which then atomically
+replaces the original file.  As with the regular expression, only the bytes of the
+blocks and the whitespace before them are removed; unlike it, the parser does not
+backtrack and also handles self-closing tags with attributes, e.g., <ExampleWords a="" />.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import os
 from pathlib import Path
 import re
+import shutil
 import sys
+from tempfile import NamedTemporaryFile
+from typing import IO, List
+from xml.parsers import expat
 
 XML_DIR = Path(__file__).parent.parent / "deploy" / "scripts" / "semantic_domains" / "xml"
 TAGS = ["ExampleWords", "ExampleSentences"]
+CHUNK_SIZE = 1 << 20
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Remove the example words and sentences from semantic domain XML files.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "files",
+        metavar="xmlfile",
+        nargs="*",
+        type=Path,
+        help=f"XML files to update.  Defaults to all of the XML files in {XML_DIR}.",
+    )
+    parser.add_argument(
+        "--streaming",
+        "-s",
+        action="store_true",
+        help="Stream each file through an XML parser instead of loading it into memory.",
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, help="Number of files to process in parallel."
+    )
+    return parser.parse_args()
 
 
 def strip_examples(text: str) -> str:
@@ -17,20 +58,156 @@ def strip_examples(text: str) -> str:
     return text
 
 
+class ExampleStripper:
+    """
+    Copy an XML document from its parser's events, leaving out the example blocks.
+
+    The original bytes are copied rather than re-serialized from the events so that
+    the rest of the document is unchanged.  Only the bytes that follow the last event
+    are held in memory.
+    """
+
+    def __init__(self, output: IO[bytes]) -> None:
+        self.output = output
+        self.parser = expat.ParserCreate()
+        self.parser.StartElementHandler = self.start_element
+        self.parser.EndElementHandler = self.end_element
+        self.parser.CharacterDataHandler = self.character_data
+        # Bytes of the document from offset self.base that have not been written
+        self.buffer = bytearray()
+        self.base = 0
+        # Whitespace that is only written if it is not followed by an example block
+        self.held = b""
+        self.skip_depth = 0
+        self.has_content = False
+        self.removed = 0
+
+    def write_until(self, offset: int) -> None:
+        """Write the bytes before offset, holding back any trailing whitespace."""
+        end = offset - self.base
+        if end <= 0:
+            return
+        text = bytes(self.buffer[:end])
+        del self.buffer[:end]
+        self.base = offset
+        stripped = text.rstrip()
+        if stripped:
+            self.output.write(self.held)
+            self.output.write(stripped)
+            self.held = text[len(stripped) :]
+        else:
+            self.held += text
+
+    def discard_until(self, offset: int) -> None:
+        del self.buffer[: offset - self.base]
+        self.base = offset
+
+    def start_element(self, name: str, attrs: object) -> None:
+        self.has_content = True
+        if self.skip_depth:
+            self.skip_depth += 1
+        elif name in TAGS:
+            start = self.parser.CurrentByteIndex
+            self.write_until(start)
+            # The whitespace before an example block is removed with it
+            self.held = b""
+            self.skip_depth = 1
+            self.has_content = False
+
+    def end_element(self, name: str) -> None:
+        if not self.skip_depth:
+            return
+        self.skip_depth -= 1
+        if self.skip_depth:
+            return
+        index = self.parser.CurrentByteIndex
+        position = index - self.base
+        if not self.has_content and self.buffer[position - 2 : position] == b"/>":
+            # For an empty-element tag, the index is already past the tag
+            end = index
+        else:
+            end = self.buffer.index(b">", position) + 1 + self.base
+        self.discard_until(end)
+        self.removed += 1
+
+    def character_data(self, data: str) -> None:
+        self.has_content = True
+
+    def feed(self, data: bytes, final: bool = False) -> None:
+        self.buffer += data
+        self.parser.Parse(data, final)
+        if not self.skip_depth:
+            self.write_until(self.base + len(self.buffer) if final else self.safe_offset())
+        if final:
+            self.output.write(self.held)
+            self.held = b""
+
+    def safe_offset(self) -> int:
+        """Offset before which no example block can start, i.e., before the last '<'."""
+        last_tag = self.buffer.rfind(b"<")
+        return self.base + (len(self.buffer) if last_tag < 0 else last_tag)
+
+
+def stream_strip_examples(source: IO[bytes], output: IO[bytes]) -> int:
+    """Copy source to output without the example blocks; returns the number removed."""
+    stripper = ExampleStripper(output)
+    while chunk := source.read(CHUNK_SIZE):
+        stripper.feed(chunk)
+    stripper.feed(b"", final=True)
+    return stripper.removed
+
+
+def stream_strip_file(path: Path) -> bool:
+    """Strip the examples from a file in place; returns whether the file was changed."""
+    with NamedTemporaryFile(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False
+    ) as temp_file:
+        temp_path = Path(temp_file.name)
+        try:
+            with open(path, "rb") as source:
+                removed = stream_strip_examples(source, temp_file)
+        except BaseException:
+            temp_file.close()
+            temp_path.unlink()
+            raise
+    if not removed:
+        temp_path.unlink()
+        return False
+    shutil.copymode(path, temp_path)
+    os.replace(temp_path, path)
+    return True
+
+
+def strip_file(path: Path) -> bool:
+    """Strip the examples from a file with strip_examples; returns whether it was changed."""
+    original = path.read_text(encoding="utf-8")
+    modified = strip_examples(original)
+    if modified == original:
+        return False
+    path.write_text(modified, encoding="utf-8")
+    return True
+
+
+def process_file(path: Path, streaming: bool) -> str:
+    changed = stream_strip_file(path) if streaming else strip_file(path)
+    return f"Updated {path.name}" if changed else f"No changes: {path.name}"
+
+
 def main() -> None:
-    files = list(XML_DIR.glob("*.xml"))
+    args = parse_args()
+    files: List[Path] = args.files or sorted(XML_DIR.glob("*.xml"))
     if not files:
         print(f"No XML files found in {XML_DIR}", file=sys.stderr)
         sys.exit(1)
 
-    for path in sorted(files):
-        original = path.read_text(encoding="utf-8")
-        modified = strip_examples(original)
-        if modified != original:
-            path.write_text(modified, encoding="utf-8")
-            print(f"Updated {path.name}")
-        else:
-            print(f"No changes: {path.name}")
+    streaming = [args.streaming] * len(files)
+    if args.jobs > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            messages = list(executor.map(process_file, files, streaming))
+    else:
+        messages = list(map(process_file, files, streaming))
+    for message in messages:
+        print(message)
 
 
 if __name__ == "__main__":
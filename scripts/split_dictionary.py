@@ -1,30 +1,198 @@
 #!/usr/bin/env python
 """
 Splits a dictionary file into smaller files.
+
+By default, the files are split by entry count (-t/-T).  With -s/--size, they are
+split by their size in bytes instead, optionally measured after compression
+(-z/--compression), so that each part takes about as long to fetch.  With
+-p/--precompress gzip, a .dic.gz copy of each part is written at maximum compression,
+for the frontend's nginx to serve as is.  With -d/--dawg, each part is
+also compiled into a minimized DAWG, in a compact binary .dawg file that the client can
+check words against without parsing it.  With -b/--bloom, a Bloom filter of all the
+words is written as u.bloom, for the client to rule out most misspelled words without
+fetching their parts.  With -a/--auto, the -t and -T values of each language are chosen
+to minimize the expected size of the part fetched for a word, and reported in a JSON
+file.
 """
 
 import argparse
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+import gzip
+from hashlib import sha256
+import json
 import logging
+import math
+import os
 from pathlib import Path
 from shutil import rmtree
-from typing import List
+from statistics import median
+import struct
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
 from unicodedata import normalize
+import zlib
+
+import regex
 
-from regex import sub
+try:
+    import brotli
+
+    has_brotli = True
+except ImportError:
+    has_brotli = False
 
 combine_dir = Path(__file__).resolve().parent.parent
 public_dir = combine_dir / "public" / "dictionaries"
 resources_dir = combine_dir / "src" / "resources" / "dictionaries"
 
+# Number of characters of the word-list file to read at a time
+CHUNK_SIZE = 1 << 22
+# The characters removed here should match those used in spellChecker.ts
+# Cf. https://en.wikipedia.org/wiki/Unicode_character_property
+NON_WORD_PATTERN = regex.compile("[^\\p{L}\\p{M}]+")
+
+NormalForm = Literal["NFC", "NFD", "NFKC", "NFKD"]
+
+ALL_LANGS = "all"
+COMPRESSIONS = ["gzip", "br"]
+# The compressions of the precompressed copies; nginx serves them with gzip_static, but
+# the stock nginx image has no brotli module for brotli_static
+PRECOMPRESSIONS = ["gzip"]
+# The file-name suffix of a precompressed copy of a file, by compression
+COMPRESSED_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+# The errors raised when decompressing an invalid file
+DECOMPRESSION_ERRORS: Tuple[Type[Exception], ...] = (EOFError, OSError, zlib.error)
+if has_brotli:
+    DECOMPRESSION_ERRORS += (brotli.error,)
+# The options stated at the top of a language's index file
+LANG_OPTIONS_PATTERN = regex.compile(
+    " -m (-?\\d+) (?:-t (\\d+) -T (\\d+)|-s (\\d+) (\\d+)(?: -z (\\w+))?)`"
+)
+# The Bloom filter's false-positive rate stated at the top of a language's index file
+LANG_BLOOM_PATTERN = regex.compile(" -b ([^ `]+)")
+SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20}
+# The -t and -T values among which --auto chooses, with -t no more than -T
+TUNING_THRESHOLDS = [250, 500, 1000, 1500, 2000, 3000, 5000, 10000]
+TUNING_SPLIT_THRESHOLDS = [2000, 5000, 10000, 15000, 20000, 30000, 50000, 100000]
+
+# The number of hex digits of the content hash in a content-hashed file name
+CONTENT_HASH_LENGTH = 12
+# The file, next to the content-hashed files, that maps their plain names to theirs
+MANIFEST_FILE_NAME = "manifest.json"
+
+# The header of a .bloom file, little-endian: magic, version, normal form of the words,
+# number of hash functions, number of bits, and number of words
+BLOOM_HEADER = struct.Struct("<4sBBBxII")
+BLOOM_MAGIC = b"BLOM"
+BLOOM_VERSION = 1
+NORMAL_FORMS: List[NormalForm] = ["NFC", "NFD", "NFKC", "NFKD"]
+FNV_OFFSET_BASIS = 0x811C9DC5
+FNV_PRIME = 0x01000193
+
+# The header of a .dawg file, little-endian: magic, version, bytes per edge, bits of
+# each edge's label index and child pointer, number of edges, and size of the alphabet
+DAWG_HEADER = struct.Struct("<4sBBBBIH")
+DAWG_MAGIC = b"DAWG"
+DAWG_VERSION = 1
+# The most bytes per edge, for the client to read an edge as a number without BigInt
+DAWG_MAX_EDGE_SIZE = 6
+
+
+@dataclass(frozen=True)
+class PartitionOptions:
+    """
+    The options for splitting the word-list of a language into dictionary parts.
+
+    When by_size is set, threshold and split_threshold are sizes in bytes of the .dic
+    files, after compression if compression is set, instead of entry counts.
+    """
+
+    max_word_length: int
+    threshold: int
+    split_threshold: int
+    by_size: bool = False
+    compression: Optional[str] = None
+
+    def command_line(self) -> str:
+        """The command-line options, as stated at the top of the language's index file."""
+        if not self.by_size:
+            return f"-m {self.max_word_length} -t {self.threshold} -T {self.split_threshold}"
+        line = f"-m {self.max_word_length} -s {self.threshold} {self.split_threshold}"
+        return line if self.compression is None else f"{line} -z {self.compression}"
+
+
+@dataclass(frozen=True)
+class OutputOptions:
+    """The options for writing the dictionary parts of a language, beyond the .dic files."""
+
+    # The compressions for which to write a precompressed copy of each file
+    precompress: Tuple[str, ...] = ()
+    # Whether to also write each part as a DAWG
+    dawg: bool = False
+    # Whether to only rewrite the files that changed, instead of all of them
+    incremental: bool = False
+    # Whether to name the files by their content hash, listed in a manifest
+    hashed_names: bool = False
+    # The false-positive rate of a Bloom filter of all the words, if one is written
+    bloom_error_rate: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class TuningOptions:
+    """
+    The constraints under which the -t and -T values of a language are chosen, and the
+    directory of the report of the choice.
+
+    The sizes of the .dic files are measured after compression if compression is set.
+    """
+
+    max_parts: int
+    max_part_size: int
+    compression: Optional[str] = None
+    report_dir: Path = Path(".")
+
 
 def parse_args() -> argparse.Namespace:
     def lang_tag_type(tag: str) -> str:
+        if tag.lower() == ALL_LANGS:
+            return ALL_LANGS
         if not tag.isalpha():
             raise argparse.ArgumentTypeError("Language tag must be only letters")
         if len(tag) not in [2, 3]:
             raise argparse.ArgumentTypeError("Language tag must be 2 or 3 letters long")
         return tag
 
+    def rate_type(rate: str) -> float:
+        try:
+            value = float(rate)
+        except ValueError:
+            value = 0
+        if not 0 < value < 1:
+            raise argparse.ArgumentTypeError("Rate must be a number between 0 and 1")
+        return value
+
+    def size_type(size: str) -> int:
+        unit = size[-1:].upper() if size[-1:].isalpha() else ""
+        number = size[: len(size) - len(unit)]
+        if unit not in SIZE_UNITS or not number.isdigit():
+            raise argparse.ArgumentTypeError(
+                "Size must be a number of bytes, with optional K or M"
+            )
+        return int(number) * SIZE_UNITS[unit]
+
     """Define command line arguments for parser."""
     parser = argparse.ArgumentParser(
         description="Prepares all needed fonts.",
@@ -33,10 +201,16 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--input",
         "-i",
-        help="Override the path of the .txt file to be split",
+        help="Override the path of the .txt file to be split (with a single language only)",
     )
     parser.add_argument(
-        "--lang", "-l", help="2- or 3-letter language tag", required=True, type=lang_tag_type
+        "--lang",
+        "-l",
+        help=f"2- or 3-letter language tags, or '{ALL_LANGS}' for every language with a "
+        f".txt word-list in {resources_dir}",
+        nargs="+",
+        required=True,
+        type=lang_tag_type,
     )
     parser.add_argument(
         "--max",
@@ -59,6 +233,106 @@ def parse_args() -> argparse.Namespace:
         help="Minimum entry count for a word-start to be split into multiple files",
         type=int,
     )
+    parser.add_argument(
+        "--size",
+        "-s",
+        nargs=2,
+        metavar=("MIN", "MAX"),
+        type=size_type,
+        help="Split by file size instead of entry count: a word-start has its own file if "
+        "its entries take at least MIN bytes, and is split into multiple files if they take "
+        "more than MAX bytes.  Sizes can end in K or M.  The distribution of the sizes of "
+        "the files is printed.",
+    )
+    parser.add_argument(
+        "--compression",
+        "-z",
+        choices=COMPRESSIONS,
+        help="With --size, measure the size of each file after this compression.  "
+        "br requires the brotli package.",
+    )
+    parser.add_argument(
+        "--auto",
+        "-a",
+        action="store_true",
+        help="Choose the -t and -T values of each language that minimize the expected size "
+        "of the file fetched for a word, within --max-parts and --max-part-size, and write "
+        "a <lang>-partition.json report of the choice to --report-dir.  With -z, the sizes "
+        "are measured after compression.",
+    )
+    parser.add_argument(
+        "--max-parts",
+        default=100,
+        type=int,
+        help="With --auto, the most files for a language",
+    )
+    parser.add_argument(
+        "--max-part-size",
+        default=256 << 10,
+        type=size_type,
+        help="With --auto, the largest size in bytes of a file, with optional K or M",
+    )
+    parser.add_argument(
+        "--report-dir",
+        default=".",
+        type=Path,
+        help="With --auto, the directory in which to write the reports",
+    )
+    parser.add_argument(
+        "--precompress",
+        "-p",
+        nargs="+",
+        choices=PRECOMPRESSIONS,
+        default=[],
+        help="Also write a .dic.gz copy of each file at maximum compression, for nginx to "
+        "serve with gzip_static.  A copy that is already up to date is kept as is.",
+    )
+    parser.add_argument(
+        "--dawg",
+        "-d",
+        action="store_true",
+        help="Also compile each file into a minimized DAWG, in a binary .dawg file, and "
+        "generate a <lang>Dawg.ts file to load them.",
+    )
+    parser.add_argument(
+        "--bloom",
+        "-b",
+        metavar="RATE",
+        type=rate_type,
+        help="Also write a Bloom filter of all the words, with this false-positive rate "
+        "(e.g., 0.01), as u.bloom, for the client to rule out most misspelled words "
+        "without fetching their files.  The filter takes about 1.2 bytes per word at 0.01, "
+        "0.8 at 0.05, and 0.6 at 0.1.",
+    )
+    parser.add_argument(
+        "--incremental",
+        "-u",
+        action="store_true",
+        help="Only rewrite the files whose content changed, and delete those no longer "
+        "needed, instead of deleting and rewriting all of a language's files.",
+    )
+    parser.add_argument(
+        "--hashed-names",
+        "-H",
+        action="store_true",
+        help="Name each file by a hash of its content, e.g., u97.0123456789ab.dic, so that "
+        f"it can be cached immutably, and list the names in a {MANIFEST_FILE_NAME} file.",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of worker processes used to split the languages in parallel, "
+        "or to tokenize the word-list file and precompress the files of a single language.",
+    )
+    parser.add_argument(
+        "--reuse-options",
+        "-r",
+        action="store_true",
+        help="Use the -m, -t, -T, -s, -z, and -b values stated at the top of each language's "
+        "existing .ts file instead of those given.",
+    )
     parser.add_argument(
         "--verbose",
         "-v",
@@ -66,8 +340,26 @@ def parse_args() -> argparse.Namespace:
         help="Print intermediate values to aid in debugging.",
     )
     args = parser.parse_args()
-    args.lang = args.lang.lower()
+    langs: List[str] = []
+    for tag in args.lang:
+        if tag == ALL_LANGS:
+            langs.extend(sorted(path.stem for path in resources_dir.glob("*.txt")))
+        else:
+            langs.append(tag.lower())
+    args.langs = list(dict.fromkeys(langs))
+    if not args.langs:
+        parser.error(f"No word-list files found in {resources_dir}")
+    if args.auto and (args.size is not None or args.reuse_options):
+        parser.error("--auto cannot be used with --size or --reuse-options")
+    if args.compression is not None:
+        if args.size is None and not args.auto:
+            parser.error("--compression requires --size or --auto")
+        if args.compression == "br" and not has_brotli:
+            parser.error("--compression br requires the brotli package")
+    args.precompress = tuple(dict.fromkeys(args.precompress))
     if args.input:
+        if len(args.langs) > 1:
+            parser.error("--input can only be used with a single language")
         args.input = Path(args.input)
     return args
 
@@ -89,34 +381,721 @@ def max_length(lang: str) -> int:
     return -1
 
 
+def read_chunks(file_path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Read a text file in chunks of whole lines of about chunk_size characters."""
+    with open(file_path, "r", encoding="utf-8") as file:
+        rest = ""
+        while chunk := file.read(chunk_size):
+            chunk = rest + chunk
+            # Split after the last line break, so that no word or character with
+            # combining marks is split between chunks
+            end = chunk.rfind("\n") + 1
+            rest = chunk[end:]
+            if end:
+                yield chunk[:end]
+        if rest:
+            yield rest
+
+
+def tokenize_chunk(text: str, form: NormalForm, max_word_length: int) -> List[str]:
+    """Return the distinct words of the text in the order that they are first found."""
+    words = NON_WORD_PATTERN.sub(" ", normalize(form, text)).split()
+    if max_word_length > 0:
+        words = [word for word in words if len(word) <= max_word_length]
+    return list(dict.fromkeys(words))
+
+
+def read_distinct_words(
+    file_path: Path, form: NormalForm, max_word_length: int, jobs: int = 1
+) -> List[str]:
+    """
+    Read the distinct words of a word-list file in the order that they are first found.
+
+    The file is read in chunks that are normalized and tokenized in jobs worker
+    processes.  Only a few chunks are read ahead, so memory is bounded by the number of
+    distinct words rather than by the size of the file.
+    """
+    distinct: Dict[str, None] = {}
+    chunks = read_chunks(file_path)
+    if jobs <= 1:
+        for chunk in chunks:
+            distinct.update(dict.fromkeys(tokenize_chunk(chunk, form, max_word_length)))
+        return list(distinct)
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending: Deque[Future[List[str]]] = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(tokenize_chunk, chunk, form, max_word_length))
+            if len(pending) > 2 * jobs:
+                distinct.update(dict.fromkeys(pending.popleft().result()))
+        while pending:
+            distinct.update(dict.fromkeys(pending.popleft().result()))
+    return list(distinct)
+
+
+class PrefixNode:
+    """
+    A node of a prefix-weight trie, for the words that start with its (lowercase) key.
+
+    Until the node is split, it holds all of its words; once it is split, it only holds
+    the words that are no longer than its key, and its children hold the others.
+    """
+
+    __slots__ = ("key", "length", "weight", "split", "words", "children")
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.length = len(key)
+        # Total weight, e.g., number, of the distinct words that start with key
+        self.weight = 0
+        self.split = False
+        # In the order that the words were first found
+        self.words: List[str] = []
+        self.children: Dict[str, PrefixNode] = {}
+
+
+class PrefixTrie:
+    """
+    A prefix-weight trie of distinct words, split only as deep as a partition needs.
+
+    Each word weighs 1, or word_weight(word) if it is given.  A word-start can only be
+    split into multiple files if its words weigh more than split_weight, so a node only
+    gets children once its weight exceeds it.  Each word is thus only moved down the
+    trie as many times as its word-start is split.
+    """
+
+    def __init__(
+        self,
+        words: List[str],
+        split_weight: int,
+        word_weight: Optional[Callable[[str], int]] = None,
+    ) -> None:
+        self.split_weight = split_weight
+        self.word_weight = word_weight
+        self.root = PrefixNode("")
+        self.root.split = True
+        for word in words:
+            self.insert(self.root, word)
+
+    def insert(self, node: PrefixNode, word: str) -> None:
+        """Add a word below a split node."""
+        length = len(word)
+        weight = 1 if self.word_weight is None else self.word_weight(word)
+        while True:
+            if length <= node.length:
+                node.words.append(word)
+                return
+            key = word[: node.length + 1].lower()
+            child = node.children.get(key)
+            if child is None:
+                child = node.children[key] = PrefixNode(key)
+            child.weight += weight
+            if not child.split:
+                child.words.append(word)
+                if child.weight > self.split_weight:
+                    self.split_node(child)
+                return
+            node = child
+
+    def split_node(self, node: PrefixNode) -> None:
+        node.split = True
+        words = node.words
+        node.words = []
+        for word in words:
+            self.insert(node, word)
+
+
+def partition_words(
+    words: List[str],
+    threshold: int,
+    split_threshold: int,
+    word_weight: Optional[Callable[[str], int]] = None,
+    part_size: Optional[Callable[[List[str]], int]] = None,
+    limit_others: bool = False,
+) -> Dict[str, List[str]]:
+    """
+    Partition distinct words into dictionary parts by word-start.
+
+    A word-start with at least threshold words has its own part, unless it has more
+    than split_threshold words, in which case it is split by its next letter in the
+    same way.  The words of the smaller word-starts stay in the part of the word-start
+    that was split, the part with key "" for the first letters.  The words of each
+    part are in the order that they were first found, after the words that end there.
+
+    Instead of by their number, the words are measured by their total word_weight, if
+    it is given, or by part_size, if it is given, which must not be more than their
+    total word_weight.  When limit_others is set, the largest of the smaller
+    word-starts get their own parts until the rest fit within split_threshold.
+
+    Returns the words of each part, by key.
+    """
+    trie = PrefixTrie(words, split_threshold, word_weight)
+    parts: Dict[str, List[str]] = {}
+    positions: Dict[str, int] = {}
+
+    def subtree_words(node: PrefixNode) -> List[str]:
+        if not node.split:
+            return node.words
+        # A word-start that was split can still need its words collected, e.g., when
+        # it is too small for its own part with threshold > split_threshold
+        if not positions:
+            positions.update((word, position) for position, word in enumerate(words))
+        collected = list(node.words)
+        for child in node.children.values():
+            collected.extend(subtree_words(child))
+        return sorted(collected, key=positions.__getitem__)
+
+    def others_size(node: PrefixNode, small: Dict[str, Tuple[PrefixNode, int]]) -> int:
+        if part_size is not None:
+            return part_size(others_words(node, small))
+        size = len(node.words) if word_weight is None else sum(map(word_weight, node.words))
+        return size + sum(child.weight for child, _ in small.values())
+
+    def others_words(node: PrefixNode, small: Dict[str, Tuple[PrefixNode, int]]) -> List[str]:
+        others = list(node.words)
+        for child, _ in small.values():
+            others.extend(subtree_words(child))
+        return others
+
+    def partition_node(node: PrefixNode) -> None:
+        # The word-starts that are too small for their own parts, with their sizes
+        small: Dict[str, Tuple[PrefixNode, int]] = {}
+        for key, child in node.children.items():
+            size = child.weight if part_size is None else part_size(subtree_words(child))
+            if size < threshold:
+                small[key] = (child, size)
+            elif size > split_threshold and child.split:
+                partition_node(child)
+            else:
+                parts[key] = subtree_words(child)
+        if limit_others:
+            while small and others_size(node, small) > split_threshold:
+                key = max(small, key=lambda key: small[key][1])
+                parts[key] = subtree_words(small.pop(key)[0])
+        others = others_words(node, small)
+        if others:
+            parts[node.key] = others
+
+    partition_node(trie.root)
+    return parts
+
+
+class DawgNode:
+    """A state of a DAWG, with its outgoing edges by label."""
+
+    __slots__ = ("final", "edges")
+
+    def __init__(self) -> None:
+        # Whether a word ends here
+        self.final = False
+        # In label order
+        self.edges: Dict[str, DawgNode] = {}
+
+    def signature(self) -> Tuple[bool, Tuple[Tuple[str, int], ...]]:
+        """Identifies the node among minimized nodes, whose children are all minimized."""
+        return self.final, tuple((label, id(child)) for label, child in self.edges.items())
+
+
+def build_dawg(words: List[str]) -> DawgNode:
+    """
+    Build the minimal DAWG (directed acyclic word graph) of words, whose labels are
+    their characters.
+
+    The words are added in sorted order, and the nodes of the previous word that are
+    not shared with the next one are merged into any equivalent node, as in the
+    incremental algorithm of Daciuk et al. (2000).
+    """
+    root = DawgNode()
+    register: Dict[Tuple[bool, Tuple[Tuple[str, int], ...]], DawgNode] = {}
+    # The path of the previous word, as (parent, label, child), not yet minimized
+    unchecked: List[Tuple[DawgNode, str, DawgNode]] = []
+
+    def minimize(down_to: int) -> None:
+        while len(unchecked) > down_to:
+            parent, label, child = unchecked.pop()
+            signature = child.signature()
+            if signature in register:
+                parent.edges[label] = register[signature]
+            else:
+                register[signature] = child
+
+    previous = ""
+    for word in sorted(set(words)):
+        common = 0
+        for a, b in zip(word, previous):
+            if a != b:
+                break
+            common += 1
+        minimize(common)
+        node = unchecked[-1][2] if unchecked else root
+        for label in word[common:]:
+            child = node.edges[label] = DawgNode()
+            unchecked.append((node, label, child))
+            node = child
+        node.final = True
+        previous = word
+    minimize(0)
+    return root
+
+
+def serialize_dawg(root: DawgNode) -> bytes:
+    """
+    Serialize a DAWG into a compact binary.
+
+    After the header (DAWG_HEADER), the alphabet follows as sorted code points (uint32),
+    then the edges, each as a little-endian integer of the header's bytes per edge.  The
+    edges of each node are consecutive and in label order, starting with those of the
+    root at index 0.  The bits of an edge are, from the least significant: whether a
+    word ends after the edge, whether it is its node's last edge, the index of its label
+    in the alphabet, and the index of its child's first edge, or 0 if the child has no
+    edges.
+    """
+    # The index of the first edge of each node that has edges, in depth-first order
+    first_edges: Dict[int, int] = {}
+    nodes: List[DawgNode] = []
+    edge_count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if not node.edges or id(node) in first_edges:
+            continue
+        first_edges[id(node)] = edge_count
+        edge_count += len(node.edges)
+        nodes.append(node)
+        stack.extend(reversed(node.edges.values()))
+
+    alphabet = sorted({label for node in nodes for label in node.edges})
+    label_indexes = {label: index for index, label in enumerate(alphabet)}
+    label_bits = max(1, (len(alphabet) - 1).bit_length())
+    pointer_bits = max(1, (edge_count - 1).bit_length())
+    edge_size = (2 + label_bits + pointer_bits + 7) // 8
+    if edge_size > DAWG_MAX_EDGE_SIZE:
+        raise ValueError(f"Too many edges or labels for a DAWG: {edge_count}, {len(alphabet)}")
+
+    data = bytearray(
+        DAWG_HEADER.pack(
+            DAWG_MAGIC,
+            DAWG_VERSION,
+            edge_size,
+            label_bits,
+            pointer_bits,
+            edge_count,
+            len(alphabet),
+        )
+    )
+    data += struct.pack(f"<{len(alphabet)}I", *map(ord, alphabet))
+    for node in nodes:
+        last = len(node.edges) - 1
+        for position, (label, child) in enumerate(node.edges.items()):
+            edge = (
+                int(child.final)
+                | int(position == last) << 1
+                | label_indexes[label] << 2
+                | first_edges.get(id(child), 0) << (2 + label_bits)
+            )
+            data += edge.to_bytes(edge_size, "little")
+    return bytes(data)
+
+
+def read_dawg_header(data: bytes) -> Tuple[int, int, int, Tuple[int, ...]]:
+    """Return the bytes per edge, label bits, edge count, and alphabet of a serialized DAWG."""
+    magic, version, edge_size, label_bits, _, edge_count, alphabet_size = DAWG_HEADER.unpack_from(
+        data
+    )
+    if magic != DAWG_MAGIC or version != DAWG_VERSION:
+        raise ValueError("Not a DAWG file of a supported version")
+    alphabet = struct.unpack_from(f"<{alphabet_size}I", data, DAWG_HEADER.size)
+    return edge_size, label_bits, edge_count, alphabet
+
+
+def dawg_contains(data: bytes, word: str) -> bool:
+    """Check whether a serialized DAWG contains a word, as the client would."""
+    edge_size, label_bits, _, alphabet = read_dawg_header(data)
+    label_indexes = {code_point: index for index, code_point in enumerate(alphabet)}
+    edges_start = DAWG_HEADER.size + 4 * len(alphabet)
+    index = 0
+    final = False
+    for position, char in enumerate(word):
+        label = label_indexes.get(ord(char))
+        if label is None or (position and not index):
+            return False
+        while True:
+            start = edges_start + index * edge_size
+            edge = int.from_bytes(data[start : start + edge_size], "little")
+            if (edge >> 2) & ((1 << label_bits) - 1) == label:
+                final = bool(edge & 1)
+                index = edge >> (2 + label_bits)
+                break
+            if edge & 2:
+                return False
+            index += 1
+    return final
+
+
+def dawg_words(data: bytes) -> List[str]:
+    """Decode all of the words of a serialized DAWG, in code point order."""
+    edge_size, label_bits, edge_count, alphabet = read_dawg_header(data)
+    edges_start = DAWG_HEADER.size + 4 * len(alphabet)
+    words: List[str] = []
+
+    def add_words(index: int, prefix: str) -> None:
+        while True:
+            start = edges_start + index * edge_size
+            edge = int.from_bytes(data[start : start + edge_size], "little")
+            word = prefix + chr(alphabet[(edge >> 2) & ((1 << label_bits) - 1)])
+            if edge & 1:
+                words.append(word)
+            if edge >> (2 + label_bits):
+                add_words(edge >> (2 + label_bits), word)
+            if edge & 2:
+                return
+            index += 1
+
+    if edge_count:
+        add_words(0, "")
+    return words
+
+
+def bloom_hashes(word: str) -> Tuple[int, int]:
+    """
+    The two 32-bit FNV-1a hashes of a word's UTF-8 bytes, the second seeded by the
+    first and odd, from which the bit positions of the word in a Bloom filter are
+    derived by double hashing.
+    """
+    data = word.encode("utf-8")
+    first = FNV_OFFSET_BASIS
+    for byte in data:
+        first = ((first ^ byte) * FNV_PRIME) & 0xFFFFFFFF
+    second = first ^ FNV_OFFSET_BASIS
+    for byte in data:
+        second = ((second ^ byte) * FNV_PRIME) & 0xFFFFFFFF
+    return first, second | 1
+
+
+def build_bloom_filter(words: List[str], form: NormalForm, error_rate: float) -> bytes:
+    """
+    Build a Bloom filter of words with the given false-positive rate, serialized as a
+    compact binary.
+
+    After the header (BLOOM_HEADER), the bits follow, bit i being bit i % 8 of byte
+    i // 8.  Word w is in the bits (h1(w) + j * h2(w)) % bits for each hash function j,
+    with h1 and h2 from bloom_hashes, of w in the normal form at NORMAL_FORMS[form].
+    """
+    count = max(1, len(words))
+    bits = max(8, math.ceil(-count * math.log(error_rate) / math.log(2) ** 2))
+    hash_count = max(1, round(bits / count * math.log(2)))
+    filter_bits = bytearray((bits + 7) // 8)
+    for word in words:
+        first, second = bloom_hashes(word)
+        for index in range(hash_count):
+            position = (first + index * second) % bits
+            filter_bits[position >> 3] |= 1 << (position & 7)
+    header = BLOOM_HEADER.pack(
+        BLOOM_MAGIC, BLOOM_VERSION, NORMAL_FORMS.index(form), hash_count, bits, len(words)
+    )
+    return header + bytes(filter_bits)
+
+
+def bloom_contains(data: bytes, word: str) -> bool:
+    """Check whether a serialized Bloom filter might contain a word, as the client would."""
+    magic, version, form, hash_count, bits, _ = BLOOM_HEADER.unpack_from(data)
+    if magic != BLOOM_MAGIC or version != BLOOM_VERSION:
+        raise ValueError("Not a Bloom filter file of a supported version")
+    first, second = bloom_hashes(normalize(NORMAL_FORMS[form], word))
+    for index in range(hash_count):
+        position = (first + index * second) % bits
+        if not data[BLOOM_HEADER.size + (position >> 3)] & (1 << (position & 7)):
+            return False
+    return True
+
+
+def encoded_length(word: str) -> int:
+    """The number of bytes of a word's line in a .dic file."""
+    return len(word.encode("utf-8")) + 1
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    if compression == "br":
+        compressed: bytes = brotli.compress(data, quality=11)
+        return compressed
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def decompress(data: bytes, compression: str) -> bytes:
+    if compression == "br":
+        decompressed: bytes = brotli.decompress(data)
+        return decompressed
+    return gzip.decompress(data)
+
+
+def compressed_path(file_path: Path, compression: str) -> Path:
+    """The path of the precompressed copy of a file, e.g., u.dic.gz for u.dic."""
+    return file_path.with_name(file_path.name + COMPRESSED_SUFFIXES[compression])
+
+
+def precompress_file(file_path: Path, compression: str) -> bool:
+    """
+    Write the precompressed copy of a file, unless it is already up to date.
+
+    The existing copy is up to date if it decompresses to the file's content, which is
+    much faster to check than compressing at maximum compression.
+
+    Returns whether the copy was written.
+    """
+    data = file_path.read_bytes()
+    copy_path = compressed_path(file_path, compression)
+    if copy_path.is_file():
+        try:
+            if decompress(copy_path.read_bytes(), compression) == data:
+                return False
+        except DECOMPRESSION_ERRORS:
+            logging.warning(f"Replacing invalid {copy_path}")
+    # Replace the copy atomically, so that it is never served half-written
+    temp_path = copy_path.with_name(f".{copy_path.name}.tmp")
+    temp_path.write_bytes(compress(data, compression))
+    os.replace(temp_path, copy_path)
+    return True
+
+
+def precompress_files(file_paths: List[Path], compressions: Sequence[str], jobs: int = 1) -> int:
+    """
+    Write the precompressed copies of files in jobs worker processes, and remove those
+    of files that no longer exist from the files' directories.
+
+    Returns the number of copies written.
+    """
+    tasks = [(path, compression) for compression in compressions for path in file_paths]
+    copy_paths = {compressed_path(path, compression) for path, compression in tasks}
+    for subdir in {path.parent for path in file_paths}:
+        for compression in compressions:
+            for copy_path in subdir.glob(f"*{COMPRESSED_SUFFIXES[compression]}"):
+                if copy_path not in copy_paths:
+                    logging.info(f"Deleting {copy_path}")
+                    copy_path.unlink()
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            written = list(executor.map(precompress_file, *zip(*tasks)))
+    else:
+        written = [precompress_file(path, compression) for path, compression in tasks]
+    return sum(written)
+
+
+def dict_part_text(entries: List[str], include_count: bool = False) -> str:
+    lines = [f"{len(entries)}", *entries] if include_count else entries
+    return "".join(f"{line}\n" for line in lines)
+
+
+def dict_part_path(subdir: Path, start: str, extension: str = "dic") -> Path:
+    return subdir / f"u{'-'.join([str(ord(c)) for c in start])}.{extension}"
+
+
 def write_dict_part(file_path: Path, entries: List[str], include_count: bool = False) -> None:
     if not len(entries):
         return
 
     with open(file_path, "w", encoding="utf-8") as file:
-        if include_count:
-            file.write(f"{len(entries)}\n")
-        for entry in entries:
-            file.write(entry + "\n")
+        file.write(dict_part_text(entries, include_count))
 
 
-def main() -> None:
-    args = parse_args()
-    if args.verbose:
-        logging.basicConfig(format="%(levelname)s:%(message)s", level=logging.INFO)
-    else:
-        logging.basicConfig(format="%(levelname)s:%(message)s", level=logging.WARNING)
+def format_size(size: float) -> str:
+    return f"{size / 1024:.1f} KiB"
 
-    if not args.input:
-        args.input = resources_dir / f"{args.lang}.txt"
 
-    if not args.input.is_file():
-        logging.error("No such word-list file")
-        exit(1)
+def format_size_distribution(
+    lang: str, sizes: Dict[str, int], options: PartitionOptions
+) -> List[str]:
+    """Summarize the sizes of the dictionary parts of a language, with a histogram."""
+    values = sorted(sizes.values())
+    measure = f"{options.compression}-compressed" if options.compression else "uncompressed"
+    lines = [
+        f"{lang}: {len(values)} parts, {format_size(sum(values))} {measure} in total",
+        f"  min {format_size(values[0])}, median {format_size(median(values))}, "
+        f"90th percentile {format_size(values[(len(values) * 9) // 10])}, "
+        f"max {format_size(values[-1])}",
+    ]
+    # Parts by powers of two of their sizes
+    histogram = Counter(size.bit_length() for size in values)
+    for bits in sorted(histogram):
+        low, high = format_size(1 << (bits - 1)), format_size(1 << bits)
+        lines.append(f"  {low:>10} - {high:>10}: {histogram[bits]:>4} {'#' * histogram[bits]}")
+    below = sorted(name for name, size in sizes.items() if size < options.threshold)
+    if below:
+        lines.append(f"  {len(below)} below {format_size(options.threshold)}: {', '.join(below)}")
+    above = sorted(name for name, size in sizes.items() if size > options.split_threshold)
+    if above:
+        lines.append(
+            f"  {len(above)} above {format_size(options.split_threshold)}: {', '.join(above)}"
+        )
+    return lines
+
+
+def tune_partition(
+    lang: str, words: List[str], max_word_length: int, tuning: TuningOptions
+) -> Tuple[PartitionOptions, Dict[str, Any]]:
+    """
+    Choose the threshold and split_threshold for partitioning a language's words by
+    entry count, among TUNING_THRESHOLDS and TUNING_SPLIT_THRESHOLDS.
+
+    The client fetches the part of each word that it checks, so the choice minimizes
+    the expected size of that part, with each part weighted by its share of the words
+    as the frequency of its word-start, under the constraints of tuning.  If no choice
+    meets them, the one that exceeds them the least is made.
+
+    Returns the options and a report of the choice and of all the candidates.
+    """
+    # The size of each part, by key, number of entries, and hash of the entries
+    size_cache: Dict[Tuple[str, int, int], int] = {}
+
+    def part_size(start: str, entries: List[str]) -> int:
+        cache_key = (start, len(entries), hash(tuple(entries)))
+        if cache_key not in size_cache:
+            data = dict_part_text(entries, start == "").encode("utf-8")
+            if tuning.compression is not None:
+                data = compress(data, tuning.compression)
+            size_cache[cache_key] = len(data)
+        return size_cache[cache_key]
+
+    best: Optional[Tuple[Tuple[bool, float, float], PartitionOptions, Dict[str, int]]] = None
+    candidates: List[Dict[str, Any]] = []
+    for split_threshold in TUNING_SPLIT_THRESHOLDS:
+        for threshold in [t for t in TUNING_THRESHOLDS if t <= split_threshold]:
+            parts = partition_words(words, threshold, split_threshold)
+            sizes = {start: part_size(start, entries) for start, entries in parts.items()}
+            expected = sum(len(parts[start]) * size for start, size in sizes.items()) / max(
+                1, len(words)
+            )
+            excess = max(len(parts) / tuning.max_parts, max(sizes.values()) / tuning.max_part_size)
+            candidates.append(
+                {
+                    "threshold": threshold,
+                    "split_threshold": split_threshold,
+                    "parts": len(parts),
+                    "max_part_size": max(sizes.values()),
+                    "expected_fetch_size": round(expected),
+                    "feasible": excess <= 1,
+                }
+            )
+            # Feasible first, then by expected size, or by how much they exceed the constraints
+            rank = (excess > 1, excess if excess > 1 else 0, expected)
+            if best is None or rank < best[0]:
+                options = PartitionOptions(max_word_length, threshold, split_threshold)
+                best = (rank, options, sizes)
+    assert best is not None
+    _, options, sizes = best
+    if best[0][0]:
+        logging.warning(
+            f"No {lang} thresholds meet --max-parts {tuning.max_parts} and --max-part-size "
+            f"{tuning.max_part_size}; choosing those that exceed them the least"
+        )
+
+    histogram = Counter(size.bit_length() for size in sizes.values())
+    depths = Counter(len(start) for start in sizes)
+    chosen = next(
+        candidate
+        for candidate in candidates
+        if (candidate["threshold"], candidate["split_threshold"])
+        == (options.threshold, options.split_threshold)
+    )
+    report = {
+        "lang": lang,
+        "options": options.command_line(),
+        "words": len(words),
+        "compression": tuning.compression,
+        "constraints": {"max_parts": tuning.max_parts, "max_part_size": tuning.max_part_size},
+        "parts": len(sizes),
+        "feasible": chosen["feasible"],
+        "expected_fetch_size": chosen["expected_fetch_size"],
+        "initial_size": sizes.get("", 0),
+        "total_size": sum(sizes.values()),
+        "max_part_size": max(sizes.values()),
+        "max_depth": max(depths),
+        "parts_by_depth": {str(depth): depths[depth] for depth in sorted(depths)},
+        "size_histogram": [
+            {"min_size": 1 << (bits - 1), "max_size": 1 << bits, "parts": histogram[bits]}
+            for bits in sorted(histogram)
+        ],
+        "part_sizes": {
+            dict_part_path(Path(), start).name: sizes[start] for start in sorted(sizes)
+        },
+        "candidates": candidates,
+    }
+    return options, report
+
 
-    subdir = public_dir / args.lang
-    if subdir.is_dir():
+def recorded_header(lang: str) -> str:
+    """The first line of a language's index file, or "" if it has none."""
+    index_file_path = resources_dir / f"{lang}.ts"
+    if not index_file_path.is_file():
+        return ""
+    with open(index_file_path, "r", encoding="utf-8") as index_file:
+        return index_file.readline()
+
+
+def recorded_options(lang: str) -> Optional[PartitionOptions]:
+    """The options stated at the top of a language's index file, if any."""
+    match = LANG_OPTIONS_PATTERN.search(recorded_header(lang))
+    if match is None:
+        return None
+    if match[2] is not None:
+        return PartitionOptions(int(match[1]), int(match[2]), int(match[3]))
+    return PartitionOptions(int(match[1]), int(match[4]), int(match[5]), True, match[6])
+
+
+def recorded_bloom_error_rate(lang: str) -> Optional[float]:
+    """The Bloom filter's false-positive rate stated at the top of a language's index file."""
+    match = LANG_BLOOM_PATTERN.search(recorded_header(lang))
+    return None if match is None else float(match[1])
+
+
+def write_if_changed(file_path: Path, data: bytes) -> bool:
+    """Write data to a file, unless the file already has exactly that content."""
+    if (
+        file_path.is_file()
+        and file_path.stat().st_size == len(data)
+        and file_path.read_bytes() == data
+    ):
+        return False
+    file_path.write_bytes(data)
+    return True
+
+
+def content_hashed_name(file_name: str, data: bytes) -> str:
+    """The file name with a hash of the file's content, e.g., u97.0123456789ab.dic for u97.dic."""
+    stem, extension = file_name.rsplit(".", 1)
+    return f"{stem}.{sha256(data).hexdigest()[:CONTENT_HASH_LENGTH]}.{extension}"
+
+
+def split_dictionary(
+    lang: str,
+    word_list: Path,
+    form: NormalForm,
+    options: PartitionOptions,
+    jobs: int = 1,
+    output: OutputOptions = OutputOptions(),
+    tuning: Optional[TuningOptions] = None,
+) -> Dict[str, int]:
+    """
+    Split the word-list of a language into dictionary parts and write its index file.
+
+    If tuning is given, the threshold and split_threshold of options are replaced by
+    those chosen by tune_partition, of which a report is written.
+
+    If output.dawg is set, each part is also written as a DAWG, with an index file of
+    its own.  If output.incremental is set, the parts are written over the language's
+    existing files, of which only those that changed are rewritten and those no longer
+    needed are deleted; otherwise, the existing files are first deleted.  Either way,
+    the precompressed copies, for each of the output.precompress compressions, are kept
+    until the parts are written, so that those still up to date are not compressed
+    again.
+
+    Returns the size of each part's file, after compression if options.compression is set.
+    """
+    subdir = public_dir / lang
+    kept_suffixes = tuple(COMPRESSED_SUFFIXES[compression] for compression in output.precompress)
+    if subdir.is_dir() and not output.incremental:
         for path in subdir.iterdir():
+            if kept_suffixes and path.is_file() and path.name.endswith(kept_suffixes):
+                continue
             logging.info(f"Deleting {path}")
             if path.is_dir():
                 rmtree(path)
@@ -124,152 +1103,336 @@ def main() -> None:
                 path.unlink()
     Path.mkdir(subdir, exist_ok=True)
 
-    all_entries: List[str] = []
-    with open(args.input, "r", encoding="utf-8") as file:
-        for line in file.readlines():
-            # The characters sub()-ed here should match those used in spellChecker.ts
-            # Cf. https://en.wikipedia.org/wiki/Unicode_character_property
-            words = sub("[^\\p{L}\\p{M}]+", " ", normalize(args.normalize, line)).split()
+    distinct_entries = read_distinct_words(word_list, form, options.max_word_length, jobs)
+    if tuning is not None:
+        logging.info(f"Tuning the partition of {len(distinct_entries)} distinct {lang} entries")
+        options, report = tune_partition(lang, distinct_entries, options.max_word_length, tuning)
+        report_path = tuning.report_dir / f"{lang}-partition.json"
+        with open(report_path, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, ensure_ascii=False, indent=2)
+            report_file.write("\n")
+        print(
+            f"{lang}: chose {options.command_line()}, with {report['parts']} parts and an "
+            f"expected fetch of {format_size(report['expected_fetch_size'])}; see {report_path}"
+        )
+    logging.info(f"Partitioning {len(distinct_entries)} distinct {lang} entries")
+    compression = options.compression
+    parts = partition_words(
+        distinct_entries,
+        options.threshold,
+        options.split_threshold,
+        word_weight=encoded_length if options.by_size else None,
+        limit_others=options.by_size,
+        part_size=(
+            None
+            if compression is None
+            else lambda entries: len(
+                compress(dict_part_text(entries).encode("utf-8"), compression)
+            )
+        ),
+    )
 
-            # If user doesn't specify -m, use lang-specific default of max_length().
-            if not args.max:
-                args.max = max_length(args.lang)
-            if args.max > 0:
-                words = [w for w in words if len(w) <= args.max]
+    # The name of each written file, by its plain name, e.g., u97.dic
+    file_names: Dict[str, str] = {}
+    written = 0
 
-            all_entries.extend(words)
+    def write_part(start: str, extension: str, data: bytes) -> Path:
+        nonlocal written
+        file_name = dict_part_path(subdir, start, extension).name
+        if output.hashed_names:
+            file_name = content_hashed_name(file_name, data)
+        file_names[dict_part_path(subdir, start, extension).name] = file_name
+        file_path = subdir / file_name
+        if write_if_changed(file_path, data):
+            written += 1
+        else:
+            logging.info(f"Keeping unchanged {file_path}")
+        return file_path
 
-    def split_and_export_entries(
-        entries: List[str], all_starts: List[str], start: str = ""
-    ) -> None:
-        logging.info(f"Splitting {len(entries)} entries beginning with '{start}'")
-        entry_sets: dict[str, dict[str, bool]] = {}
-        others: dict[str, bool] = {}
+    sizes: Dict[str, int] = {}
+    part_paths: List[Path] = []
+    for start, entries in parts.items():
+        data = dict_part_text(entries, start == "").encode("utf-8")
+        logging.info(f"Saving {len(entries)} entries to {dict_part_path(subdir, start)}")
+        part_paths.append(write_part(start, "dic", data))
+        size = len(data) if compression is None else len(compress(data, compression))
+        sizes[dict_part_path(subdir, start).name] = size
+    dawg_index_file_path = resources_dir / f"{lang}Dawg.ts"
+    if output.dawg:
+        dic_size = sum(path.stat().st_size for path in part_paths)
+        dawg_size = 0
+        for start, entries in parts.items():
+            logging.info(f"Compiling {len(entries)} entries to a DAWG")
+            part_paths.append(write_part(start, "dawg", serialize_dawg(build_dawg(entries))))
+            dawg_size += part_paths[-1].stat().st_size
+        logging.info(f"Compiled {lang} parts from {dic_size} to {dawg_size} bytes")
+    elif dawg_index_file_path.is_file():
+        logging.info(f"Deleting {dawg_index_file_path}")
+        dawg_index_file_path.unlink()
+    bloom_path: Optional[Path] = None
+    if output.bloom_error_rate is not None:
+        bloom = build_bloom_filter(distinct_entries, form, output.bloom_error_rate)
+        logging.info(f"Built a {len(bloom)}-byte Bloom filter of the {lang} entries")
+        bloom_path = write_part("", "bloom", bloom)
+        part_paths.append(bloom_path)
+    logging.info(f"Wrote {written} of {len(part_paths)} {lang} files")
 
-        for entry in entries:
-            if len(entry) <= len(start):
-                others[entry] = True
+    manifest_path = subdir / MANIFEST_FILE_NAME
+    if output.hashed_names:
+        manifest = json.dumps(file_names, indent=2, sort_keys=True) + "\n"
+        write_if_changed(manifest_path, manifest.encode("utf-8"))
+    if output.incremental:
+        needed = {path.name for path in part_paths}
+        if output.hashed_names:
+            needed.add(manifest_path.name)
+        for path in sorted(subdir.iterdir()):
+            if path.name in needed or (
+                kept_suffixes
+                and path.name.endswith(kept_suffixes)
+                and path.name.rsplit(".", 1)[0] in needed
+            ):
                 continue
+            logging.info(f"Deleting {path}")
+            if path.is_dir():
+                rmtree(path)
+            else:
+                path.unlink()
+    if output.precompress:
+        copies_written = precompress_files(part_paths, output.precompress, jobs)
+        logging.info(
+            f"Precompressed {copies_written} of {len(part_paths) * len(output.precompress)} "
+            f"{lang} files"
+        )
+    word_starts = [start for start in parts if start]
+
+    index_file_path = resources_dir / f"{lang}.ts"
+    logging.info(f"Generating {index_file_path}")
+    with open(index_file_path, "w") as index_file:
+        index_file.writelines(
+            generate_lang_index_file_lines(
+                lang,
+                options,
+                word_starts,
+                file_names=file_names,
+                bloom_file_name=None if bloom_path is None else bloom_path.name,
+                bloom_error_rate=output.bloom_error_rate,
+            )
+        )
+    if output.dawg:
+        logging.info(f"Generating {dawg_index_file_path}")
+        with open(dawg_index_file_path, "w") as index_file:
+            index_file.writelines(
+                generate_lang_index_file_lines(
+                    lang, options, word_starts, dawg=True, file_names=file_names
+                )
+            )
+    return sizes
 
-            sub_start = entry[: len(start) + 1].lower()
-            if sub_start not in entry_sets:
-                entry_sets[sub_start] = {}
-            entry_sets[sub_start][entry] = True
 
-        for key, val in entry_sets.items():
-            subentries = list(val.keys())
-            if len(subentries) < args.threshold:
-                for subentry in subentries:
-                    others[subentry] = True
-                continue
+def generate_lang_index_file_lines(
+    lang: str,
+    options: PartitionOptions,
+    word_starts: List[str],
+    dawg: bool = False,
+    file_names: Optional[Dict[str, str]] = None,
+    bloom_file_name: Optional[str] = None,
+    bloom_error_rate: Optional[float] = None,
+) -> List[str]:
+    """
+    Generate the index file of a language's dictionary parts, or of their DAWGs if dawg
+    is set, whose default export fetches a part by key.
 
-            elif len(subentries) > args.Threshold:
-                split_and_export_entries(subentries, all_starts, key)
-                continue
+    The parts are fetched by their plain names, e.g., u97.dic, unless file_names maps
+    them to other names, e.g., content-hashed ones.  If bloom_file_name is given, a
+    fetchBloomFilter function is also exported to fetch that file, and the
+    bloom_error_rate it was built with is stated with the other options.
+    """
+    file_names = file_names or {}
+    hashed = any(name != plain_name for plain_name, name in file_names.items())
 
-            all_starts.append(key)
-            file_path = subdir / f"u{'-'.join([str(ord(c)) for c in key])}.dic"
-            logging.info(f"Saving {len(subentries)} entries to {file_path}")
-            write_dict_part(file_path, subentries)
-
-        file_path = subdir / f"u{'-'.join([str(ord(c)) for c in start])}.dic"
-        other_words = list(others.keys())
-        if len(other_words):
-            if start:
-                all_starts.append(start)
-            logging.info(f"Saving {len(other_words)} entries to {file_path}")
-            write_dict_part(file_path, other_words, start == "")
-
-    word_starts: List[str] = []
-    split_and_export_entries(all_entries, word_starts)
-
-    def generate_lang_index_file_lines() -> List[str]:
-        # Generate the comment for the top of the language's index file
-        header_line = "// This file was generated by `python scripts/split_dictionary.py"
-        header_line += f" -l {args.lang} -m {args.max} -t {args.threshold} -T {args.Threshold}"
-        header_line += "`.\n\n"
-
-        # Generate the needed import
-        import_line = 'import { fetchText } from "utilities/fontCssUtilities";\n\n'
-
-        # Generate the exported array of keys for this language's dictionary parts...
-        key_lines = ["export const keys = [\n"]
-        # ... and the switch cases for fetching dictionary parts by key
-        switch_lines = ["  switch (key) {\n"]
-        for start in sorted(word_starts):
-            key = "-".join([str(ord(c)) for c in start])
-            key_lines.append(f'  "{key}",\n')
-            switch_lines.append(f'    case "{key}":\n')
-            import_path = f'"/dictionaries/{args.lang}/u{key}.dic"'
-            switch_lines.append(f"      return await fetchText({import_path});\n")
-        key_lines.append("];\n\n")
-        switch_lines.append("    default:\n      return;\n  }\n")
-
-        # Generate the default exported dictionary-fetch function
-        default_path = f'"/dictionaries/{args.lang}/u.dic"'
-        default_function_lines = [
-            "export default async function (key?: string): Promise<string | undefined> {\n",
-            "  if (!key) {\n",
-            f"    return await fetchText({default_path});\n",
-            "  }\n\n",
-            *switch_lines,
+    # Generate the comment for the top of the language's index file
+    header_line = "// This file was generated by `python scripts/split_dictionary.py"
+    header_line += f" -l {lang}{' -d' if dawg else ''}{' -H' if hashed else ''}"
+    if bloom_file_name and bloom_error_rate is not None:
+        header_line += f" -b {bloom_error_rate:g}"
+    header_line += f" {options.command_line()}`.\n\n"
+
+    # Generate the needed import
+    fetch_function = "fetchArrayBuffer" if dawg else "fetchText"
+    extension = "dawg" if dawg else "dic"
+    return_type = "ArrayBuffer" if dawg else "string"
+    fetch_functions = sorted({fetch_function, *(["fetchArrayBuffer"] if bloom_file_name else [])})
+    import_line = (
+        f'import {{ {", ".join(fetch_functions)} }} from "utilities/fontCssUtilities";\n\n'
+    )
+
+    # Generate the exported array of keys for this language's dictionary parts...
+    key_lines = ["export const keys = [\n"]
+    # ... and the switch cases for fetching dictionary parts by key
+    switch_lines = ["  switch (key) {\n"]
+    for start in sorted(word_starts):
+        key = "-".join([str(ord(c)) for c in start])
+        key_lines.append(f'  "{key}",\n')
+        switch_lines.append(f'    case "{key}":\n')
+        file_name = f"u{key}.{extension}"
+        import_path = f'"/dictionaries/{lang}/{file_names.get(file_name, file_name)}"'
+        switch_lines.append(return_fetch_line("      ", fetch_function, import_path))
+    key_lines.append("];\n\n")
+    switch_lines.append("    default:\n      return;\n  }\n")
+
+    # Generate the default exported dictionary-fetch function
+    file_name = f"u.{extension}"
+    default_path = f'"/dictionaries/{lang}/{file_names.get(file_name, file_name)}"'
+    promise_type = f"Promise<{return_type} | undefined>"
+    signature = f"export default async function (key?: string): {promise_type} {{"
+    if len(signature) > 80:
+        # Wrap the parameter as prettier would
+        signature = f"export default async function (\n  key?: string\n): {promise_type} {{"
+    default_function_lines = [
+        f"{signature}\n",
+        "  if (!key) {\n",
+        return_fetch_line("    ", fetch_function, default_path),
+        "  }\n\n",
+        *switch_lines,
+        "}\n",
+    ]
+    if bloom_file_name:
+        bloom_path = f'"/dictionaries/{lang}/{bloom_file_name}"'
+        default_function_lines += [
+            "\n/** Fetch the Bloom filter of all the words, to rule out misspelled words. */\n",
+            "export async function fetchBloomFilter(): Promise<ArrayBuffer | undefined> {\n",
+            return_fetch_line("  ", "fetchArrayBuffer", bloom_path),
             "}\n",
         ]
 
-        return [header_line, import_line, *key_lines, *default_function_lines]
+    return [header_line, import_line, *key_lines, *default_function_lines]
 
-    index_file_path = resources_dir / f"{args.lang}.ts"
-    logging.info(f"Generating {index_file_path}")
-    with open(index_file_path, "w") as index_file:
-        index_file.writelines(generate_lang_index_file_lines())
-
-    def generate_main_index_file_lines() -> List[str]:
-        # Generate the comments for the top of the main dictionary index file
-        header_lines = [
-            "// This file was generated by scripts/split_dictionary.py\n\n",
-            "// Arabic word-list source (GPLv3):\n",
-            "// https://sourceforge.net/projects/arabic-wordlist\n"
-            "// Other languages source (MPLv2):\n",
-            "// https://github.com/LibreOffice/dictionaries\n\n",
-        ]
 
-        # Generate the imports of the various language dictionaries...
-        import_lines: List[str] = []
-        # ... and the function for getting the dictionary-part keys for a language...
-        keys_lines = [
-            "/** For a given lang-tag, return the associated dictionary keys,\n",
-            " * or undefined if there is no dic for the lang-tag. */\n",
-            "export function getKeys(bcp47: Bcp47Code): string[] | undefined {\n",
-            "  switch (bcp47) {\n",
-        ]
-        # ... and the function for getting the dictionary parts for a language...
-        dict_lines = [
-            "/** For a given lang-tag and dict key,\n"
-            " * return the dictionary piece associated with that key,\n"
-            " * or undefined if there is no dictionary for the lang-tag. */\n"
-            "export async function getDict(\n"
-            "  bcp47: Bcp47Code,\n"
-            "  key?: string\n"
-            "): Promise<string | undefined> {\n"
-            "  switch (bcp47) {\n"
+def return_fetch_line(indent: str, fetch_function: str, path: str) -> str:
+    """The statement returning a fetched file, wrapped as prettier would if too long."""
+    line = f"{indent}return await {fetch_function}({path});\n"
+    if len(line) <= 81:
+        return line
+    return f"{indent}return await {fetch_function}(\n{indent}  {path}\n{indent});\n"
+
+
+def generate_main_index_file_lines() -> List[str]:
+    # Generate the comments for the top of the main dictionary index file
+    header_lines = [
+        "// This file was generated by scripts/split_dictionary.py\n\n",
+        "// Arabic word-list source (GPLv3):\n",
+        "// https://sourceforge.net/projects/arabic-wordlist\n"
+        "// Other languages source (MPLv2):\n",
+        "// https://github.com/LibreOffice/dictionaries\n\n",
+    ]
+
+    # Generate the imports of the various language dictionaries...
+    import_lines: List[str] = []
+    # ... and the function for getting the dictionary-part keys for a language...
+    keys_lines = [
+        "/** For a given lang-tag, return the associated dictionary keys,\n",
+        " * or undefined if there is no dic for the lang-tag. */\n",
+        "export function getKeys(bcp47: Bcp47Code): string[] | undefined {\n",
+        "  switch (bcp47) {\n",
+    ]
+    # ... and the function for getting the dictionary parts for a language...
+    dict_lines = [
+        "/** For a given lang-tag and dict key,\n"
+        " * return the dictionary piece associated with that key,\n"
+        " * or undefined if there is no dictionary for the lang-tag. */\n"
+        "export async function getDict(\n"
+        "  bcp47: Bcp47Code,\n"
+        "  key?: string\n"
+        "): Promise<string | undefined> {\n"
+        "  switch (bcp47) {\n"
+    ]
+    for file_path in sorted(public_dir.iterdir()):
+        if file_path.is_dir():
+            lang = file_path.stem
+            lang_index_path = resources_dir / f"{lang}.ts"
+            if lang_index_path.is_file():
+                import_lines.append(f"import {lang}Dic, {{ keys as {lang}Keys }} ")
+                import_lines.append(f'from "resources/dictionaries/{lang}";\n')
+                keys_lines.append(f"    case Bcp47Code.{lang.capitalize()}:\n")
+                keys_lines.append(f"      return {lang}Keys;\n")
+                dict_lines.append(f"    case Bcp47Code.{lang.capitalize()}:\n")
+                dict_lines.append(f"      return await {lang}Dic(key);\n")
+    import_lines.append('import { Bcp47Code } from "types/writingSystem";\n\n')
+    keys_lines.append("    default:\n      return;\n  }\n}\n\n")
+    dict_lines.append("    default:\n      return;\n  }\n}\n")
+
+    return [*header_lines, *import_lines, *keys_lines, *dict_lines]
+
+
+def main() -> None:
+    args = parse_args()
+    if args.verbose:
+        logging.basicConfig(format="%(levelname)s:%(message)s", level=logging.INFO)
+    else:
+        logging.basicConfig(format="%(levelname)s:%(message)s", level=logging.WARNING)
+
+    word_lists: List[Path] = [args.input or resources_dir / f"{lang}.txt" for lang in args.langs]
+    missing = [word_list for word_list in word_lists if not word_list.is_file()]
+    if missing:
+        for word_list in missing:
+            logging.error(f"No such word-list file: {word_list}")
+        exit(1)
+
+    lang_options: List[PartitionOptions] = []
+    output_options: List[OutputOptions] = []
+    for lang in args.langs:
+        # If user doesn't specify -m, use lang-specific default of max_length().
+        max_word_length = args.max or max_length(lang)
+        if args.size is not None:
+            min_size, max_size = args.size
+            options = PartitionOptions(max_word_length, min_size, max_size, True, args.compression)
+        else:
+            options = PartitionOptions(max_word_length, args.threshold, args.Threshold)
+        bloom_error_rate = args.bloom
+        recorded = recorded_options(lang) if args.reuse_options else None
+        if recorded is not None:
+            options = recorded
+            bloom_error_rate = recorded_bloom_error_rate(lang)
+        if options.compression == "br" and not has_brotli:
+            logging.error(f"The {lang} options require the brotli package")
+            exit(1)
+        lang_options.append(options)
+        output_options.append(
+            OutputOptions(
+                args.precompress, args.dawg, args.incremental, args.hashed_names, bloom_error_rate
+            )
+        )
+
+    # The workers split whole languages, or the word-list of a single language
+    lang_jobs = args.jobs if len(args.langs) == 1 else 1
+    split_args = (
+        args.langs,
+        word_lists,
+        [args.normalize] * len(args.langs),
+        lang_options,
+        [lang_jobs] * len(args.langs),
+        output_options,
+        [
+            (
+                TuningOptions(
+                    args.max_parts, args.max_part_size, args.compression, args.report_dir
+                )
+                if args.auto
+                else None
+            )
         ]
-        for file_path in public_dir.iterdir():
-            if file_path.is_dir():
-                lang = file_path.stem
-                lang_index_path = resources_dir / f"{lang}.ts"
-                if lang_index_path.is_file():
-                    import_lines.append(f"import {lang}Dic, {{ keys as {lang}Keys }} ")
-                    import_lines.append(f'from "resources/dictionaries/{lang}";\n')
-                    keys_lines.append(f"    case Bcp47Code.{lang.capitalize()}:\n")
-                    keys_lines.append(f"      return {lang}Keys;\n")
-                    dict_lines.append(f"    case Bcp47Code.{lang.capitalize()}:\n")
-                    dict_lines.append(f"      return await {lang}Dic(key);\n")
-        import_lines.append('import { Bcp47Code } from "types/writingSystem";\n\n')
-        keys_lines.append("    default:\n      return;\n  }\n}\n\n")
-        dict_lines.append("    default:\n      return;\n  }\n}\n")
-
-        return [*header_lines, *import_lines, *keys_lines, *dict_lines]
+        * len(args.langs),
+    )
+    if len(args.langs) > 1 and args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            lang_sizes = list(executor.map(split_dictionary, *split_args))
+    else:
+        lang_sizes = list(map(split_dictionary, *split_args))
+    for lang, options, sizes in zip(args.langs, lang_options, lang_sizes):
+        if options.by_size and sizes:
+            print("\n".join(format_size_distribution(lang, sizes, options)))
 
+    # Regenerate the main index once all of the languages are split
     langs_index_file_path = resources_dir / "index.ts"
     logging.info(f"Generating {langs_index_file_path}")
     with open(langs_index_file_path, "w") as langs_index_file:
@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+"""
+Benchmark split_dictionary.py on the checked-in languages and on synthetic word-lists.
+
+Each language is split end-to-end by split_dictionary() into a temporary directory,
+with the options stated at the top of its index file, from its .txt word-list in
+src/resources/dictionaries or, if there is none, from the words of its checked-in
+dictionary parts.  The parts written are also compared with the checked-in ones.
+Each synthetic word-list has a given number of random words in a given alphabet.
+Each run is in a fresh process so that its peak resident set size is not affected by
+the other runs.
+
+The run time, peak memory, number of parts, and total size of the output of each run
+are written to a JSON report.  The exit code is 1 if any run exceeds one of the given
+limits or, when a baseline report is given, regresses by more than --max-regression,
+e.g.:
+
+    python scripts/split_dictionary_benchmark.py -l all -s latin cyrillic -w 100000 1000000 \\
+        --output after.json --baseline before.json --max-regression 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import asdict, dataclass
+import logging
+from pathlib import Path
+import random
+import sys
+from tempfile import TemporaryDirectory
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import split_dictionary
+
+# benchmark_utils is shared with the semantic domain benchmark in deploy/scripts
+sys.path.append(str(Path(__file__).resolve().parent.parent / "deploy" / "scripts"))
+import benchmark_utils  # noqa: E402
+
+REPORT_VERSION = 1
+
+# The letters of each synthetic alphabet, and the combining marks that can follow them
+ALPHABETS: Dict[str, Tuple[str, str]] = {
+    "latin": ("abcdefghijklmnopqrstuvwxyz", "́̀̈"),
+    "cyrillic": ("абвгдежзийклмнопрстуфхцчшщъыьэюя", "̆"),
+    "arabic": ("ابتثجحخدذرزسشصضطظعغفقكلمنهوي", "َُِ"),
+    "devanagari": (
+        "अआइईउऊएऐओऔकखगघचछजझटठडढणतथदधनपफबभमयरलवशषसह",
+        "ािीुूेैोौं",
+    ),
+}
+# The metrics that --max-regression applies to
+REGRESSION_METRICS = ["seconds", "peak_rss_kib", "parts", "output_bytes"]
+
+
+@dataclass
+class BenchmarkRun:
+    """A language to split: a checked-in one if alphabet is None, else a synthetic one."""
+
+    lang: str
+    alphabet: Optional[str] = None
+    words: int = 0
+    threshold: int = 2000
+    split_threshold: int = 20000
+    jobs: int = 1
+    seed: int = 0
+
+    @property
+    def name(self) -> str:
+        if self.alphabet is None:
+            return self.lang
+        return f"{self.alphabet}-{self.words}"
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse user command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark split_dictionary.py on checked-in and synthetic word-lists.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--lang",
+        "-l",
+        nargs="*",
+        default=[],
+        help=f"Checked-in languages to split, or '{split_dictionary.ALL_LANGS}' for all of "
+        f"those with a folder in {split_dictionary.public_dir}",
+    )
+    parser.add_argument(
+        "--synthetic",
+        "-s",
+        nargs="*",
+        choices=list(ALPHABETS),
+        default=[],
+        help="Alphabets of the synthetic word-lists to split",
+    )
+    parser.add_argument(
+        "--words",
+        "-w",
+        type=int,
+        nargs="+",
+        default=[100000],
+        help="Number of words of each synthetic word-list.  Each number is run separately.",
+    )
+    parser.add_argument(
+        "--threshold", "-t", type=int, default=2000, help="-t for the synthetic word-lists"
+    )
+    parser.add_argument(
+        "--Threshold", "-T", type=int, default=20000, help="-T for the synthetic word-lists"
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, help="--jobs of split_dictionary.py for each run"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic words.")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this file.")
+    parser.add_argument("--baseline", "-b", help="JSON report to compare the results with.")
+    parser.add_argument("--max-seconds", type=float, help="Fail if a run takes longer.")
+    parser.add_argument("--max-rss-mib", type=float, help="Fail if a run uses more memory.")
+    parser.add_argument("--max-parts", type=int, help="Fail if a run writes more parts.")
+    parser.add_argument(
+        "--max-output-bytes", type=int, help="Fail if a run writes more bytes of parts."
+    )
+    parser.add_argument(
+        "--max-changed-parts",
+        type=int,
+        help="Fail if the parts of a checked-in language differ from the checked-in "
+        "ones in more files than this.",
+    )
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        help=f"With --baseline, fail if any of {', '.join(REGRESSION_METRICS)} of a run "
+        "grows by more than this fraction, e.g., 0.2.",
+    )
+    parser.add_argument(
+        "--verbose", "-v", action="store_true", help="Print detailed progress information."
+    )
+    args = parser.parse_args()
+    langs: List[str] = []
+    for lang in args.lang:
+        if lang.lower() == split_dictionary.ALL_LANGS:
+            langs.extend(
+                sorted(
+                    path.name for path in split_dictionary.public_dir.iterdir() if path.is_dir()
+                )
+            )
+        else:
+            langs.append(lang.lower())
+    args.langs = list(dict.fromkeys(langs))
+    if not args.langs and not args.synthetic:
+        parser.error("Give at least one --lang or --synthetic alphabet.")
+    if min(args.words) < 1:
+        parser.error("--words must be at least 1.")
+    if args.max_regression is not None and args.baseline is None:
+        parser.error("--max-regression requires --baseline.")
+    return args
+
+
+def synthetic_words(alphabet: str, count: int, seed: int) -> List[str]:
+    """
+    Return count distinct random words in an alphabet.
+
+    The letters have skewed frequencies, so that some word-starts are much more common
+    than others, as in a real word-list.
+    """
+    letters, marks = ALPHABETS[alphabet]
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(letters))]
+    rng.shuffle(weights)
+    words: Dict[str, None] = {}
+    while len(words) < count:
+        chars: List[str] = []
+        for letter in rng.choices(letters, weights, k=rng.randint(2, 12)):
+            chars.append(letter)
+            if marks and rng.random() < 0.2:
+                chars.append(rng.choice(marks))
+        words["".join(chars)] = None
+    return list(words)
+
+
+def checked_in_words(lang: str) -> List[str]:
+    """The words of the checked-in dictionary parts of a language, in part order."""
+    words: List[str] = []
+    for file_path in sorted(split_dictionary.public_dir.joinpath(lang).glob("*.dic")):
+        with open(file_path, "r", encoding="utf-8") as file:
+            lines = file.read().split()
+        # u.dic starts with its entry count
+        words.extend(lines[1:] if file_path.name == "u.dic" else lines)
+    return words
+
+
+def changed_parts(output_dir: Path, checked_in_dir: Path) -> int:
+    """The number of .dic files that are not the same as the checked-in ones."""
+    written = {path.name: path for path in output_dir.glob("*.dic")}
+    checked_in = {path.name: path for path in checked_in_dir.glob("*.dic")}
+    return sum(
+        name not in written
+        or name not in checked_in
+        or written[name].read_bytes() != checked_in[name].read_bytes()
+        for name in written.keys() | checked_in.keys()
+    )
+
+
+def run_split(run: BenchmarkRun, work_dir: Path) -> Dict[str, Any]:
+    """Prepare the word-list of a run and split it, in this process."""
+    word_list = work_dir / f"{run.name}.txt"
+    changed: Optional[int] = None
+    if run.alphabet is None:
+        options = split_dictionary.recorded_options(run.lang) or split_dictionary.PartitionOptions(
+            split_dictionary.max_length(run.lang), run.threshold, run.split_threshold
+        )
+        source = split_dictionary.resources_dir / f"{run.lang}.txt"
+        if source.is_file():
+            word_list = source
+        else:
+            logging.info(f"No {source}; using the words of the checked-in {run.lang} parts")
+            word_list.write_text(
+                "".join(f"{word}\n" for word in checked_in_words(run.lang)), encoding="utf-8"
+            )
+    else:
+        options = split_dictionary.PartitionOptions(-1, run.threshold, run.split_threshold)
+        words = synthetic_words(run.alphabet, run.words, run.seed)
+        word_list.write_text("".join(f"{word}\n" for word in words), encoding="utf-8")
+
+    # Write the outputs to the work directory instead of over the checked-in files
+    checked_in_dir = split_dictionary.public_dir / run.lang
+    split_dictionary.public_dir = work_dir / "public"
+    split_dictionary.resources_dir = work_dir / "resources"
+    split_dictionary.public_dir.mkdir()
+    split_dictionary.resources_dir.mkdir()
+    start = time.perf_counter()
+    split_dictionary.split_dictionary(run.name, word_list, "NFD", options, run.jobs)
+    seconds = time.perf_counter() - start
+
+    output_dir = split_dictionary.public_dir / run.name
+    part_sizes = [path.stat().st_size for path in output_dir.glob("*.dic")]
+    if run.alphabet is None:
+        changed = changed_parts(output_dir, checked_in_dir)
+    return {
+        "name": run.name,
+        "run": asdict(run),
+        "options": options.command_line(),
+        "word_list_bytes": word_list.stat().st_size,
+        "seconds": seconds,
+        # The workers of --jobs are children of this process
+        "peak_rss_kib": benchmark_utils.peak_rss_kib(),
+        "parts": len(part_sizes),
+        "output_bytes": sum(part_sizes),
+        "max_part_bytes": max(part_sizes, default=0),
+        "changed_parts": changed,
+    }
+
+
+def run_in_process(run: BenchmarkRun) -> Dict[str, Any]:
+    with TemporaryDirectory() as work_dir:
+        return run_split(run, Path(work_dir))
+
+
+def result_name(result: Dict[str, Any]) -> str:
+    return str(result["name"])
+
+
+def check_limits(
+    report: Dict[str, Any], args: argparse.Namespace, baseline: Optional[Dict[str, Any]]
+) -> List[str]:
+    """Return a description of each limit exceeded by a result."""
+    limits = {
+        "seconds": args.max_seconds,
+        "peak_rss_kib": None if args.max_rss_mib is None else args.max_rss_mib * 1024,
+        "parts": args.max_parts,
+        "output_bytes": args.max_output_bytes,
+        "changed_parts": args.max_changed_parts,
+    }
+    baseline_results = benchmark_utils.results_by_key(baseline, result_name)
+    failures: List[str] = []
+    for result in report["results"]:
+        for metric, limit in limits.items():
+            if limit is not None and result[metric] is not None and result[metric] > limit:
+                failures.append(f"{result['name']}: {metric} {result[metric]} > {limit}")
+        previous = baseline_results.get(result["name"])
+        if previous is None or args.max_regression is None:
+            continue
+        for metric in REGRESSION_METRICS:
+            before = previous[metric]
+            if before > 0 and (result[metric] - before) / before > args.max_regression:
+                failures.append(
+                    f"{result['name']}: {metric} {result[metric]} regressed from {before}"
+                )
+    return failures
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    baseline_results = benchmark_utils.results_by_key(baseline, result_name)
+    for result in report["results"]:
+        previous = baseline_results.get(result["name"])
+        line = (
+            f"{result['name']:<18} {result['seconds']:>8.2f} s "
+            f"{result['peak_rss_kib'] / 1024:>8.1f} MiB {result['parts']:>5} parts "
+            f"{result['output_bytes'] / 1024:>10.1f} KiB"
+        )
+        if previous is not None and previous["seconds"] > 0:
+            line += f" {(result['seconds'] - previous['seconds']) / previous['seconds']:>+8.1%}"
+        if result["changed_parts"] is not None:
+            line += f", {result['changed_parts']} changed"
+        print(line)
+
+
+def main() -> None:
+    args = parse_args()
+    log_level = logging.INFO if args.verbose else logging.WARNING
+    logging.basicConfig(format="%(levelname)s:%(message)s", level=log_level)
+    runs = [BenchmarkRun(lang, jobs=args.jobs) for lang in args.langs]
+    runs.extend(
+        BenchmarkRun(
+            alphabet,
+            alphabet,
+            words,
+            args.threshold,
+            args.Threshold,
+            args.jobs,
+            args.seed,
+        )
+        for alphabet in args.synthetic
+        for words in args.words
+    )
+    baseline = benchmark_utils.load_report(args.baseline)
+    report = benchmark_utils.run_benchmark(run_in_process, runs, REPORT_VERSION)
+    benchmark_utils.write_report(report, args.output)
+    print_report(report, baseline)
+    failures = check_limits(report, args, baseline)
+    for failure in failures:
+        logging.error(failure)
+    if failures:
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
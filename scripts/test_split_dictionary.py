@@ -0,0 +1,160 @@
+"""Tests for split_dictionary.py; run with 'python -m unittest' in the scripts directory."""
+
+import json
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict, List
+import unittest
+from unittest import mock
+
+import split_dictionary
+from split_dictionary import OutputOptions, PartitionOptions
+
+WORDS = "casa cosa caso perro pero gato gata mesa masa\n"
+# Distinct words, with case variants, words that end at a split word-start, and
+# word-starts of every size
+PARTITION_WORDS = (
+    "Casa casa cosa caso cama cara carro carta Carla a al ala pero perro pera pez gato gata "
+    "mesa masa misa mes o oso"
+).split()
+
+
+class SplitDictionaryTestCase(unittest.TestCase):
+    """Split WORDS as language xx into temporary resources and public directories."""
+
+    def setUp(self) -> None:
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.resources_dir = Path(temp_dir.name) / "resources"
+        self.public_dir = Path(temp_dir.name) / "public"
+        self.resources_dir.mkdir()
+        self.public_dir.mkdir()
+        for name in ("resources_dir", "public_dir"):
+            patcher = mock.patch.object(split_dictionary, name, getattr(self, name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.word_list = Path(temp_dir.name) / "xx.txt"
+        self.word_list.write_text(WORDS, encoding="utf-8")
+        self.options = PartitionOptions(-1, 2, 4)
+
+    def split(self, output: OutputOptions) -> None:
+        split_dictionary.split_dictionary("xx", self.word_list, "NFD", self.options, output=output)
+
+
+class TestRecordedOptions(SplitDictionaryTestCase):
+    def test_bloom_error_rate_round_trip(self) -> None:
+        self.split(OutputOptions(bloom_error_rate=0.05))
+        self.assertTrue((self.public_dir / "xx" / "u.bloom").is_file())
+        self.assertEqual(split_dictionary.recorded_options("xx"), self.options)
+        self.assertEqual(split_dictionary.recorded_bloom_error_rate("xx"), 0.05)
+
+    def test_bloom_error_rate_round_trip_with_other_options(self) -> None:
+        self.split(OutputOptions(dawg=True, hashed_names=True, bloom_error_rate=0.001))
+        self.assertEqual(split_dictionary.recorded_options("xx"), self.options)
+        self.assertEqual(split_dictionary.recorded_bloom_error_rate("xx"), 0.001)
+
+    def test_no_bloom_filter(self) -> None:
+        self.split(OutputOptions())
+        self.assertEqual(split_dictionary.recorded_options("xx"), self.options)
+        self.assertIsNone(split_dictionary.recorded_bloom_error_rate("xx"))
+
+
+class TestIncremental(SplitDictionaryTestCase):
+    output = OutputOptions(dawg=True, incremental=True, hashed_names=True)
+
+    def files(self) -> Dict[str, bytes]:
+        return {path.name: path.read_bytes() for path in (self.public_dir / "xx").iterdir()}
+
+    def split_and_date_back(self) -> Dict[str, bytes]:
+        """Split the word-list and set the times of the files it wrote to the epoch."""
+        self.split(self.output)
+        for path in (self.public_dir / "xx").iterdir():
+            os.utime(path, ns=(0, 0))
+        return self.files()
+
+    def rewritten(self) -> List[str]:
+        """The names of the files written since split_and_date_back()."""
+        paths = (self.public_dir / "xx").iterdir()
+        return sorted(path.name for path in paths if path.stat().st_mtime_ns != 0)
+
+    def test_unchanged_input(self) -> None:
+        before = self.split_and_date_back()
+        self.split(self.output)
+        self.assertEqual(self.rewritten(), [])
+        self.assertEqual(self.files(), before)
+
+    def test_changed_part(self) -> None:
+        before = self.split_and_date_back()
+        self.word_list.write_text(WORDS.replace("gata", "gatito"), encoding="utf-8")
+        self.split(self.output)
+        after = self.files()
+        old_names = json.loads(before[split_dictionary.MANIFEST_FILE_NAME])
+        new_names = json.loads(after[split_dictionary.MANIFEST_FILE_NAME])
+        # Only the files of the part for g, u103, are replaced
+        changed = ["u103.dawg", "u103.dic"]
+        self.assertEqual(
+            {name for name in new_names if new_names[name] != old_names[name]}, set(changed)
+        )
+        self.assertEqual(
+            self.rewritten(),
+            sorted([split_dictionary.MANIFEST_FILE_NAME, *(new_names[name] for name in changed)]),
+        )
+        self.assertEqual(before.keys() - after.keys(), {old_names[name] for name in changed})
+        self.assertIn(b"gatito", after[new_names["u103.dic"]])
+
+
+class TestPartitionWords(unittest.TestCase):
+    """The parts are those of the recursive re-bucketing that the trie replaced."""
+
+    def test_nested_split(self) -> None:
+        self.assertEqual(
+            split_dictionary.partition_words(PARTITION_WORDS, 3, 3),
+            {
+                "cas": ["Casa", "casa", "caso"],
+                "car": ["cara", "carro", "carta", "Carla"],
+                "ca": ["cama"],
+                "c": ["cosa"],
+                "a": ["a", "al", "ala"],
+                "per": ["pero", "perro", "pera"],
+                "pe": ["pez"],
+                "m": ["mesa", "mes", "masa", "misa"],
+                "": ["gato", "gata", "o", "oso"],
+            },
+        )
+
+    def test_threshold_above_split_threshold(self) -> None:
+        self.assertEqual(
+            split_dictionary.partition_words(PARTITION_WORDS, 5, 2),
+            {
+                "ca": ["Casa", "casa", "caso", "cama", "cara", "carro", "carta", "Carla"],
+                "c": ["cosa"],
+                "": "a al ala pero perro pera pez gato gata mesa masa misa mes o oso".split(),
+            },
+        )
+
+
+class TestDawg(unittest.TestCase):
+    def round_trip(self, words: List[str]) -> bytes:
+        data = split_dictionary.serialize_dawg(split_dictionary.build_dawg(words))
+        self.assertEqual(split_dictionary.dawg_words(data), sorted(set(words)))
+        return data
+
+    def test_shared_suffixes(self) -> None:
+        data = self.round_trip("cats bat cat bars car bats bar cars".split())
+        # c and b lead to the same node, as do ca and ba, and cat, car, bat, and bar
+        self.assertEqual(split_dictionary.read_dawg_header(data)[2], 6)
+        self.assertTrue(split_dictionary.dawg_contains(data, "bars"))
+        self.assertFalse(split_dictionary.dawg_contains(data, "ca"))
+        self.assertFalse(split_dictionary.dawg_contains(data, "cab"))
+
+    def test_prefixes_and_duplicates(self) -> None:
+        self.round_trip("a ab abc b ab Casa casa cosa ñu ñandú".split())
+
+    def test_empty(self) -> None:
+        data = self.round_trip([])
+        self.assertFalse(split_dictionary.dawg_contains(data, "a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
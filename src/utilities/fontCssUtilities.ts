@@ -26,6 +26,20 @@ export async function fetchText(
   }
 }
 
+/** Given a url, returns the binary content of the result, or undefined if fetch fails. */
+export async function fetchArrayBuffer(
+  url: string
+): Promise<ArrayBuffer | undefined> {
+  const resp = await fetch(url);
+  if (resp.ok) {
+    return await resp.arrayBuffer();
+  }
+
+  console.warn(
+    `Failed to load file: ${url}\nPlease notify the admin this file is unavailable.`
+  );
+}
+
 /** Given a font and source, returns css info for the font from the source.
  * If substitute is specified, sub that in as the "font-family". */
 export async function fetchCss(
@@ -1,15 +1,46 @@
 import { type Project } from "api/models";
 import { newWritingSystem } from "types/writingSystem";
-import { fetchCss, getCss, getProjCss } from "utilities/fontCssUtilities";
+import {
+  fetchArrayBuffer,
+  fetchCss,
+  getCss,
+  getProjCss,
+} from "utilities/fontCssUtilities";
 
 global.fetch = () =>
   Promise.resolve({
+    arrayBuffer: mockFetchArrayBuffer,
     blob: () => Promise.resolve({ text: mockFetchText }),
-    ok: true,
+    ok: mockFetchOk,
   } as any as Response);
+const mockFetchArrayBuffer = jest.fn();
 const mockFetchText = jest.fn();
+let mockFetchOk = true;
+
+beforeEach(() => {
+  mockFetchOk = true;
+});
 
 describe("fontCssUtilities", () => {
+  describe("fetchArrayBuffer", () => {
+    const url = "/dictionaries/es/u97.dawg";
+
+    it("returns the binary content of a successful fetch", async () => {
+      const buffer = new ArrayBuffer(8);
+      mockFetchArrayBuffer.mockResolvedValueOnce(buffer);
+      expect(await fetchArrayBuffer(url)).toBe(buffer);
+    });
+
+    it("returns undefined and warns if the fetch fails", async () => {
+      mockFetchOk = false;
+      const mockWarn = jest.spyOn(console, "warn").mockImplementation();
+      expect(await fetchArrayBuffer(url)).toBeUndefined();
+      expect(mockFetchArrayBuffer).not.toHaveBeenCalled();
+      expect(mockWarn).toHaveBeenCalledTimes(1);
+      mockWarn.mockRestore();
+    });
+  });
+
   describe("fetchCss", () => {
     it("handles sources", async () => {
       const css = `@font{font-family: Font}`;